@@ -0,0 +1,438 @@
+# Hot-path benchmarks. Standalone, no extra dependencies:
+#
+#   python benchmarks/bench.py                         run everything, print a table
+#   python benchmarks/bench.py --out results.json      also write the JSON results
+#   python benchmarks/bench.py --save-baseline base.json
+#   python benchmarks/bench.py --baseline base.json --threshold 0.25
+#
+# With --baseline the exit code is 1 when any benchmark's median is more than
+# its threshold slower than the baseline. A baseline file may carry its own
+# "thresholds": {"name": 0.5} overrides. Baselines are machine specific, so
+# record one on the machine that compares against it.
+#
+# audio and process_monitor import on Linux (winsound/user32 are None there),
+# so the same suite runs in Linux CI; only psutil has to be installed.
+import os
+import sys
+import json
+import time
+import timeit
+import logging
+import argparse
+import platform
+import datetime
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from focus_guardian.config import TONE_FREQ_HZ, TONE_WAV_DURATION_SEC, TONE_VOLUME, SAMPLE_RATE
+from focus_guardian.audio import (
+    generate_tone_wav_bytes,
+    break_reminder_wav_bytes,
+    work_start_wav_bytes,
+    timer_end_wav_bytes,
+)
+from focus_guardian.usage_store import UsageStore
+from focus_guardian.game_db import GameDB
+from focus_guardian.archive import GameArchive
+from focus_guardian.process_monitor import TargetMatcher
+from focus_guardian.engine import FocusEngine
+from focus_guardian.clock import GapDetector, DayClock
+from focus_guardian.idle import FakeIdleSource
+
+
+DEFAULT_THRESHOLD = 0.25
+_BENCHMARKS: list[tuple[str, object]] = []
+_LOGGER = logging.getLogger("FocusGuardian.bench")
+_LOGGER.addHandler(logging.NullHandler())
+_LOGGER.propagate = False
+
+
+def bench(name: str):
+    # The decorated function does the setup and returns the timed callable.
+    def register(setup):
+        _BENCHMARKS.append((name, setup))
+        return setup
+    return register
+
+
+def _proc_names(n: int) -> list[str]:
+    return [f"app{i:04d}.exe" for i in range(n)]
+
+
+def _register_matcher(n_patterns: int) -> None:
+    @bench(f"matcher.match_key[patterns={n_patterns}]")
+    def _setup(tmp):
+        m = TargetMatcher()
+        # Mix of exact, substring and glob patterns; lookups hit and miss.
+        pats = []
+        for i in range(n_patterns):
+            pats.append((f"app{i:04d}.exe", f"tool{i}", f"game{i}*.exe")[i % 3])
+        m.set_from_text(", ".join(pats))
+        names = _proc_names(64) + [f"Other{i}.exe" for i in range(64)]
+
+        def run():
+            for n in names:
+                m.match_key(n)
+        return run
+
+
+for _n in (1, 10, 100, 1000):
+    _register_matcher(_n)
+
+
+@bench("usage_store.add_seconds")
+def _usage_add(tmp):
+    store = UsageStore(os.path.join(tmp, "usage_add.json"))
+    names = _proc_names(16)
+
+    def run():
+        for n in names:
+            store.add_seconds(n, 0.2)
+    return run
+
+
+def _filled_store(tmp, name: str) -> UsageStore:
+    store = UsageStore(os.path.join(tmp, name))
+    for i, n in enumerate(_proc_names(200)):
+        store.add_seconds(n, 1.0 + i)
+    return store
+
+
+@bench("usage_store.save[apps=200]")
+def _usage_save(tmp):
+    return _filled_store(tmp, "usage_save.json").save
+
+
+@bench("usage_store.load[apps=200]")
+def _usage_load(tmp):
+    path = os.path.join(tmp, "usage_load.json")
+    _filled_store(tmp, "usage_load.json").save()
+
+    def run():
+        UsageStore(path).load()
+    return run
+
+
+def _session(day: str, i: int) -> dict:
+    return {
+        "id": i,
+        "date": day,
+        "started_at": f"{day}T09:00:00",
+        "ended_at": f"{day}T09:25:00",
+        "planned_sec": 1500.0,
+        "study_sec": 1320.5 + i % 60,
+        "illegal_sec": 95.25,
+        "break_sec": 84.0,
+        "pauses_used": i % 3,
+        "illegal_switches": 4,
+        "illegal_by_app": {"discord.exe": 60.0, "chrome.exe": 35.25},
+        "notes": ["end:completed"],
+        "points": 18,
+        "reward": "Silver",
+    }
+
+
+def _history(days: int, sessions_per_day: int = 4) -> dict:
+    start = datetime.date.today() - datetime.timedelta(days=days - 1)
+    out = {}
+    n = 0
+    for d in range(days):
+        day = str(start + datetime.timedelta(days=d))
+        sessions = []
+        for _ in range(sessions_per_day):
+            sessions.append(_session(day, n))
+            n += 1
+        out[day] = {
+            "sessions": sessions,
+            "totals": {
+                "study_sec": sum(s["study_sec"] for s in sessions),
+                "illegal_sec": sum(s["illegal_sec"] for s in sessions),
+                "break_sec": sum(s["break_sec"] for s in sessions),
+                "points": sum(s["points"] for s in sessions),
+            },
+        }
+    return {
+        "schema": 1,
+        "days": out,
+        "lifetime": {
+            "xp": n * 18,
+            "level": 12,
+            "best_streak": 40,
+            "current_streak": 3,
+            "last_streak_date": str(datetime.date.today()),
+            "total_sessions": n,
+        },
+    }
+
+
+def _game_file(tmp, days: int) -> str:
+    path = os.path.join(tmp, f"game_{days}d.json")
+    if not os.path.exists(path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(_history(days), f, indent=2)
+    return path
+
+
+def _register_game(days: int, label: str) -> None:
+    @bench(f"game_db.load[history={label}]")
+    def _load(tmp):
+        path = _game_file(tmp, days)
+
+        def run():
+            GameDB(path, _LOGGER).load()
+        return run
+
+    @bench(f"game_db.save[history={label}]")
+    def _save(tmp):
+        db = GameDB(_game_file(tmp, days), _LOGGER)
+        db.load()
+        db._path = os.path.join(tmp, f"game_{days}d.out.json")
+        return db.save
+
+    @bench(f"game_db.snapshot_today[history={label}]")
+    def _snapshot(tmp):
+        db = GameDB(_game_file(tmp, days), _LOGGER)
+        db.load()
+        db.start_session(1500.0)
+        db.add_study_ns(600 * 10**9)
+        return db.snapshot_today
+
+
+for _days, _label in ((1, "1d"), (30, "30d"), (365, "1y"), (5 * 365, "5y")):
+    _register_game(_days, _label)
+
+
+def _archived_game(tmp, days: int) -> tuple[str, GameArchive]:
+    # The 5y history with everything past the default cutoff archived.
+    base = os.path.join(tmp, f"archived_{days}d")
+    path = os.path.join(base, "game.json")
+    archive = GameArchive(os.path.join(base, "archive"))
+    if not os.path.exists(path):
+        os.makedirs(base, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(_history(days), f, indent=2)
+        db = GameDB(path, _LOGGER)
+        db.set_archive(archive)
+        db.load()
+    return path, archive
+
+
+@bench("game_db.load[history=5y,archived]")
+def _load_archived(tmp):
+    path, archive = _archived_game(tmp, 5 * 365)
+
+    def run():
+        db = GameDB(path, _LOGGER)
+        db.set_archive(archive)
+        db.load()
+    return run
+
+
+@bench("game_archive.get_day[cold]")
+def _archive_cold(tmp):
+    path = _archived_game(tmp, 5 * 365)[0]
+    archive_dir = os.path.join(os.path.dirname(path), "archive")
+    day = str(datetime.date.today() - datetime.timedelta(days=400))
+
+    def run():
+        GameArchive(archive_dir).get_day(day)
+    return run
+
+
+@bench("game_archive.get_day[cached]")
+def _archive_cached(tmp):
+    archive = _archived_game(tmp, 5 * 365)[1]
+    day = str(datetime.date.today() - datetime.timedelta(days=400))
+    archive.get_day(day)
+    return lambda: archive.get_day(day)
+
+
+@bench("game_db._compute_points")
+def _points(tmp):
+    db = GameDB(os.path.join(tmp, "points.json"), _LOGGER)
+    sessions = [_session("2026-01-01", i) for i in range(32)]
+
+    def run():
+        for s in sessions:
+            db._compute_points(s)
+    return run
+
+
+@bench("audio.generate_tone_wav_bytes")
+def _tone(tmp):
+    return lambda: generate_tone_wav_bytes(TONE_FREQ_HZ, TONE_WAV_DURATION_SEC, TONE_VOLUME, SAMPLE_RATE)
+
+
+@bench("audio.break_reminder_wav_bytes")
+def _chime_break(tmp):
+    return break_reminder_wav_bytes
+
+
+@bench("audio.work_start_wav_bytes")
+def _chime_work(tmp):
+    return work_start_wav_bytes
+
+
+@bench("audio.timer_end_wav_bytes")
+def _chime_end(tmp):
+    return timer_end_wav_bytes
+
+
+class _NullTone:
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+
+def _register_tick(label: str, targets: str, strict: bool) -> None:
+    @bench(f"engine.tick[{label}]")
+    def _setup(tmp):
+        clock = {"now": 1000.0}
+
+        def wall_clock() -> float:
+            return 1.75e9 + clock["now"]
+
+        engine = FocusEngine(
+            store=UsageStore(os.path.join(tmp, f"tick_{label}_usage.json")),
+            game=GameDB(os.path.join(tmp, f"tick_{label}_game.json"), _LOGGER),
+            matcher=TargetMatcher(),
+            tone=_NullTone(),
+            logger=_LOGGER,
+            gap_detector=GapDetector(wall_clock=wall_clock),
+            wall_clock=wall_clock,
+            idle_source=FakeIdleSource(0.0),
+            day_clock=DayClock(wall_clock=wall_clock, monotonic=lambda: clock["now"]),
+        )
+        engine.tree = None
+        engine.sweep = None
+        engine._title_hook_tried = True
+        engine.chime = lambda name: None
+        samples = [
+            (1, 101, "code.exe", "bench.py - editor"),
+            (2, 102, "discord.exe", "general"),
+            (3, 103, "chrome.exe", "YouTube - video"),
+            (4, 104, "chrome.exe", "docs"),
+        ]
+        current = {"s": samples[0]}
+        engine.foreground = lambda: current["s"][:2]
+        engine.process_name = lambda pid: current["s"][2]
+        engine.titles._fetch = lambda hwnd: current["s"][3]
+        engine.set_targets_text(targets)
+        engine.set_daily_limit_text("60")
+        if strict:
+            engine.start_strict_timer(10_000, 5, False)
+        engine.tick(clock["now"])
+        i = 0
+
+        def run():
+            nonlocal i
+            i += 1
+            # Focus changes every 16 ticks, the rest are repeat samples.
+            current["s"] = samples[(i >> 4) & 3]
+            clock["now"] += 0.2
+            engine.tick(clock["now"])
+        return run
+
+
+_register_tick("idle-monitor", "discord.exe, chrome.exe", False)
+_register_tick("strict+titles", "discord.exe, title:youtube", True)
+
+
+def measure(fn, repeat: int, min_time: float) -> dict:
+    timer = timeit.Timer(fn)
+    number = 1
+    while True:
+        if timer.timeit(number) >= min_time:
+            break
+        number *= 2
+    runs = [t / number * 1e9 for t in timer.repeat(repeat, number)]
+    return {
+        "median_ns": round(statistics.median(runs), 1),
+        "min_ns": round(min(runs), 1),
+        "loops": number,
+        "repeat": repeat,
+    }
+
+
+def run_all(name_filter: str = "", repeat: int = 5, min_time: float = 0.2) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="focus-bench-") as tmp:
+        for name, setup in _BENCHMARKS:
+            if name_filter and name_filter not in name:
+                continue
+            results[name] = measure(setup(tmp), repeat, min_time)
+    return {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    overrides = baseline.get("thresholds") or {}
+    regressions = []
+    for name, res in current["results"].items():
+        base = (baseline.get("results") or {}).get(name)
+        if not base:
+            continue
+        limit = float(overrides.get(name, threshold))
+        ratio = res["median_ns"] / max(base["median_ns"], 1e-9)
+        res["baseline_ratio"] = round(ratio, 3)
+        if ratio > 1.0 + limit:
+            regressions.append(f"{name}: {ratio:.2f}x baseline (allowed {1.0 + limit:.2f}x)")
+    return regressions
+
+
+def _fmt_ns(ns: float) -> str:
+    for unit, div in (("s", 1e9), ("ms", 1e6), ("us", 1e3)):
+        if ns >= div:
+            return f"{ns / div:8.2f} {unit}"
+    return f"{ns:8.1f} ns"
+
+
+def main(argv: list[str] | None = None) -> int:
+    p = argparse.ArgumentParser(description="Focus Guardian hot-path benchmarks.")
+    p.add_argument("--filter", default="", help="only run benchmarks whose name contains this")
+    p.add_argument("--repeat", type=int, default=5, help="timed repeats per benchmark")
+    p.add_argument("--min-time", type=float, default=0.2, help="seconds per repeat (loop count scales up to it)")
+    p.add_argument("--out", help="write results JSON here")
+    p.add_argument("--save-baseline", help="write results JSON here as the new baseline")
+    p.add_argument("--baseline", help="compare against this baseline JSON")
+    p.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed slowdown fraction (0.25 = 25%%)")
+    args = p.parse_args(argv)
+
+    t0 = time.perf_counter()
+    current = run_all(args.filter, max(1, args.repeat), max(0.001, args.min_time))
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(current, json.load(f), args.threshold)
+
+    width = max((len(n) for n in current["results"]), default=10)
+    for name, res in current["results"].items():
+        ratio = res.get("baseline_ratio")
+        extra = f"  {ratio:.2f}x" if ratio is not None else ""
+        print(f"{name:<{width}}  {_fmt_ns(res['median_ns'])}{extra}")
+    print(f"{len(current['results'])} benchmarks in {time.perf_counter() - t0:.1f}s")
+
+    for path in (args.out, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(current, f, indent=2)
+
+    if regressions:
+        print("Regressions:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+# Cold start and memory, headless vs GUI. Every run is a fresh interpreter
+# with its own empty APPDATA/HOME, so only the OS file cache is warm:
+#
+#   python benchmarks/startup.py                    5 runs per mode, print a table
+#   python benchmarks/startup.py --runs 10 --out startup.json
+#   python benchmarks/startup.py --mode headless --mode gui
+#
+# Modes:
+#   headless     main.py --headless, up to its first monitor tick
+#   gui-imports  what GUI mode imports before the window exists (psutil,
+#                focus_guardian.app, customtkinter), then the same first tick;
+#                needs no display
+#   gui          main.py's GUI path up to the game panel (the first_tick,
+#                first_paint and game_ui milestones); needs a display
+#
+# ready_ms is measured inside the child from its first line; spawn_ms is the
+# parent's view and includes interpreter start-up. rss is taken at ready (psutil,
+# else /proc, else peak RSS). A mode that can't run here is reported with the
+# child's last error line instead of numbers.
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_PRELUDE = """\
+import time
+_t0 = time.perf_counter()
+import os, sys, json
+
+
+def _rss():
+    try:
+        import psutil
+        return int(psutil.Process().memory_info().rss)
+    except Exception:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        pass
+    try:
+        import resource
+        return int(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss) * 1024
+    except Exception:
+        return 0
+
+
+def _emit(**extra):
+    row = {"ready_ms": (time.perf_counter() - _t0) * 1000.0, "rss_bytes": _rss(), "modules": len(sys.modules)}
+    row.update(extra)
+    print("STARTUP " + json.dumps(row), flush=True)
+"""
+
+_CHILDREN = {
+    "headless": """
+from focus_guardian.headless import HeadlessApp, resolve_settings
+app = HeadlessApp(resolve_settings([]), started_at=_t0)
+app.engine.tick()
+_emit()
+""",
+    "gui-imports": """
+from focus_guardian.startup import StartupReport
+startup = StartupReport(_t0)
+startup.import_module("psutil")
+app_mod = startup.import_module("focus_guardian.app")
+app_mod._import_ui(startup)
+from focus_guardian.headless import HeadlessApp, resolve_settings
+app = HeadlessApp(resolve_settings([]), started_at=_t0)
+app.engine.tick()
+_emit(imports_ms=startup.imports)
+""",
+    "gui": """
+from focus_guardian.startup import StartupReport
+startup = StartupReport(_t0)
+startup.import_module("psutil")
+app_mod = startup.import_module("focus_guardian.app")
+app = app_mod.FocusGuardianApp(startup=startup)
+
+
+def _poll():
+    if all(k in startup.marks for k in ("first_tick", "first_paint", "game_ui")):
+        _emit(marks_ms=startup.marks, imports_ms=startup.imports)
+        os._exit(0)
+    app.root.after(10, _poll)
+
+
+app.root.after(10, _poll)
+app.run()
+""",
+}
+
+MODES = tuple(_CHILDREN)
+
+
+def run_once(mode: str, timeout: float) -> dict:
+    with tempfile.TemporaryDirectory(prefix="focus-startup-") as home:
+        env = dict(os.environ, APPDATA=home, HOME=home, USERPROFILE=home)
+        env["PYTHONPATH"] = os.pathsep.join(p for p in (ROOT, env.get("PYTHONPATH")) if p)
+        t0 = time.perf_counter()
+        try:
+            proc = subprocess.run(
+                [sys.executable, "-c", _PRELUDE + _CHILDREN[mode]],
+                cwd=ROOT,
+                env=env,
+                capture_output=True,
+                text=True,
+                timeout=timeout,
+            )
+        except subprocess.TimeoutExpired:
+            return {"error": f"timed out after {timeout:.0f}s"}
+        spawn_ms = (time.perf_counter() - t0) * 1000.0
+    for line in proc.stdout.splitlines():
+        if line.startswith("STARTUP "):
+            row = json.loads(line[len("STARTUP "):])
+            row["spawn_ms"] = spawn_ms
+            return row
+    lines = [l for l in proc.stderr.strip().splitlines() if l.strip()]
+    return {"error": lines[-1] if lines else f"exit code {proc.returncode}"}
+
+
+def summarize(rows: list[dict]) -> dict:
+    ok = [r for r in rows if "error" not in r]
+    if not ok:
+        return {"runs": 0, "error": rows[-1]["error"] if rows else "no runs"}
+    out = {"runs": len(ok)}
+    for key in ("ready_ms", "spawn_ms", "rss_bytes", "modules"):
+        out[key] = statistics.median(r[key] for r in ok)
+    for key in ("marks_ms", "imports_ms"):
+        if key in ok[0]:
+            names = ok[0][key]
+            out[key] = {n: statistics.median(r[key][n] for r in ok if n in r.get(key, {})) for n in names}
+    return out
+
+
+def main(argv: list[str] | None = None) -> int:
+    p = argparse.ArgumentParser(description="Focus Guardian cold start and RSS, headless vs GUI.")
+    p.add_argument("--mode", action="append", choices=MODES, help="mode to run (repeatable; default all)")
+    p.add_argument("--runs", type=int, default=5, help="fresh processes per mode")
+    p.add_argument("--timeout", type=float, default=60.0, help="seconds before a run is abandoned")
+    p.add_argument("--out", help="write results JSON here")
+    args = p.parse_args(argv)
+
+    results = {}
+    for mode in args.mode or MODES:
+        rows = []
+        for _ in range(max(1, args.runs)):
+            rows.append(run_once(mode, args.timeout))
+            if "error" in rows[-1]:
+                break  # the same thing fails every time
+        results[mode] = summarize(rows)
+
+    print(f"{'mode':<12}  {'ready':>9}  {'spawn':>9}  {'rss':>9}  {'modules':>7}")
+    for mode, res in results.items():
+        if not res["runs"]:
+            print(f"{mode:<12}  unavailable: {res['error']}")
+            continue
+        print(
+            f"{mode:<12}  {res['ready_ms']:>6.1f} ms  {res['spawn_ms']:>6.1f} ms"
+            f"  {res['rss_bytes'] / 1e6:>6.1f} MB  {res['modules']:>7.0f}"
+        )
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "runs": args.runs,
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,136 +1,161 @@
 import threading
 import time
-import math
-import customtkinter as ctk
 
 from .config import (
     APP_TITLE,
     APPDATA_DIR,
     DATA_FILE,
     GAME_FILE,
+    RULES_FILE,
     TONE_FILE,
-    POLL_INTERVAL_SEC,
-    UI_UPDATE_MIN_INTERVAL_SEC,
-    SAVE_EVERY_SEC,
     STRICT_MAX_PAUSES,
+    IPC_PORT,
+    TRACE_FILE,
+    MONITOR_PROCESS,
+    ASYNC_RUNTIME,
+    QUIT_JOIN_SEC,
+    DEFAULT_TARGETS_TEXT,
+    DEFAULT_DAILY_LIMIT_MIN,
+    DEFAULT_STRICT_MIN,
+    DEFAULT_BREAK_MIN,
+    STARTUP_REPORT_FILE,
+    SYNC_DIR,
+    SYNC_DEVICE_FILE,
+    ARCHIVE_DIR,
 )
-from .utils import ensure_dir, seconds_to_mmss
+from .utils import ensure_dir, seconds_to_mmss, process_rss_bytes
 from .logging_setup import setup_logger
-from .audio import (
-    ensure_tone_file,
-    LoopingTone,
-    trigger_timer_end_sound,
-    trigger_work_start_sound,
-    trigger_break_reminder_sound,
-)
+from .audio import LoopingTone
 from .usage_store import UsageStore
 from .game_db import GameDB
-from .process_monitor import get_foreground_pid, safe_process_name, TargetMatcher
-from .tray import TrayController
+from .archive import GameArchive
+from .process_monitor import TargetMatcher
+from .engine import FocusEngine
+from .rules import load_rules
+from .ipc import ControlServer
+from .profiler import SamplingProfiler
+from .trace import TraceRecorder
+from .runtime import AsyncRuntime, TkBridge
+from .startup import StartupReport
+from .sync import SyncJournal, device_id
+
+
+# customtkinter is imported once the monitor is running (see _import_ui); the
+# tray (pystray, PIL) on first hide.
+ctk = None
 
 
-ctk.set_appearance_mode("Dark")
-ctk.set_default_color_theme("blue")
+def _import_ui(startup: StartupReport) -> None:
+    global ctk
+    if ctk is not None:
+        return
+    ctk = startup.import_module("customtkinter")
+    ctk.set_appearance_mode("Dark")
+    ctk.set_default_color_theme("blue")
 
 
 class FocusGuardianApp:
-    def __init__(self):
+    def __init__(
+        self,
+        started_at: float | None = None,
+        monitor_process: bool = MONITOR_PROCESS,
+        startup: StartupReport | None = None,
+    ):
+        self.startup = startup or StartupReport(started_at)
         ensure_dir(APPDATA_DIR)
-        ensure_tone_file(TONE_FILE)
 
         self.logger = setup_logger()
         self.logger.info("App start")
 
+        # Engine, tray and IPC threads hand UI work to the Tk thread through
+        # this; it is attached to the window once that exists.
+        self.bridge = TkBridge()
+
+        self.matcher = TargetMatcher()
+        self.ipc = None
+        self.runtime = None
+        self.tray = None
+        self._last_status: dict | None = None
+        self._game_ui_built = False
+        self._first_map = False
+
+        if monitor_process:
+            # The child owns the data files, tone, trace and control API.
+            from .monitor_process import MonitorProcess
+
+            self.engine = MonitorProcess(self.logger, ui=self)
+            self.store = self.engine.usage_view
+            self.game = self.engine.game_view
+        else:
+            self.store = UsageStore(DATA_FILE)
+            self.store.load()
+
+            # Read when the game panel is first shown.
+            self.game = GameDB(GAME_FILE, self.logger)
+            self.game.set_archive(GameArchive(ARCHIVE_DIR))
+            self.game.defer_load()
+
+            self.tone = LoopingTone(TONE_FILE)
+
+            self.engine = FocusEngine(
+                store=self.store,
+                game=self.game,
+                matcher=self.matcher,
+                tone=self.tone,
+                logger=self.logger,
+                ui=self,
+            )
+            if TRACE_FILE:
+                self.engine.set_recorder(TraceRecorder(TRACE_FILE))
+            if SYNC_DIR:
+                self.engine.sync = SyncJournal(SYNC_DIR, device_id(SYNC_DEVICE_FILE), self.store, self.game, self.logger)
+        # Same values the entries are filled with in _apply_defaults.
+        self.engine.set_targets_text(DEFAULT_TARGETS_TEXT)
+        self.engine.set_daily_limit_text(str(DEFAULT_DAILY_LIMIT_MIN))
+        self.engine.set_rules(load_rules(RULES_FILE, self.logger))
+
+        self.profiler = SamplingProfiler(self.logger)
+
+        # Enforcement first, window second.
+        if ASYNC_RUNTIME and not monitor_process:
+            self.runtime = AsyncRuntime(self.engine, self.logger, IPC_PORT, profiler=self.profiler)
+            self._monitor_thread = self.runtime.start_in_thread()
+        else:
+            self._monitor_thread = threading.Thread(target=self.engine.run, name="FocusGuardianMonitor", daemon=True)
+            self._monitor_thread.start()
+
+            if IPC_PORT > 0 and not monitor_process:
+                self.ipc = ControlServer(self.engine, self.logger, IPC_PORT, profiler=self.profiler)
+                self.ipc.start()
+        self.startup.mark("monitor_started")
+
+        _import_ui(self.startup)
         self.root = ctk.CTk()
         self.root.title(APP_TITLE)
         self.root.geometry("420x740")
         self.root.minsize(420, 740)
         self.root.protocol("WM_DELETE_WINDOW", self.hide_to_tray)
+        self.root.bind("<Map>", self._on_map, add="+")
+        self.bridge.attach(self.root)
 
-        self._stop_event = threading.Event()
         self._monitor_enabled = ctk.BooleanVar(value=True)
 
-        self._strict_active = False
-        self._strict_paused = False
-        self._strict_remaining_sec = 0.0
-        self._strict_end_mono = 0.0
-        self._strict_pause_count = 0
-        self._break_paused = False  # NEW
-        self._break_remaining_sec = 0.0  # NEW
-        self._last_break_reminder_mono = 0.0  # NEW
-        self._last_break_illegal_reminder_mono = 0.0
-        self._last_pause_reminder_mono = 0.0
-        # --- POMODORO VARIABLES ADDED HERE ---
-        self._break_active = False
-        self._break_end_mono = 0.0
-        self._pomodoro_loop = False
-        self._planned_focus_sec = 0.0
-        self._planned_break_sec = 0.0
-        # -------------------------------------
-
-        self._last_ui_update = 0.0
-        self._last_save_mono = 0.0
-
-        self.store = UsageStore(DATA_FILE)
-        self.store.load()
-
-        self.game = GameDB(GAME_FILE, self.logger)
-        self.game.load()
-
-        self.matcher = TargetMatcher()
-        self.tone = LoopingTone(TONE_FILE)
-
-        self.tray = TrayController(
-            title=APP_TITLE,
-            on_show=self.show_from_tray,
-            on_quit=self.quit_app,
-        )
-
         self._build_ui()
         self._apply_defaults()
+        self.startup.mark("ui_built")
 
-        self._monitor_thread = threading.Thread(target=self._monitor_loop, daemon=True)
-        self._monitor_thread.start()
     # UI
     def _build_ui(self) -> None:
         self.header = ctk.CTkLabel(self.root, text=APP_TITLE, font=("Roboto", 26, "bold"))
         self.header.pack(pady=(18, 8))
 
-        self.frame_game = ctk.CTkFrame(self.root)
-        self.frame_game.pack(padx=18, pady=(6, 10), fill="x")
-
-        self.game_top = ctk.CTkLabel(self.frame_game, text="Game", font=("Arial", 16, "bold"))
-        self.game_top.grid(row=0, column=0, sticky="w", padx=12, pady=(10, 4))
-
-        self.reward_label = ctk.CTkLabel(self.frame_game, text="Reward: None", text_color="gray")
-        self.reward_label.grid(row=0, column=1, sticky="e", padx=12, pady=(10, 4))
-
-        self.today_score_label = ctk.CTkLabel(self.frame_game, text="Today score: 0", anchor="w")
-        self.today_score_label.grid(row=1, column=0, sticky="w", padx=12, pady=2)
-
-        self.session_xp_label = ctk.CTkLabel(self.frame_game, text="Session XP: 0", anchor="w")
-        self.session_xp_label.grid(row=2, column=0, sticky="w", padx=12, pady=2)
-
-        self.level_label = ctk.CTkLabel(self.frame_game, text="Level: 1 (XP 0)", anchor="w")
-        self.level_label.grid(row=1, column=1, sticky="e", padx=12, pady=2)
-
-        self.streak_label = ctk.CTkLabel(self.frame_game, text="Streak: 0 (best 0)", anchor="w")
-        self.streak_label.grid(row=2, column=1, sticky="e", padx=12, pady=2)
-
-        self.level_bar = ctk.CTkProgressBar(self.frame_game)
-        self.level_bar.grid(row=3, column=0, columnspan=2, sticky="ew", padx=12, pady=(6, 10))
-        self.level_bar.set(0.0)
-
-        self.frame_game.grid_columnconfigure(0, weight=1)
-        self.frame_game.grid_columnconfigure(1, weight=1)
-
         self.frame_targets = ctk.CTkFrame(self.root)
         self.frame_targets.pack(padx=18, pady=(6, 8), fill="x")
 
         ctk.CTkLabel(self.frame_targets, text="Target processes (illegal apps), comma-separated:").pack(
             anchor="w", padx=12, pady=(10, 4)
         )
-        self.targets_entry = ctk.CTkEntry(self.frame_targets, placeholder_text="chrome.exe, discord.exe")
+        self.targets_entry = ctk.CTkEntry(self.frame_targets, placeholder_text=DEFAULT_TARGETS_TEXT)
         self.targets_entry.pack(padx=12, pady=(0, 12), fill="x")
 
         self.frame_daily = ctk.CTkFrame(self.root)
@@ -240,6 +265,43 @@ class FocusGuardianApp:
         self.usage_box.pack(fill="x", expand=False, padx=12, pady=(0, 10))
         self.usage_box.configure(state="disabled")
 
+        self.footer = ctk.CTkLabel(
+            self.root,
+            text='Tip: Click "X" to hide to tray. Use tray menu to show or quit.',
+            text_color="gray",
+        )
+        self.footer.pack(pady=(0, 12))
+
+    def _build_game_ui(self) -> None:
+        # Built after the first paint; this is also when game history is read.
+        self.frame_game = ctk.CTkFrame(self.root)
+        self.frame_game.pack(padx=18, pady=(6, 10), fill="x", after=self.header)
+
+        self.game_top = ctk.CTkLabel(self.frame_game, text="Game", font=("Arial", 16, "bold"))
+        self.game_top.grid(row=0, column=0, sticky="w", padx=12, pady=(10, 4))
+
+        self.reward_label = ctk.CTkLabel(self.frame_game, text="Reward: None", text_color="gray")
+        self.reward_label.grid(row=0, column=1, sticky="e", padx=12, pady=(10, 4))
+
+        self.today_score_label = ctk.CTkLabel(self.frame_game, text="Today score: 0", anchor="w")
+        self.today_score_label.grid(row=1, column=0, sticky="w", padx=12, pady=2)
+
+        self.session_xp_label = ctk.CTkLabel(self.frame_game, text="Session XP: 0", anchor="w")
+        self.session_xp_label.grid(row=2, column=0, sticky="w", padx=12, pady=2)
+
+        self.level_label = ctk.CTkLabel(self.frame_game, text="Level: 1 (XP 0)", anchor="w")
+        self.level_label.grid(row=1, column=1, sticky="e", padx=12, pady=2)
+
+        self.streak_label = ctk.CTkLabel(self.frame_game, text="Streak: 0 (best 0)", anchor="w")
+        self.streak_label.grid(row=2, column=1, sticky="e", padx=12, pady=2)
+
+        self.level_bar = ctk.CTkProgressBar(self.frame_game)
+        self.level_bar.grid(row=3, column=0, columnspan=2, sticky="ew", padx=12, pady=(6, 10))
+        self.level_bar.set(0.0)
+
+        self.frame_game.grid_columnconfigure(0, weight=1)
+        self.frame_game.grid_columnconfigure(1, weight=1)
+
         ctk.CTkLabel(self.frame_info, text="Game statistics (today):", anchor="w").pack(
             fill="x", padx=12, pady=(0, 4)
         )
@@ -247,33 +309,53 @@ class FocusGuardianApp:
         self.game_stats_box.pack(fill="both", expand=True, padx=12, pady=(0, 12))
         self.game_stats_box.configure(state="disabled")
 
-        self.footer = ctk.CTkLabel(
-            self.root,
-            text='Tip: Click "X" to hide to tray. Use tray menu to show or quit.',
-            text_color="gray",
-        )
-        self.footer.pack(pady=(0, 12))
+        self._game_ui_built = True
+        self._refresh_game_ui()
+
+    def _on_map(self, _event=None) -> None:
+        if self._first_map:
+            return
+        self._first_map = True
+        # Queued behind the redraws the map just scheduled.
+        self.root.after_idle(self._on_first_paint)
+
+    def _on_first_paint(self) -> None:
+        self._startup_mark("first_paint")
+        self._build_game_ui()
+        self._startup_mark("game_ui")
+
+    def _startup_mark(self, name: str) -> None:
+        if self.startup.mark(name):
+            rss = process_rss_bytes()
+            self.logger.info(f"{self.startup.summary()} rss={rss / 1e6:.1f} MB")
+            self.startup.append_to(STARTUP_REPORT_FILE, rss_bytes=rss)
+
     def _apply_defaults(self) -> None:
+        # The engine already has these (see __init__).
         if not self.targets_entry.get().strip():
-            self.targets_entry.insert(0, "chrome.exe, discord.exe")
+            self.targets_entry.insert(0, DEFAULT_TARGETS_TEXT)
         if not self.daily_limit_entry.get().strip():
-            self.daily_limit_entry.insert(0, "60")
+            self.daily_limit_entry.insert(0, str(DEFAULT_DAILY_LIMIT_MIN))
         if not self.strict_minutes_entry.get().strip():
-            self.strict_minutes_entry.insert(0, "30")
+            self.strict_minutes_entry.insert(0, str(DEFAULT_STRICT_MIN))
         if not self.break_minutes_entry.get().strip():
-            self.break_minutes_entry.insert(0, "5")
+            self.break_minutes_entry.insert(0, str(DEFAULT_BREAK_MIN))
+
+        self.targets_entry.bind("<KeyRelease>", self._on_settings_edit)
+        self.daily_limit_entry.bind("<KeyRelease>", self._on_settings_edit)
 
         self.matcher.set_from_text(self.targets_entry.get())
         self._refresh_usage_box()
-        self._refresh_game_ui()
         self._update_pause_button_text()
         self._update_stop_button_state()
 
+    def _on_settings_edit(self, _event=None) -> None:
+        self.engine.set_targets_text(self.targets_entry.get())
+        self.engine.set_daily_limit_text(self.daily_limit_entry.get())
+
     def _on_monitor_toggle(self) -> None:
         enabled = bool(self._monitor_enabled.get())
-        self.logger.info(f"Monitoring toggled enabled={enabled}")
-        if not enabled:
-            self.tone.stop()
+        self.engine.set_enabled(enabled)
         self._safe_ui_update_status_line(enabled)
 
     def _safe_ui_update_status_line(self, enabled: bool) -> None:
@@ -282,155 +364,117 @@ class FocusGuardianApp:
                 self.status_line.configure(text="Status: monitoring", text_color="#2ecc71")
             else:
                 self.status_line.configure(text="Status: paused", text_color="red")
-        self.root.after(0, _do)
+        self.bridge.post(_do)
 
     def start_strict_timer(self) -> None:
         try:
             mins = float(self.strict_minutes_entry.get().strip())
-            break_mins = float(self.break_minutes_entry.get().strip())  # NEW
-            if mins <= 0:
-                return
+            break_mins = float(self.break_minutes_entry.get().strip())
         except Exception:
             return
 
-        total_sec = mins * 60.0
-
-        # --- NEW SETUP ---
-        self._planned_focus_sec = total_sec
-        self._planned_break_sec = break_mins * 60.0
-        self._pomodoro_loop = self._pomodoro_var.get()
-        self._break_active = False
-        self._break_paused = False
-        self._break_remaining_sec = 0.0
-        self._last_break_reminder_mono = 0.0
-        self._last_break_illegal_reminder_mono = 0.0
-        self._last_pause_reminder_mono = 0.0
-        # -----------------
-
-        self._strict_active = True
-        self._strict_paused = False
-        self._strict_remaining_sec = total_sec
-        self._strict_end_mono = time.monotonic() + total_sec
-        self._strict_pause_count = 0
-        self._update_pause_button_text()
-        self._update_stop_button_state()
+        was_enabled = self.engine.is_enabled()
+        if not self.engine.start_strict_timer(mins, break_mins, bool(self._pomodoro_var.get())):
+            return
 
-        self.game.start_session(total_sec)
-        # ... rest of function stays the same ...
-        if not self._monitor_enabled.get():
+        if not was_enabled:
             self._monitor_enabled.set(True)
             self._safe_ui_update_status_line(True)
 
-        self.logger.info(f"Strict timer started mins={mins}")
+    # Engine UI hooks (called from the monitor thread)
+    def on_timer_changed(self) -> None:
+        self._update_pause_button_text()
+        self._update_stop_button_state()
+
+    def on_status(self, status: dict) -> None:
+        self._last_status = status
+        self._startup_mark("first_tick")
+        status_color = "red" if status["punishing"] else "#2ecc71"
+        if status["break_active"]:
+            status_color = "#3498db"
+
+        self._set_labels(
+            active_proc=status["active_proc"],
+            illegal_focused=status["illegal_focused"],
+            strict_text=status["strict_text"],
+            limit_text=status["limit_text"],
+            status_color=status_color,
+        )
+        self._refresh_usage_box()
+        self._refresh_game_ui()
+        self._update_pause_button_text()
+        self._update_stop_button_state()
+        if self.tray is not None:
+            self.tray.update(status)
 
     def _update_pause_button_text(self) -> None:
         def _do():
-            if self._break_active:
+            ts = self.engine.timer_state()
+            if ts["break_active"]:
                 self.pause_btn.configure(state="normal")
-                if self._break_paused:
+                if ts["break_paused"]:
                     self.pause_btn.configure(text="Resume Break")
                 else:
                     self.pause_btn.configure(text="Pause Break")
                 return
 
-            if not self._strict_active:
+            if not ts["strict_active"]:
                 self.pause_btn.configure(
                     text=f"Pause strict timer (0/{STRICT_MAX_PAUSES})",
                     state="disabled",
                 )
                 return
 
+            pause_count = ts["strict_pause_count"]
             state = "normal"
-            if self._strict_pause_count >= STRICT_MAX_PAUSES and not self._strict_paused:
+            if pause_count >= STRICT_MAX_PAUSES and not ts["strict_paused"]:
                 state = "disabled"
             label = (
                 "Resume strict timer"
-                if self._strict_paused
-                else f"Pause strict timer ({self._strict_pause_count}/{STRICT_MAX_PAUSES})"
+                if ts["strict_paused"]
+                else f"Pause strict timer ({pause_count}/{STRICT_MAX_PAUSES})"
             )
             self.pause_btn.configure(text=label, state=state)
 
-        self.root.after(0, _do)
+        self.bridge.post(_do)
 
     def _update_stop_button_state(self) -> None:
         def _do():
-            if self._strict_active or self._break_active:
+            ts = self.engine.timer_state()
+            if ts["strict_active"] or ts["break_active"]:
                 self.stop_btn.configure(state="normal")
             else:
                 self.stop_btn.configure(state="disabled")
 
-        self.root.after(0, _do)
+        self.bridge.post(_do)
 
     def stop_strict_timer(self) -> None:
-        if not self._strict_active and not self._break_active:
-            return
-
-        self._strict_active = False
-        self._strict_paused = False
-        self._strict_remaining_sec = 0.0
-        self._strict_pause_count = 0
-        self._break_active = False
-        self._break_paused = False
-        self._break_remaining_sec = 0.0
-        self._last_break_reminder_mono = 0.0
-        self._last_break_illegal_reminder_mono = 0.0
-        self._last_pause_reminder_mono = 0.0
-
-        self.tone.stop()
-
-        if self.game.is_session_active():
-            self.game.end_session("stopped")
-
-        self._update_pause_button_text()
-        self._update_stop_button_state()
-        self.logger.info("Strict/break session stopped")
+        self.engine.stop_strict_timer()
 
     def toggle_pause_strict_timer(self) -> None:
-        if self._break_active:
-            if self._break_paused:
-                self._break_paused = False
-                self._break_end_mono = time.monotonic() + self._break_remaining_sec
-                self._last_break_reminder_mono = time.monotonic()
-                self._update_pause_button_text()
-                self.logger.info("Break resumed")
-            else:
-                self._break_paused = True
-                now = time.monotonic()
-                self._break_remaining_sec = max(0.0, self._break_end_mono - now)
-                self._last_break_reminder_mono = now
-                self._update_pause_button_text()
-                self.logger.info("Break paused")
-            return
-
-        if not self._strict_active:
-            return
-
-        if self._strict_paused:
-            self._strict_paused = False
-            self._strict_end_mono = time.monotonic() + max(0.0, self._strict_remaining_sec)
-            self._update_pause_button_text()
-            self.logger.info("Strict resumed")
-            return
-
-        if self._strict_pause_count >= STRICT_MAX_PAUSES:
-            self._update_pause_button_text()
-            return
-
-        now = time.monotonic()
-        remaining = self._strict_end_mono - now
-        self._strict_remaining_sec = max(0.0, remaining)
-        self._strict_paused = True
-        self._strict_pause_count += 1
-        self._last_pause_reminder_mono = now
-        self._update_pause_button_text()
-
-        self.game.note_pause_used()
-        self.logger.info(f"Strict paused pause_count={self._strict_pause_count}")
+        self.engine.toggle_pause_strict_timer()
 
     # Tray
+    def _ensure_tray(self):
+        if self.tray is None:
+            t0 = time.perf_counter()
+            from .tray import TrayController
+
+            self.tray = TrayController(
+                title=APP_TITLE,
+                on_show=self.show_from_tray,
+                on_quit=self.quit_app,
+                on_profile=getattr(self.engine, "start_profile", self.profiler.start),
+            )
+            self.logger.info(f"Tray loaded in {(time.perf_counter() - t0) * 1000.0:.1f} ms")
+            # Draw the current timer, not the idle ring, from the first frame.
+            if self._last_status is not None:
+                self.tray.update(self._last_status)
+        return self.tray
+
     def hide_to_tray(self) -> None:
         self.logger.info("Hide to tray")
-        self.tray.ensure_running()
+        self._ensure_tray().ensure_running()
         self.root.withdraw()
 
     def show_from_tray(self) -> None:
@@ -444,37 +488,32 @@ class FocusGuardianApp:
             except Exception:
                 pass
 
-        self.root.after(0, _do)
+        self.bridge.post(_do)
 
     def quit_app(self) -> None:
         self.logger.info("Quit requested")
-        self._stop_event.set()
-        self.tone.stop()
-        self.store.save()
-        self.game.save()
-
-        if self._strict_active and self.game.is_session_active():
-            self.game.end_session("quit")
+        if self.runtime is not None:
+            self.runtime.stop()
+        else:
+            self.engine.quit()
+        if self.ipc is not None:
+            self.ipc.stop()
+        # Either way the monitor thread ends the session and saves on its way
+        # out (engine.shutdown); that must finish before the window goes.
+        if self._monitor_thread is not None:
+            self._monitor_thread.join(QUIT_JOIN_SEC)
 
         def _do():
             try:
-                self.tray.stop()
+                if self.tray is not None:
+                    self.tray.stop()
                 self.root.destroy()
             except Exception:
                 pass
 
-        self.root.after(0, _do)
-
-    # Monitor loop
-    def _read_daily_limit_seconds(self) -> float:
-        try:
-            mins = float(self.daily_limit_entry.get().strip())
-            if mins <= 0:
-                return float("inf")
-            return mins * 60.0
-        except Exception:
-            return float("inf")
+        self.bridge.post(_do)
 
+    # Monitor UI
     def _refresh_usage_box(self) -> None:
         date_str, usage = self.store.snapshot()
         lines = [f"Date: {date_str}", ""]
@@ -492,9 +531,11 @@ class FocusGuardianApp:
             self.usage_box.insert("1.0", content)
             self.usage_box.configure(state="disabled")
 
-        self.root.after(0, _do)
+        self.bridge.post(_do)
 
     def _refresh_game_ui(self) -> None:
+        if not self._game_ui_built:
+            return
         snap = self.game.snapshot_today()
         day = snap.get("day", {})
         lt = snap.get("lifetime", {})
@@ -559,7 +600,7 @@ class FocusGuardianApp:
             self.game_stats_box.insert("1.0", stats_text)
             self.game_stats_box.configure(state="disabled")
 
-        self.root.after(0, _do)
+        self.bridge.post(_do)
 
     def _set_labels(
         self,
@@ -582,218 +623,8 @@ class FocusGuardianApp:
             if status_color is not None:
                 self.status_line.configure(text_color=status_color)
 
-        self.root.after(0, _do)
-
-    def _monitor_loop(self) -> None:
-        last_tick = time.monotonic()
-        self._last_save_mono = last_tick
-        last_targets_text = None
-        prev_illegal_focus = False
-
-        while not self._stop_event.is_set():
-            now = time.monotonic()
-            dt = now - last_tick
-            last_tick = now
-
-            self.store.reset_if_new_day()
-            self.game.reset_if_new_day()
-
-            # ... (targets text logic same as before) ...
-
-            try:
-                targets_text = self.targets_entry.get()
-            except Exception:
-                targets_text = ""
-            if targets_text != last_targets_text:
-                last_targets_text = targets_text
-                self.matcher.set_from_text(targets_text)
-                self.logger.info(f"Targets updated: {targets_text}")
-
-            enabled = bool(self._monitor_enabled.get())
-            strict_remaining = 0.0
-
-            if self._strict_active:
-                # === FOCUS SESSION ===
-                if self._strict_paused:
-                    strict_remaining = max(0.0, self._strict_remaining_sec)
-                    self.game.add_break(dt, reason="paused")
-                    if (now - self._last_pause_reminder_mono) >= 60.0:
-                        trigger_break_reminder_sound()
-                        self._last_pause_reminder_mono = now
-                else:
-                    strict_remaining = self._strict_end_mono - now
-                    if strict_remaining <= 0:
-                        # Focus Finished
-                        self._strict_active = False
-                        self._strict_paused = False
-                        strict_remaining = 0.0
-                        self._strict_pause_count = 0
-                        self._update_pause_button_text()
-
-                        trigger_timer_end_sound()
-                        if self.game.is_session_active():
-                            self.game.end_session("completed")
-
-                        if self._pomodoro_loop:
-                            # Start Break
-                            self._break_active = True
-                            self._break_paused = False
-                            self._break_end_mono = now + self._planned_break_sec
-                            self._break_remaining_sec = self._planned_break_sec
-                            self._last_break_reminder_mono = now  # Reset reminder timer
-                            self._last_break_illegal_reminder_mono = now
-                            self._last_pause_reminder_mono = 0.0
-                            self._update_pause_button_text()  # Update button to "Pause Break"
-                            self.logger.info("Pomodoro: Focus done, starting break")
-                        else:
-                            self._strict_remaining_sec = 0.0
-                    else:
-                        self._strict_remaining_sec = max(0.0, strict_remaining)
-
-            elif self._break_active:
-                # === BREAK SESSION ===
-                if self._break_paused:
-                    # Do not countdown, use stored remaining time
-                    if (now - self._last_break_reminder_mono) >= 60.0:
-                        trigger_break_reminder_sound()
-                        self._last_break_reminder_mono = now
-                else:
-                    break_remaining = self._break_end_mono - now
-                self._break_remaining_sec = max(0.0, break_remaining)
-
-                    if break_remaining <= 0:
-                        # Break Finished -> Restart Focus
-                        trigger_work_start_sound()
-                        self._break_active = False
-                        self._break_paused = False
-                        self._last_break_illegal_reminder_mono = 0.0
-
-                        self._strict_active = True
-                        self._strict_paused = False
-                        self._strict_remaining_sec = self._planned_focus_sec
-                        self._strict_end_mono = now + self._planned_focus_sec
-                        self._strict_pause_count = 0
-                        self._update_pause_button_text()
-
-                        self.game.start_session(self._planned_focus_sec)
-                        self.logger.info("Pomodoro: Break done, restarting focus")
-
-            # Update Status Text
-            if self._break_active:
-                if self._break_paused:
-                    strict_text = f"Pomodoro Break: PAUSED ({seconds_to_mmss(self._break_remaining_sec)} left)"
-                else:
-                    rem = max(0.0, self._break_remaining_sec)
-                    strict_text = f"Pomodoro Break: {seconds_to_mmss(rem)} left"
-            elif not self._strict_active:
-                strict_text = "Strict timer: inactive"
-            else:
-                if self._strict_paused:
-                    strict_text = f"Strict timer: paused ({seconds_to_mmss(strict_remaining)} left)"
-                else:
-                    strict_text = f"Strict timer: active ({seconds_to_mmss(strict_remaining)} left)"
-
-            # ... (Rest of function for active_proc, match_key, limit_sec, etc. stays the same) ...
-            # Ensure you include the rest of the original _monitor_loop code below here
-
-            active_proc = None
-            match_key = None
-            illegal_focused = False
-
-            if enabled:
-                active_pid = get_foreground_pid()
-                active_proc = safe_process_name(active_pid)
-                match_key = self.matcher.match_key(active_proc)
-                illegal_focused = match_key is not None
-
-                if (
-                    self._break_active
-                    and (not self._break_paused)
-                    and illegal_focused
-                    and (now - self._last_break_illegal_reminder_mono) >= 30.0
-                ):
-                    trigger_break_reminder_sound()
-                    self._last_break_illegal_reminder_mono = now
-
-                if illegal_focused and dt > 0 and match_key:
-                    self.store.add_seconds(match_key, dt)
-            else:
-                if self._strict_active and not self._strict_paused:
-                    self.game.add_break(dt, reason="monitor_disabled")
-
-            if self._strict_active and (not self._strict_paused):
-                if enabled:
-                    self.game.update_illegal_switch(illegal_focused)
-                    if illegal_focused:
-                        self.game.add_illegal(dt, active_proc)
-                    else:
-                        self.game.add_study(dt)
-                else:
-                    self.game.update_illegal_switch(False)
-
-            limit_sec = self._read_daily_limit_seconds()
-            reached = False
-            limit_text = "Daily limit: (focus an illegal app to see its counter)"
-
-            if math.isfinite(limit_sec):
-                if illegal_focused and match_key:
-                    used_sec = self.store.get_seconds(match_key)
-                    reached = used_sec >= limit_sec
-                    if reached:
-                        limit_text = f"Daily limit: REACHED ({seconds_to_mmss(used_sec)})"
-                    else:
-                        limit_text = f"Daily limit: {seconds_to_mmss(used_sec)} / {seconds_to_mmss(limit_sec)}"
-            else:
-                limit_text = "Daily limit: disabled/invalid"
-
-            strict_counts_as_active = self._strict_active and (not self._strict_paused)
-            should_punish = enabled and illegal_focused and (strict_counts_as_active or reached)
-
-            if should_punish:
-                try:
-                    self.tone.start()
-                except Exception:
-                    pass
-            else:
-                self.tone.stop()
-
-            if enabled and illegal_focused != prev_illegal_focus:
-                prev_illegal_focus = illegal_focused
-                if illegal_focused:
-                    self.logger.info(f"Illegal focus ENTER app={active_proc}")
-                else:
-                    self.logger.info("Illegal focus EXIT")
-
-            if (now - self._last_ui_update) >= UI_UPDATE_MIN_INTERVAL_SEC:
-                self._last_ui_update = now
-                status_color = "red" if should_punish else "#2ecc71"
-
-                if self._break_active:
-                    status_color = "#3498db"
-
-                self._set_labels(
-                    active_proc=active_proc,
-                    illegal_focused=illegal_focused,
-                    strict_text=strict_text,
-                    limit_text=limit_text,
-                    status_color=status_color,
-                )
-                self._refresh_usage_box()
-                self._refresh_game_ui()
-                self._update_pause_button_text()
-                self._update_stop_button_state()
-
-            if (now - self._last_save_mono) >= SAVE_EVERY_SEC:
-                self._last_save_mono = now
-                self.store.save()
-                self.game.save()
-
-            time.sleep(POLL_INTERVAL_SEC)
-
-        self.tone.stop()
-        self.store.save()
-        self.game.save()
-        self.logger.info("App stopped")
+        self.bridge.post(_do)
 
     def run(self) -> None:
+        self.startup.mark("mainloop")
         self.root.mainloop()
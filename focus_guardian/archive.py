@@ -0,0 +1,218 @@
+import os
+import json
+import lzma
+import zlib
+import time
+import struct
+import logging
+import argparse
+import threading
+import collections
+
+from .utils import ensure_dir
+from .storage import read_state, write_state
+from .config import GAME_FILE, ARCHIVE_DIR, ARCHIVE_AFTER_WEEKS, ARCHIVE_CODEC, ARCHIVE_CACHE_MONTHS
+
+
+# One segment per month, game-YYYY-MM.seg:
+#   magic, u32 header length, header JSON
+#     {"codec": "lzma"|"zlib", "days": {date: [offset, length, points]}}
+#   then the compressed payload: each day's compact JSON, concatenated in
+#   date order. Offsets index the decompressed payload, so reading the header
+#   answers "which days / which had points" without decompressing anything.
+# Segments are written through storage.write_state, so each file is checksummed
+# and replaced atomically; one that fails the check is skipped, not decoded.
+SEGMENT_MAGIC = b"FGARC1\n"
+_U32 = struct.Struct("<I")
+
+_CODECS = {
+    "lzma": (lambda b: lzma.compress(b, preset=6), lzma.decompress),
+    "zlib": (lambda b: zlib.compress(b, 9), zlib.decompress),
+}
+
+
+class GameArchive:
+    # Days leave GameDB's live file once they are older than the cutoff.
+    # Decompressed months are kept in a small LRU.
+    def __init__(self, directory: str, codec: str = ARCHIVE_CODEC, cache_months: int = ARCHIVE_CACHE_MONTHS):
+        if codec not in _CODECS:
+            raise ValueError(f"unknown archive codec: {codec}")
+        self._dir = directory
+        self._codec = codec
+        self._cache_months = max(1, int(cache_months))
+        self._lock = threading.Lock()
+        self._indexes: dict[str, dict] | None = None
+        self._payloads: collections.OrderedDict[str, bytes] = collections.OrderedDict()
+
+    def _path(self, month: str) -> str:
+        return os.path.join(self._dir, f"game-{month}.seg")
+
+    def _read_segment(self, month: str) -> tuple[dict, bytes]:
+        blob = read_state(self._path(month), backups=0)
+        if blob is None or not blob.startswith(SEGMENT_MAGIC):
+            raise ValueError(f"bad game archive segment: {month}")
+        start = len(SEGMENT_MAGIC) + 4
+        (size,) = _U32.unpack(blob[len(SEGMENT_MAGIC):start])
+        return json.loads(blob[start:start + size]), blob[start + size:]
+
+    def _load_indexes(self) -> dict[str, dict]:
+        # Caller holds the lock. Reads whole segments to verify them, but only
+        # keeps the headers; a segment is a few KB compressed.
+        if self._indexes is None:
+            indexes = {}
+            try:
+                names = sorted(os.listdir(self._dir))
+            except FileNotFoundError:
+                names = []
+            for name in names:
+                if not (name.startswith("game-") and name.endswith(".seg")):
+                    continue
+                month = name[5:-4]
+                try:
+                    indexes[month] = self._read_segment(month)[0]
+                except Exception:
+                    continue
+            self._indexes = indexes
+        return self._indexes
+
+    def _payload(self, month: str, cache: bool = True) -> bytes:
+        # Caller holds the lock.
+        data = self._payloads.get(month)
+        if data is not None:
+            self._payloads.move_to_end(month)
+            return data
+        header, packed = self._read_segment(month)
+        data = _CODECS[header["codec"]][1](packed)
+        if cache:
+            self._payloads[month] = data
+            while len(self._payloads) > self._cache_months:
+                self._payloads.popitem(last=False)
+        return data
+
+    def months(self) -> list[str]:
+        with self._lock:
+            return sorted(self._load_indexes())
+
+    def has(self, date: str) -> bool:
+        with self._lock:
+            return date in self._load_indexes().get(date[:7], {}).get("days", {})
+
+    def points_by_date(self) -> dict[str, int]:
+        with self._lock:
+            out = {}
+            for idx in self._load_indexes().values():
+                for date, (_, _, pts) in idx["days"].items():
+                    if pts > 0:
+                        out[date] = pts
+            return out
+
+    def get_day(self, date: str) -> dict | None:
+        month = date[:7]
+        with self._lock:
+            entry = self._load_indexes().get(month, {}).get("days", {}).get(date)
+            if entry is None:
+                return None
+            off, ln, _ = entry
+            return json.loads(self._payload(month)[off:off + ln])
+
+    def iter_month(self, month: str):
+        # For bulk readers (export); bypasses the LRU so it isn't flushed.
+        with self._lock:
+            idx = self._load_indexes().get(month)
+            if idx is None:
+                return
+            data = self._payload(month, cache=False)
+        for date in sorted(idx["days"]):
+            off, ln, _ = idx["days"][date]
+            yield date, json.loads(data[off:off + ln])
+
+    def add_days(self, days: dict[str, dict]) -> None:
+        by_month: dict[str, dict] = {}
+        for date, day in days.items():
+            by_month.setdefault(date[:7], {})[date] = day
+        ensure_dir(self._dir)
+        for month, new in by_month.items():
+            merged = dict(self.iter_month(month))
+            merged.update(new)
+            self._write_segment(month, merged)
+
+    def _write_segment(self, month: str, days: dict[str, dict]) -> None:
+        parts, index, off = [], {}, 0
+        for date in sorted(days):
+            day = days[date]
+            b = json.dumps(day, separators=(",", ":")).encode("utf-8")
+            pts = int((day.get("totals") or {}).get("points", 0))
+            index[date] = [off, len(b), pts]
+            parts.append(b)
+            off += len(b)
+        header = {"codec": self._codec, "days": index}
+        hb = json.dumps(header, separators=(",", ":")).encode("utf-8")
+        blob = SEGMENT_MAGIC + _U32.pack(len(hb)) + hb + _CODECS[self._codec][0](b"".join(parts))
+        write_state(self._path(month), blob, backups=0)
+        with self._lock:
+            self._load_indexes()[month] = header
+            self._payloads.pop(month, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            indexes = self._load_indexes()
+            size = 0
+            for month in indexes:
+                try:
+                    size += os.path.getsize(self._path(month))
+                except OSError:
+                    pass
+            return {
+                "segments": len(indexes),
+                "days": sum(len(i["days"]) for i in indexes.values()),
+                "bytes": size,
+            }
+
+
+def _timed_load(path: str, archive: GameArchive | None, logger: logging.Logger) -> float:
+    from .game_db import GameDB
+
+    t0 = time.perf_counter()
+    db = GameDB(path, logger)
+    if archive is not None:
+        db.set_archive(archive, after_weeks=0)
+    db.load()
+    return (time.perf_counter() - t0) * 1000.0
+
+
+def main(argv: list[str] | None = None) -> None:
+    p = argparse.ArgumentParser(prog="python -m focus_guardian.archive", description="Archive old game history now and report the effect.")
+    p.add_argument("--game-file", default=GAME_FILE)
+    p.add_argument("--archive-dir", default=ARCHIVE_DIR)
+    p.add_argument("--weeks", type=int, default=ARCHIVE_AFTER_WEEKS, help="keep this many weeks live")
+    p.add_argument("--codec", choices=tuple(_CODECS), default=ARCHIVE_CODEC)
+    args = p.parse_args(argv)
+
+    from .game_db import GameDB
+
+    logger = logging.getLogger("FocusGuardian.archive")
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+
+    archive = GameArchive(args.archive_dir, args.codec)
+    archived_before = archive.stats()["days"]
+    before = {
+        "live_bytes": os.path.getsize(args.game_file) if os.path.exists(args.game_file) else 0,
+        "archive_bytes": archive.stats()["bytes"],
+        "load_ms": round(_timed_load(args.game_file, archive, logger), 1),
+    }
+    # Loading with an archive set moves the old days out.
+    db = GameDB(args.game_file, logger)
+    db.set_archive(archive, after_weeks=args.weeks)
+    db.load()
+    moved = archive.stats()["days"] - archived_before
+    after = {
+        "live_bytes": os.path.getsize(args.game_file) if os.path.exists(args.game_file) else 0,
+        "archive_bytes": archive.stats()["bytes"],
+        "load_ms": round(_timed_load(args.game_file, archive, logger), 1),
+    }
+    print(json.dumps({"archived_days": moved, "before": before, "after": after, "archive": archive.stats()}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,11 @@
 import threading
 import math
 import struct
-import winsound
+
+try:
+    import winsound
+except ImportError:  # non-Windows: trace replay and tooling only, nothing is played
+    winsound = None
 
 from .utils import ensure_dir
 from .config import (
@@ -12,65 +16,75 @@ from .config import (
 )
 
 
-def trigger_break_reminder_sound() -> None:
-    def _play():
-        # Gentle double beep to remind of break status
-        notes = [660.0, 550.0]
-        duration_ms = 100
-        duration_sec = duration_ms / 1000.0
-        sample_rate = 44100
-        volume_base = 0.25  # Lower volume for background reminder
+def break_reminder_wav_bytes() -> bytes:
+    # Gentle double beep to remind of break status
+    notes = [660.0, 550.0]
+    duration_ms = 100
+    duration_sec = duration_ms / 1000.0
+    sample_rate = 44100
+    volume_base = 0.25  # Lower volume for background reminder
 
-        all_frames = bytearray()
+    all_frames = bytearray()
 
-        for freq in notes:
-            n_samples = int(sample_rate * duration_sec)
-            max_amp = int(32767 * volume_base)
+    for freq in notes:
+        n_samples = int(sample_rate * duration_sec)
+        max_amp = int(32767 * volume_base)
 
-            for i in range(n_samples):
-                t = i / sample_rate
-                envelope = 1.0
-                sample_val = int(max_amp * envelope * math.sin(2.0 * math.pi * freq * t))
-                all_frames += struct.pack("<h", sample_val)
+        for i in range(n_samples):
+            t = i / sample_rate
+            envelope = 1.0
+            sample_val = int(max_amp * envelope * math.sin(2.0 * math.pi * freq * t))
+            all_frames += struct.pack("<h", sample_val)
 
-            # Short silence between beeps
-            silence = int(sample_rate * 0.1)
-            all_frames += b'\x00\x00' * silence
+        # Short silence between beeps
+        silence = int(sample_rate * 0.1)
+        all_frames += b'\x00\x00' * silence
 
-        wav_data = _wrap_wav_header(all_frames, sample_rate)
-        winsound.PlaySound(wav_data, winsound.SND_MEMORY)
+    return _wrap_wav_header(all_frames, sample_rate)
 
-    threading.Thread(target=_play, daemon=True).start()
-def trigger_work_start_sound() -> None:
-    def _play():
-        # Distinct "Back to Work" pattern: Low(440), Low(440), High(880)
-        notes = [440.0, 440.0, 880.0]
-        duration_ms = 120
-        duration_sec = duration_ms / 1000.0
-        sample_rate = 44100
-        volume_base = 0.5
 
-        all_frames = bytearray()
+def work_start_wav_bytes() -> bytes:
+    # Distinct "Back to Work" pattern: Low(440), Low(440), High(880)
+    notes = [440.0, 440.0, 880.0]
+    duration_ms = 120
+    duration_sec = duration_ms / 1000.0
+    sample_rate = 44100
+    volume_base = 0.5
+
+    all_frames = bytearray()
+
+    for freq in notes:
+        n_samples = int(sample_rate * duration_sec)
+        max_amp = int(32767 * volume_base)
 
-        for freq in notes:
-            n_samples = int(sample_rate * duration_sec)
-            max_amp = int(32767 * volume_base)
+        # Add a tiny silence between notes for distinct beeps
+        for i in range(n_samples):
+            t = i / sample_rate
+            envelope = 1.0  # Constant volume for beeps
+            sample_val = int(max_amp * envelope * math.sin(2.0 * math.pi * freq * t))
+            all_frames += struct.pack("<h", sample_val)
 
-            # Add a tiny silence between notes for distinct beeps
-            for i in range(n_samples):
-                t = i / sample_rate
-                envelope = 1.0  # Constant volume for beeps
-                sample_val = int(max_amp * envelope * math.sin(2.0 * math.pi * freq * t))
-                all_frames += struct.pack("<h", sample_val)
+        # 50ms silence
+        silence_samples = int(sample_rate * 0.05)
+        all_frames += b'\x00\x00' * silence_samples
 
-            # 50ms silence
-            silence_samples = int(sample_rate * 0.05)
-            all_frames += b'\x00\x00' * silence_samples
+    return _wrap_wav_header(all_frames, sample_rate)
 
-        wav_data = _wrap_wav_header(all_frames, sample_rate)
-        winsound.PlaySound(wav_data, winsound.SND_MEMORY)
+
+def trigger_break_reminder_sound() -> None:
+    def _play():
+        winsound.PlaySound(break_reminder_wav_bytes(), winsound.SND_MEMORY)
 
     threading.Thread(target=_play, daemon=True).start()
+
+
+def trigger_work_start_sound() -> None:
+    def _play():
+        winsound.PlaySound(work_start_wav_bytes(), winsound.SND_MEMORY)
+
+    threading.Thread(target=_play, daemon=True).start()
+
+
 def _wrap_wav_header(pcm_data: bytes, sample_rate: int) -> bytes:
     data_size = len(pcm_data)
     riff_size = 36 + data_size
@@ -129,11 +143,16 @@ class LoopingTone:
         self._path = wav_path
         self._lock = threading.Lock()
         self._playing = False
+        self._file_ready = False
 
     def start(self) -> None:
         with self._lock:
             if self._playing:
                 return
+            # Written on first use rather than at startup.
+            if not self._file_ready:
+                ensure_tone_file(self._path)
+                self._file_ready = True
             winsound.PlaySound(
                 self._path,
                 winsound.SND_FILENAME | winsound.SND_ASYNC | winsound.SND_LOOP,
@@ -148,30 +167,47 @@ class LoopingTone:
             self._playing = False
 
 
-def trigger_timer_end_sound() -> None:
-    def _play_chime():
-        notes = [523.25, 659.25, 784.00, 1046.50]
-        duration_ms = 180
-        duration_sec = duration_ms / 1000.0
-        sample_rate = 44100
-        volume_base = 0.5
+def timer_end_wav_bytes() -> bytes:
+    notes = [523.25, 659.25, 784.00, 1046.50]
+    duration_ms = 180
+    duration_sec = duration_ms / 1000.0
+    sample_rate = 44100
+    volume_base = 0.5
+
+    all_frames = bytearray()
 
-        all_frames = bytearray()
+    for freq in notes:
+        n_samples = int(sample_rate * duration_sec)
+        frames = bytearray()
+        max_amp = int(32767 * volume_base)
 
-        for freq in notes:
-            n_samples = int(sample_rate * duration_sec)
-            frames = bytearray()
-            max_amp = int(32767 * volume_base)
+        for i in range(n_samples):
+            t = i / sample_rate
+            envelope = 1.0 - (i / n_samples)
+            sample_val = int(max_amp * envelope * math.sin(2.0 * math.pi * freq * t))
+            frames += struct.pack("<h", sample_val)
 
-            for i in range(n_samples):
-                t = i / sample_rate
-                envelope = 1.0 - (i / n_samples)
-                sample_val = int(max_amp * envelope * math.sin(2.0 * math.pi * freq * t))
-                frames += struct.pack("<h", sample_val)
+        all_frames += frames
 
-            all_frames += frames
+    return _wrap_wav_header(all_frames, sample_rate)
 
-        wav_data = _wrap_wav_header(all_frames, sample_rate)
-        winsound.PlaySound(wav_data, winsound.SND_MEMORY)
+
+def trigger_timer_end_sound() -> None:
+    def _play_chime():
+        winsound.PlaySound(timer_end_wav_bytes(), winsound.SND_MEMORY)
 
     threading.Thread(target=_play_chime, daemon=True).start()
+
+
+CHIME_WAVS = {
+    "timer_end": timer_end_wav_bytes,
+    "work_start": work_start_wav_bytes,
+    "break_reminder": break_reminder_wav_bytes,
+}
+
+
+def play_chime_blocking(name: str) -> None:
+    # Synthesizes and plays on the calling thread; returns when playback ends.
+    data = CHIME_WAVS[name]()
+    if winsound is not None:
+        winsound.PlaySound(data, winsound.SND_MEMORY)
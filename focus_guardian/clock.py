@@ -0,0 +1,80 @@
+import time
+import datetime
+
+from .config import SUSPEND_GAP_SEC, SUSPEND_CAP_SEC, SUSPEND_POLICY
+
+
+class GapDetector:
+    # Windows' monotonic clock keeps running through sleep, so resume shows up
+    # as one huge dt. Linux CLOCK_MONOTONIC stops during suspend instead; that
+    # case is only visible as wall time running ahead of monotonic time.
+    def __init__(
+        self,
+        threshold_sec: float = SUSPEND_GAP_SEC,
+        cap_sec: float = SUSPEND_CAP_SEC,
+        policy: str = SUSPEND_POLICY,
+        wall_clock=time.time,
+    ):
+        self.threshold_sec = float(threshold_sec)
+        self.cap_sec = float(cap_sec)
+        self.policy = policy
+        self._wall_clock = wall_clock
+        self._last_wall = None
+
+    def check(self, dt: float) -> tuple[float, float, float]:
+        # Returns (credited_dt, uncredited_sec, hidden_sec).
+        wall = self._wall_clock()
+        wall_dt = dt if self._last_wall is None else wall - self._last_wall
+        self._last_wall = wall
+
+        hidden = 0.0
+        if wall_dt - dt > self.threshold_sec:
+            hidden = wall_dt - dt
+
+        if dt <= self.threshold_sec:
+            return dt, 0.0, hidden
+
+        credited = min(dt, self.cap_sec)
+        return credited, dt - credited, hidden
+
+
+class DayClock:
+    # Keeps the local date plus the monotonic deadline at which it can next
+    # change, so the per-tick check is one float comparison. The deadline is
+    # never more than RECHECK_SEC away, which also picks up timezone changes
+    # and wall-clock jumps; local midnight comes from mktime, so DST days
+    # that are 23 or 25 hours long are handled.
+    RECHECK_SEC = 3600.0
+
+    def __init__(self, wall_clock=time.time, monotonic=time.monotonic):
+        self._wall_clock = wall_clock
+        self._subscribers = []
+        self.today: str = ""
+        self._deadline = 0.0
+        self._refresh(monotonic())
+
+    def subscribe(self, callback) -> None:
+        self._subscribers.append(callback)
+        callback(self.today)
+
+    def check(self, now_mono: float) -> bool:
+        if now_mono < self._deadline:
+            return False
+        return self._refresh(now_mono)
+
+    def _refresh(self, now_mono: float) -> bool:
+        wall = self._wall_clock()
+        local_date = datetime.datetime.fromtimestamp(wall).date()
+        nxt = local_date + datetime.timedelta(days=1)
+        midnight = time.mktime((nxt.year, nxt.month, nxt.day, 0, 0, 0, 0, 0, -1))
+        self._deadline = now_mono + min(max(0.0, midnight - wall), self.RECHECK_SEC)
+
+        today = str(local_date)
+        if today == self.today:
+            return False
+        first = not self.today
+        self.today = today
+        if not first:
+            for cb in self._subscribers:
+                cb(today)
+        return True
@@ -5,9 +5,16 @@ APPDATA_DIR = os.path.join(os.getenv("APPDATA") or os.path.expanduser("~"), "Foc
 
 DATA_FILE = os.path.join(APPDATA_DIR, "usage.json")
 GAME_FILE = os.path.join(APPDATA_DIR, "game_db.json")
+RULES_FILE = os.path.join(APPDATA_DIR, "rules.json")
 
 LOG_DIR = os.path.join(APPDATA_DIR, "logs")
 LOG_FILE = os.path.join(LOG_DIR, "focus_guardian.log")
+LOG_FORMAT = "text"  # or "jsonl"
+LOG_QUEUE_SIZE = 1000
+LOG_FLAP_WINDOW_SEC = 60.0
+LOG_FLAP_MAX_EVENTS = 10
+# Per-start timing (imports, first tick, first paint), one JSON line per run
+STARTUP_REPORT_FILE = os.path.join(LOG_DIR, "startup.jsonl")
 
 TONE_FILE = os.path.join(APPDATA_DIR, "tone.wav")
 
@@ -15,6 +22,18 @@ POLL_INTERVAL_SEC = 0.20
 UI_UPDATE_MIN_INTERVAL_SEC = 0.35
 SAVE_EVERY_SEC = 10.0
 
+# A tick gap above SUSPEND_GAP_SEC is treated as sleep/hibernate: only
+# SUSPEND_CAP_SEC is credited to the foreground app. With policy "break" the
+# rest is booked as break time of an active strict session; "drop" discards it.
+SUSPEND_GAP_SEC = 5.0
+SUSPEND_CAP_SEC = POLL_INTERVAL_SEC
+SUSPEND_POLICY = "break"
+
+# No keyboard/mouse input for this long stops usage/game accounting and
+# slows the monitor down until input resumes (0 disables idle detection).
+IDLE_THRESHOLD_SEC = 300.0
+IDLE_POLL_INTERVAL_SEC = 2.0
+
 TONE_FREQ_HZ = 2500
 TONE_WAV_DURATION_SEC = 0.12
 TONE_VOLUME = 0.35
@@ -22,6 +41,15 @@ SAMPLE_RATE = 44100
 
 STRICT_MAX_PAUSES = 2
 
+# Initial settings, applied to the engine before the window exists
+DEFAULT_TARGETS_TEXT = "chrome.exe, discord.exe"
+DEFAULT_DAILY_LIMIT_MIN = 60
+DEFAULT_STRICT_MIN = 30
+DEFAULT_BREAK_MIN = 5
+
+# Tray icon: remaining-time ring resolution (frames are pre-rendered per step)
+TRAY_RING_STEPS = 32
+
 # Game scoring
 POINTS_PER_STUDY_MIN = 10
 PENALTY_PER_ILLEGAL_10SEC = 5
@@ -33,3 +61,71 @@ LOW_BREAKS_SEC = 120
 
 XP_PER_POINT = 1
 LEVEL_XP_UNIT = 500
+
+# Charge helper/child processes to their nearest matching ancestor
+PROCESS_TREE_ATTRIBUTION = False
+PROCESS_TREE_REFRESH_SEC = 30.0
+
+# Window-title rules ("title:..." patterns). Titles are cached per window
+# and re-read on name-change events; this is the polling fallback.
+TITLE_REFRESH_SEC = 1.0
+
+# Low-frequency sweep over all processes for unfocused targets (0 disables)
+BACKGROUND_SWEEP_SEC = 0.0
+BACKGROUND_SWEEP_MAX_DUTY = 0.01
+BACKGROUND_COUNTS_AS_USAGE = False
+
+# Headless daemon
+HEADLESS_CONFIG_FILE = os.path.join(APPDATA_DIR, "headless.json")
+
+# How long quitting waits for the monitor to save and stop
+QUIT_JOIN_SEC = 5.0
+
+# asyncio runtime in place of the monitor/sweep/IPC threads (thread-mode GUI and headless)
+ASYNC_RUNTIME = False
+ASYNC_IO_WORKERS = 4
+ASYNC_CHIME_QUEUE = 4
+
+# IPC "export" writes only under this directory (the CLI writes anywhere)
+EXPORT_DIR = os.path.join(APPDATA_DIR, "exports")
+
+# Game days older than this move to compressed per-month segments (0 disables)
+ARCHIVE_DIR = os.path.join(APPDATA_DIR, "archive")
+ARCHIVE_AFTER_WEEKS = 8
+ARCHIVE_CODEC = "lzma"  # or "zlib"
+ARCHIVE_CACHE_MONTHS = 3
+
+# State files: rotated backups kept next to each file, and how often the
+# background thread fsyncs the newest one. Only fsynced files are rotated, so
+# backups are always durable and a crash can only tear the newest file. Saves
+# between flushes replace the newest file in place, so generations are about
+# max(SAVE_EVERY_SEC, STATE_FSYNC_EVERY_SEC) apart.
+STATE_BACKUPS = 5
+STATE_FSYNC_EVERY_SEC = 30.0
+
+# Cross-device sync: per-device journals in a shared folder ("" disables it)
+SYNC_DIR = ""
+SYNC_DEVICE_FILE = os.path.join(APPDATA_DIR, "device_id")
+
+# Local control API (0 disables it)
+IPC_HOST = "127.0.0.1"
+IPC_PORT = 0
+
+# Monitor loop instrumentation (stats via IPC "metrics"; dump is .json or Prometheus text)
+METRICS_ENABLED = False
+METRICS_FILE = ""
+
+# On-demand sampling profiler (output rotated in LOG_DIR)
+PROFILE_DURATION_SEC = 30.0
+PROFILE_INTERVAL_SEC = 0.005
+PROFILE_KEEP = 3
+
+# Run enforcement in a child process (GUI reads a shared-memory status ring);
+# the child logs to its own file since rotation can't be shared across processes.
+MONITOR_PROCESS = False
+MONITOR_LOG_FILE = os.path.join(LOG_DIR, "monitor.log")
+STATUS_RING_SLOTS = 8
+STATUS_DETAIL_BYTES = 256 * 1024
+
+# Focus trace recording, replayed with `python -m focus_guardian.trace FILE` ("" disables)
+TRACE_FILE = ""
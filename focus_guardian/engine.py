@@ -0,0 +1,768 @@
+import threading
+import time
+import collections
+from time import perf_counter_ns
+import logging
+
+from .config import (
+    POLL_INTERVAL_SEC,
+    UI_UPDATE_MIN_INTERVAL_SEC,
+    SAVE_EVERY_SEC,
+    STRICT_MAX_PAUSES,
+    METRICS_ENABLED,
+    METRICS_FILE,
+    RULES_FILE,
+    IDLE_THRESHOLD_SEC,
+    IDLE_POLL_INTERVAL_SEC,
+    PROCESS_TREE_ATTRIBUTION,
+    PROCESS_TREE_REFRESH_SEC,
+    BACKGROUND_SWEEP_SEC,
+    TITLE_REFRESH_SEC,
+)
+from .utils import seconds_to_mmss, sec_to_ns, ns_to_sec, NS_PER_SEC
+from .audio import (
+    trigger_timer_end_sound,
+    trigger_work_start_sound,
+    trigger_break_reminder_sound,
+)
+from .usage_store import UsageStore
+from .game_db import GameDB
+from .storage import flush_pending
+from .process_monitor import (
+    get_foreground_window,
+    safe_process_name,
+    TargetMatcher,
+    ProcessTree,
+    WindowTitleCache,
+)
+from .ipc import StatusHub
+from .metrics import LoopMetrics
+from .logging_setup import TransitionLogLimiter
+from .clock import GapDetector, DayClock
+from .idle import IdleSource, default_idle_source
+from .rules import RuleTable, describe_allowance
+from .schedule import Schedule
+from .sweep import BackgroundSweep
+
+
+CHIMES = {
+    "timer_end": trigger_timer_end_sound,
+    "work_start": trigger_work_start_sound,
+    "break_reminder": trigger_break_reminder_sound,
+}
+
+
+def play_chime(name: str) -> None:
+    CHIMES[name]()
+
+
+class NullUI:
+    # Front ends (Tk window, headless daemon) implement the same two hooks.
+    def on_status(self, status: dict) -> None:
+        pass
+
+    def on_timer_changed(self) -> None:
+        pass
+
+
+def parse_limit_minutes(text: str | None) -> float:
+    try:
+        mins = float((text or "").strip())
+        if mins <= 0:
+            return float("inf")
+        return mins * 60.0
+    except Exception:
+        return float("inf")
+
+
+class FocusEngine:
+    def __init__(
+        self,
+        store: UsageStore,
+        game: GameDB,
+        matcher: TargetMatcher,
+        tone,
+        logger: logging.Logger,
+        ui=None,
+        gap_detector: GapDetector | None = None,
+        wall_clock=time.time,
+        idle_source: IdleSource | None = None,
+        day_clock: DayClock | None = None,
+        monotonic_ns=time.monotonic_ns,
+    ):
+        self.store = store
+        self.game = game
+        self.matcher = matcher
+        self.tone = tone
+        self.logger = logger
+        self._ui = ui or NullUI()
+        # Sample sources and sound sink; the trace replayer swaps these out.
+        self.foreground = get_foreground_window
+        self.process_name = safe_process_name
+        self.chime = play_chime
+        self.recorder = None
+        # Off when a runtime schedules saves itself (see runtime.AsyncRuntime).
+        self.autosave = True
+        # Cross-device journal (sync.SyncJournal), synced after every save.
+        self.sync = None
+        self.hub = StatusHub()
+        # None keeps the tick path free of timing calls.
+        self.metrics = LoopMetrics() if METRICS_ENABLED else None
+        self.metrics_file = METRICS_FILE
+        # Autosave, the runtime's save task, IPC export and shutdown all save
+        # through save(); this keeps them (and the journal sync) one at a time.
+        self._save_lock = threading.Lock()
+        # What IPC "reload_rules" reads; headless may point it elsewhere.
+        self.rules_file = RULES_FILE
+
+        self._stop_event = threading.Event()
+        self._wake = threading.Event()
+        self._commands: collections.deque = collections.deque()
+        self._enabled = True
+
+        self._strict_active = False
+        self._strict_paused = False
+        self._strict_remaining_sec = 0.0
+        self._strict_end_mono = 0.0
+        self._strict_pause_count = 0
+        self._break_active = False
+        self._break_paused = False
+        self._break_remaining_sec = 0.0
+        self._break_end_mono = 0.0
+        self._last_break_reminder_mono = 0.0
+        self._last_break_illegal_reminder_mono = 0.0
+        self._last_pause_reminder_mono = 0.0
+        self._pomodoro_loop = False
+        self._planned_focus_sec = 0.0
+        self._planned_break_sec = 0.0
+
+        self._targets_text = ""
+        self._applied_targets_text = None
+        self._limit_sec = float("inf")
+        self.rules = RuleTable(matcher, logger)
+        # RuleTable and ProcessTree aren't thread-safe; the background sweep
+        # and the store's group resolver use them off the monitor thread.
+        # Never take the store's lock while holding this one.
+        self.rules_lock = threading.Lock()
+        self._rules_cfg: dict = {}
+        self._rules_dirty = True
+        self.schedule = Schedule(logger)
+        self.tree = ProcessTree(PROCESS_TREE_REFRESH_SEC) if PROCESS_TREE_ATTRIBUTION else None
+        self.titles = WindowTitleCache(fallback_refresh_sec=TITLE_REFRESH_SEC)
+        self._title_hook_tried = False
+        self.sweep = None
+        if BACKGROUND_SWEEP_SEC > 0:
+            self.sweep = BackgroundSweep(self, logger)
+        self.focused_key = None
+        self._wall_clock = wall_clock
+        self._monotonic_ns = monotonic_ns
+        self._schedule_deadline = float("inf")
+
+        self._last_tick_ns = None
+        self._last_ui_update = 0.0
+        self._last_save_mono = 0.0
+        self._prev_illegal_focus = False
+        self._focus_log = TransitionLogLimiter(logger)
+        self._gap = gap_detector or GapDetector(wall_clock=wall_clock)
+        self.day_clock = day_clock or DayClock(wall_clock=wall_clock)
+        self.day_clock.subscribe(store.on_new_day)
+        self.day_clock.subscribe(game.on_new_day)
+        self._idle_source = idle_source or default_idle_source()
+        self._user_idle = False
+        self._idle_sec = None
+        self._poll_interval = POLL_INTERVAL_SEC
+
+    # Settings
+    def set_targets_text(self, text: str) -> None:
+        self._targets_text = text or ""
+
+    def set_daily_limit_text(self, text: str) -> None:
+        limit_sec = parse_limit_minutes(text)
+        if limit_sec != self._limit_sec:
+            self._limit_sec = limit_sec
+            self._rules_dirty = True
+
+    def set_rules(self, rules: dict) -> None:
+        self._rules_cfg = rules if isinstance(rules, dict) else {}
+        self._rules_dirty = True
+
+    def set_recorder(self, recorder) -> None:
+        # Call before run(). Config is re-emitted on the next tick so the
+        # trace is self-contained.
+        self.recorder = recorder
+        if recorder is not None:
+            recorder.header(self._wall_clock(), self._monotonic_ns(), self._enabled)
+            self._applied_targets_text = None
+            self._rules_dirty = True
+
+    def enable_metrics(self, path: str | None = None) -> LoopMetrics:
+        if self.metrics is None:
+            self.metrics = LoopMetrics()
+        if path:
+            self.metrics_file = path
+        return self.metrics
+
+    def is_enabled(self) -> bool:
+        return self._enabled
+
+    def is_user_idle(self) -> bool:
+        return self._user_idle
+
+    # Commands from the UI / IPC threads are queued and applied by the
+    # monitor thread at the start of the next tick; deque append/popleft
+    # are atomic, so neither side takes a lock.
+    def _post(self, fn, *args) -> None:
+        self._post_at(fn, self._monotonic_ns() / NS_PER_SEC, args)
+
+    def _post_at(self, fn, posted_at: float, args: tuple) -> None:
+        self._commands.append((fn, posted_at, args))
+        self._wake.set()
+
+    def _drain_commands(self) -> None:
+        cmds = self._commands
+        rec = self.recorder
+        while cmds:
+            fn, posted_at, args = cmds.popleft()
+            if rec is not None:
+                rec.command(posted_at, fn.__name__, args)
+            try:
+                fn(posted_at, *args)
+            except Exception:
+                self.logger.exception("Engine command failed")
+
+    def set_enabled(self, enabled: bool) -> None:
+        self._post(self._apply_set_enabled, bool(enabled))
+
+    def start_strict_timer(self, mins: float, break_mins: float, pomodoro: bool) -> bool:
+        if mins <= 0:
+            return False
+        self._post(self._apply_start, float(mins), float(break_mins), bool(pomodoro))
+        return True
+
+    def stop_strict_timer(self) -> None:
+        self._post(self._apply_stop)
+
+    def toggle_pause_strict_timer(self) -> None:
+        self._post(self._apply_toggle_pause)
+
+    def timer_state(self) -> dict:
+        return {
+            "strict_active": self._strict_active,
+            "strict_paused": self._strict_paused,
+            "strict_remaining_sec": self._strict_remaining_sec,
+            "strict_planned_sec": self._planned_focus_sec,
+            "strict_pause_count": self._strict_pause_count,
+            "strict_max_pauses": STRICT_MAX_PAUSES,
+            "break_active": self._break_active,
+            "break_paused": self._break_paused,
+            "break_remaining_sec": self._break_remaining_sec,
+            "break_planned_sec": self._planned_break_sec,
+            "pomodoro": self._pomodoro_loop,
+        }
+
+    # Command handlers (monitor thread only)
+    def _apply_set_enabled(self, now: float, enabled: bool) -> None:
+        self._enabled = enabled
+        self.logger.info(f"Monitoring toggled enabled={enabled}")
+        if not enabled:
+            self.tone.stop()
+
+    def _apply_start(self, now: float, mins: float, break_mins: float, pomodoro: bool) -> None:
+        total_sec = mins * 60.0
+
+        self._planned_focus_sec = total_sec
+        self._planned_break_sec = max(0.0, break_mins) * 60.0
+        self._pomodoro_loop = pomodoro
+        self._break_active = False
+        self._break_paused = False
+        self._break_remaining_sec = 0.0
+        self._last_break_reminder_mono = 0.0
+        self._last_break_illegal_reminder_mono = 0.0
+        self._last_pause_reminder_mono = 0.0
+
+        self._strict_active = True
+        self._strict_paused = False
+        self._strict_remaining_sec = total_sec
+        self._strict_end_mono = now + total_sec
+        self._strict_pause_count = 0
+
+        self.game.start_session(total_sec)
+        if not self._enabled:
+            self._apply_set_enabled(now, True)
+
+        self.logger.info(f"Strict timer started mins={mins}")
+        self._ui.on_timer_changed()
+
+    def _apply_stop(self, now: float) -> None:
+        if not self._strict_active and not self._break_active:
+            return
+
+        self._strict_active = False
+        self._strict_paused = False
+        self._strict_remaining_sec = 0.0
+        self._strict_pause_count = 0
+        self._break_active = False
+        self._break_paused = False
+        self._break_remaining_sec = 0.0
+        self._last_break_reminder_mono = 0.0
+        self._last_break_illegal_reminder_mono = 0.0
+        self._last_pause_reminder_mono = 0.0
+
+        self.tone.stop()
+
+        if self.game.is_session_active():
+            self.game.end_session("stopped")
+
+        self.logger.info("Strict/break session stopped")
+        self._ui.on_timer_changed()
+
+    def _apply_toggle_pause(self, now: float) -> None:
+        if self._break_active:
+            if self._break_paused:
+                self._break_paused = False
+                self._break_end_mono = now + self._break_remaining_sec
+                self._last_break_reminder_mono = now
+                self.logger.info("Break resumed")
+            else:
+                self._break_paused = True
+                self._break_remaining_sec = max(0.0, self._break_end_mono - now)
+                self._last_break_reminder_mono = now
+                self.logger.info("Break paused")
+            self._ui.on_timer_changed()
+            return
+
+        if not self._strict_active:
+            return
+
+        if self._strict_paused:
+            self._strict_paused = False
+            self._strict_end_mono = now + max(0.0, self._strict_remaining_sec)
+            self.logger.info("Strict resumed")
+            self._ui.on_timer_changed()
+            return
+
+        if self._strict_pause_count >= STRICT_MAX_PAUSES:
+            self._ui.on_timer_changed()
+            return
+
+        self._strict_remaining_sec = max(0.0, self._strict_end_mono - now)
+        self._strict_paused = True
+        self._strict_pause_count += 1
+        self._last_pause_reminder_mono = now
+
+        self.game.note_pause_used()
+        self.logger.info(f"Strict paused pause_count={self._strict_pause_count}")
+        self._ui.on_timer_changed()
+
+    # Lifecycle
+    def stop(self) -> None:
+        self._stop_event.set()
+        self._wake.set()
+
+    def is_stopped(self) -> bool:
+        return self._stop_event.is_set()
+
+    def poll_interval(self) -> float:
+        return self._poll_interval
+
+    def save(self) -> None:
+        with self._save_lock:
+            m = self.metrics
+            if m is not None:
+                t0 = perf_counter_ns()
+            self.store.save()
+            self.game.save()
+            if m is not None:
+                m.observe("save", perf_counter_ns() - t0)
+                if self.metrics_file:
+                    m.dump(self.metrics_file)
+            self._sync()
+
+    def _sync(self) -> None:
+        if self.sync is None:
+            return
+        try:
+            self.sync.sync()
+        except Exception:
+            self.logger.exception("Sync failed")
+
+    def quit(self) -> None:
+        # Any thread. Session state belongs to the monitor thread, which
+        # ends the session and saves in shutdown() on its way out of run().
+        self.stop()
+
+    def shutdown(self) -> None:
+        # Monitor thread only, once ticks have stopped (run() calls it; the
+        # async runtime calls it on its monitor worker).
+        self._drain_commands()
+        self.tone.stop()
+        # End the session first so the save below records it.
+        if self._strict_active and self.game.is_session_active():
+            self.game.end_session("quit")
+        self.save()
+        if self.recorder is not None:
+            self.recorder.close()
+        flush_pending()
+        self.logger.info("App stopped")
+
+    def run(self) -> None:
+        self._last_tick_ns = self._monotonic_ns()
+        self._last_save_mono = ns_to_sec(self._last_tick_ns)
+
+        if self.sweep is not None:
+            self.sweep.start(self._stop_event)
+
+        while not self._stop_event.is_set():
+            try:
+                self.tick()
+            except Exception:
+                # Keep enforcing; the next tick starts from fresh state.
+                self.logger.exception("Tick failed")
+            m = self.metrics
+            interval = self._poll_interval
+            if m is None:
+                self._wake.wait(interval)
+                self._wake.clear()
+            else:
+                t0 = perf_counter_ns()
+                woken = self._wake.wait(interval)
+                self._wake.clear()
+                if not woken:
+                    m.observe("jitter", abs(perf_counter_ns() - t0 - int(interval * 1e9)))
+
+        self.shutdown()
+
+    # Monitor tick
+    def _advance_timers(self, now: float, dt_ns: int) -> float:
+        strict_remaining = 0.0
+
+        if self._strict_active:
+            # === FOCUS SESSION ===
+            if self._strict_paused:
+                strict_remaining = max(0.0, self._strict_remaining_sec)
+                self.game.add_break_ns(dt_ns, reason="paused")
+                if (now - self._last_pause_reminder_mono) >= 60.0:
+                    self.chime("break_reminder")
+                    self._last_pause_reminder_mono = now
+            else:
+                strict_remaining = self._strict_end_mono - now
+                if strict_remaining <= 0:
+                    # Focus Finished
+                    self._strict_active = False
+                    self._strict_paused = False
+                    strict_remaining = 0.0
+                    self._strict_pause_count = 0
+
+                    self.chime("timer_end")
+                    if self.game.is_session_active():
+                        self.game.end_session("completed")
+
+                    if self._pomodoro_loop:
+                        # Start Break
+                        self._break_active = True
+                        self._break_paused = False
+                        self._break_end_mono = now + self._planned_break_sec
+                        self._break_remaining_sec = self._planned_break_sec
+                        self._last_break_reminder_mono = now
+                        self._last_break_illegal_reminder_mono = now
+                        self._last_pause_reminder_mono = 0.0
+                        self.logger.info("Pomodoro: Focus done, starting break")
+                    else:
+                        self._strict_remaining_sec = 0.0
+                    self._ui.on_timer_changed()
+                else:
+                    self._strict_remaining_sec = max(0.0, strict_remaining)
+
+        elif self._break_active:
+            # === BREAK SESSION ===
+            if self._break_paused:
+                # Do not countdown, use stored remaining time
+                if (now - self._last_break_reminder_mono) >= 60.0:
+                    self.chime("break_reminder")
+                    self._last_break_reminder_mono = now
+            else:
+                break_remaining = self._break_end_mono - now
+                self._break_remaining_sec = max(0.0, break_remaining)
+
+                if break_remaining <= 0:
+                    # Break Finished -> Restart Focus
+                    self.chime("work_start")
+                    self._break_active = False
+                    self._break_paused = False
+                    self._last_break_illegal_reminder_mono = 0.0
+
+                    self._strict_active = True
+                    self._strict_paused = False
+                    self._strict_remaining_sec = self._planned_focus_sec
+                    self._strict_end_mono = now + self._planned_focus_sec
+                    self._strict_pause_count = 0
+
+                    self.game.start_session(self._planned_focus_sec)
+                    self.logger.info("Pomodoro: Break done, restarting focus")
+                    self._ui.on_timer_changed()
+
+        return strict_remaining
+
+    def _on_gap(self, uncredited: float, hidden: float) -> None:
+        self.logger.info(
+            f"Suspend detected uncredited={uncredited:.1f}s hidden={hidden:.1f}s policy={self._gap.policy}"
+        )
+        if (
+            uncredited > 0
+            and self._gap.policy == "break"
+            and self._strict_active
+            and not self._strict_paused
+        ):
+            self.game.add_break(uncredited, reason="suspend")
+
+    def _update_idle(self) -> bool:
+        if IDLE_THRESHOLD_SEC <= 0:
+            return False
+        idle_sec = self._idle_source.idle_seconds()
+        self._idle_sec = idle_sec
+        idle = idle_sec is not None and idle_sec >= IDLE_THRESHOLD_SEC
+        if idle != self._user_idle:
+            self._user_idle = idle
+            self._poll_interval = IDLE_POLL_INTERVAL_SEC if idle else POLL_INTERVAL_SEC
+            if idle:
+                self.logger.info(f"User idle for {idle_sec:.0f}s, accounting paused")
+            else:
+                self.logger.info("User input resumed")
+        return idle
+
+    def _group_of(self, key: str) -> str | None:
+        with self.rules_lock:
+            return self.rules.group_of(key)
+
+    def _attribute(self, pid: int):
+        hit = self.tree.attribute(pid, self.rules.decide)
+        return hit[1] if hit is not None else None
+
+    def _refresh_schedule(self, now: float) -> None:
+        wall = self._wall_clock()
+        next_edge = self.schedule.evaluate(wall)
+        # Capped like DayClock so wall-clock jumps are noticed within the hour.
+        self._schedule_deadline = now + min(max(1.0, next_edge - wall), DayClock.RECHECK_SEC)
+        if not self.schedule.is_empty():
+            self.logger.info(f"Schedule active={self.schedule.active_names()}")
+
+    def _strict_text(self, strict_remaining: float) -> str:
+        if self._break_active:
+            if self._break_paused:
+                return f"Pomodoro Break: PAUSED ({seconds_to_mmss(self._break_remaining_sec)} left)"
+            return f"Pomodoro Break: {seconds_to_mmss(max(0.0, self._break_remaining_sec))} left"
+        if not self._strict_active:
+            return "Strict timer: inactive"
+        if self._strict_paused:
+            return f"Strict timer: paused ({seconds_to_mmss(strict_remaining)} left)"
+        return f"Strict timer: active ({seconds_to_mmss(strict_remaining)} left)"
+
+    def tick(self, now: float | None = None) -> dict:
+        m = self.metrics
+        if m is not None:
+            t_tick = perf_counter_ns()
+        # Durations are integer nanoseconds end to end; `now` stays a float
+        # because timer deadlines are compared against it.
+        if now is None:
+            now_ns = self._monotonic_ns()
+            now = now_ns / NS_PER_SEC
+        else:
+            now_ns = sec_to_ns(now)
+        if self._last_tick_ns is None:
+            self._last_tick_ns = now_ns
+            self._last_save_mono = now
+        raw_dt_ns = dt_ns = now_ns - self._last_tick_ns
+        self._last_tick_ns = now_ns
+
+        dt, uncredited, hidden = self._gap.check(ns_to_sec(dt_ns))
+        if uncredited > 0 or hidden > 0:
+            dt_ns = sec_to_ns(dt)
+            self._on_gap(uncredited, hidden)
+
+        if self._commands:
+            self._drain_commands()
+
+        if self.day_clock.check(now):
+            self.logger.info(f"Day rollover to {self.day_clock.today}")
+
+        targets_text = self._targets_text
+        if targets_text != self._applied_targets_text:
+            self._applied_targets_text = targets_text
+            with self.rules_lock:
+                self.rules.set_targets_text(targets_text)
+            if self.recorder is not None:
+                self.recorder.config("targets", targets_text)
+            self.logger.info(f"Targets updated: {targets_text}")
+        if self._rules_dirty:
+            self._rules_dirty = False
+            if self.recorder is not None:
+                self.recorder.config("rules", [self._rules_cfg, self._limit_sec])
+            try:
+                with self.rules_lock:
+                    self.rules.compile(self._rules_cfg, self._limit_sec)
+                    if self.tree is not None:
+                        self.tree.invalidate()
+                self.schedule.compile(self._rules_cfg.get("schedule"))
+            except Exception:
+                self.logger.exception("Rules compile failed, keeping the previous rules")
+            self.store.set_group_resolver(self._group_of)
+            self._schedule_deadline = now
+        if not self._title_hook_tried and self.rules.has_title_rules():
+            # Only pay for the system-wide name-change hook once a title rule exists.
+            self._title_hook_tried = True
+            try:
+                if not self.titles.start_hook():
+                    self.logger.info("Title hook unavailable; polling window titles")
+            except Exception:
+                self.logger.exception("Title hook failed; polling window titles")
+        if now >= self._schedule_deadline:
+            self._refresh_schedule(now)
+
+        enabled = self._enabled
+        strict_remaining = self._advance_timers(now, dt_ns)
+        user_idle = self._update_idle()
+
+        active_proc = None
+        decision = None
+        match_key = None
+        illegal_focused = False
+
+        if enabled:
+            with self.rules_lock:
+                tree = self.tree
+                if tree is not None:
+                    tree.maybe_refresh(now)
+                rules = self.rules
+                if m is None:
+                    hwnd, active_pid = self.foreground()
+                    active_proc = tree.name(active_pid) if tree is not None else self.process_name(active_pid)
+                    title = self.titles.title(hwnd, now) if rules.has_title_rules() else None
+                    decision = rules.decide(active_proc, title)
+                    if decision is None and tree is not None and active_pid:
+                        decision = self._attribute(active_pid)
+                else:
+                    t0 = perf_counter_ns()
+                    hwnd, active_pid = self.foreground()
+                    t1 = perf_counter_ns()
+                    active_proc = tree.name(active_pid) if tree is not None else self.process_name(active_pid)
+                    t2 = perf_counter_ns()
+                    title = self.titles.title(hwnd, now) if rules.has_title_rules() else None
+                    decision = rules.decide(active_proc, title)
+                    if decision is None and tree is not None and active_pid:
+                        decision = self._attribute(active_pid)
+                    t3 = perf_counter_ns()
+                    m.observe("foreground", t1 - t0)
+                    m.observe("proc_name", t2 - t1)
+                    m.observe("match", t3 - t2)
+            illegal_focused = decision is not None
+            if illegal_focused:
+                match_key = decision.key
+
+            if (
+                self._break_active
+                and (not self._break_paused)
+                and illegal_focused
+                and (now - self._last_break_illegal_reminder_mono) >= 30.0
+            ):
+                self.chime("break_reminder")
+                self._last_break_illegal_reminder_mono = now
+
+            if illegal_focused and dt_ns > 0 and not user_idle:
+                self.store.add_ns(match_key, dt_ns, decision.group)
+        else:
+            if self._strict_active and not self._strict_paused:
+                self.game.add_break_ns(dt_ns, reason="monitor_disabled")
+
+        if self._strict_active and (not self._strict_paused) and not user_idle:
+            if m is not None:
+                t0 = perf_counter_ns()
+            if enabled:
+                self.game.update_illegal_switch(illegal_focused)
+                if illegal_focused:
+                    self.game.add_illegal_ns(dt_ns, match_key)
+                else:
+                    self.game.add_study_ns(dt_ns)
+            else:
+                self.game.update_illegal_switch(False)
+            if m is not None:
+                m.observe("game", perf_counter_ns() - t0)
+
+        self.focused_key = match_key
+        rec = self.recorder
+        if rec is not None:
+            sample = (hwnd, active_pid, active_proc, title) if enabled else None
+            rec.tick(now_ns, raw_dt_ns, self._wall_clock(), sample, self._idle_sec)
+
+        reached = False
+        schedule_block = False
+        if decision is not None:
+            effect = self.schedule.effect_for(decision.key, decision.group) if self.schedule.active else None
+            if effect == "block":
+                schedule_block = True
+                limit_text = f"Blocked by schedule ({', '.join(self.schedule.active_names())})"
+            elif effect == "unlimited":
+                limit_text = "Daily limit: suspended by schedule"
+            else:
+                reached, limit_text = describe_allowance(*self.rules.allowance(decision, self.store))
+        elif self.rules.has_limits():
+            limit_text = "Daily limit: (focus an illegal app to see its counter)"
+        else:
+            limit_text = "Daily limit: disabled/invalid"
+
+        strict_counts_as_active = self._strict_active and (not self._strict_paused)
+        should_punish = (
+            enabled
+            and illegal_focused
+            and not user_idle
+            and (strict_counts_as_active or reached or schedule_block)
+        )
+
+        if should_punish:
+            try:
+                self.tone.start()
+            except Exception:
+                pass
+        else:
+            self.tone.stop()
+
+        if enabled and illegal_focused != self._prev_illegal_focus:
+            self._prev_illegal_focus = illegal_focused
+            if illegal_focused:
+                self._focus_log.log(now, f"Illegal focus ENTER app={active_proc}")
+            else:
+                self._focus_log.log(now, "Illegal focus EXIT")
+        elif self._focus_log.suppressed:
+            self._focus_log.poll(now)
+
+        status = {
+            "enabled": enabled,
+            "active_proc": active_proc,
+            "match_key": match_key,
+            "illegal_focused": illegal_focused,
+            "limit_reached": reached,
+            "schedule_block": schedule_block,
+            "schedule": self.schedule.active_names(),
+            "running_targets": self.sweep.running if self.sweep is not None else (),
+            "user_idle": user_idle,
+            "punishing": should_punish,
+            "strict_text": self._strict_text(strict_remaining),
+            "limit_text": limit_text,
+        }
+        status.update(self.timer_state())
+
+        if (now - self._last_ui_update) >= UI_UPDATE_MIN_INTERVAL_SEC:
+            self._last_ui_update = now
+            if m is not None:
+                t0 = perf_counter_ns()
+            self._ui.on_status(status)
+            self.hub.publish(status)
+            if m is not None:
+                m.observe("ui", perf_counter_ns() - t0)
+
+        if self.autosave and (now - self._last_save_mono) >= SAVE_EVERY_SEC:
+            self._last_save_mono = now
+            self.save()
+
+        if m is not None:
+            m.observe("tick", perf_counter_ns() - t_tick)
+        return status
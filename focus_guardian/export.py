@@ -0,0 +1,390 @@
+import csv
+import json
+import struct
+import argparse
+
+from .config import GAME_FILE, ARCHIVE_DIR
+from .archive import GameArchive
+from .storage import open_state_text
+
+
+# Streaming history export. game_db.json is a single JSON document, so
+# iter_days() walks its "days" object one member at a time instead of loading
+# it; memory is bounded by the largest single day. Filters run inside the
+# generator chain and the writers consume rows one at a time (columnar output
+# in fixed-size batches). Archived months are decompressed one at a time and
+# only when they overlap the date range. The live file is checksum-verified
+# (in chunks) before parsing; a torn one falls back to its newest good backup.
+CHUNK_CHARS = 64 * 1024
+BATCH_ROWS = 4096
+
+FIELDS = {
+    "days": ("date", "points", "study_sec", "illegal_sec", "break_sec", "sessions"),
+    "sessions": (
+        "date",
+        "session_id",
+        "started_at",
+        "ended_at",
+        "planned_sec",
+        "study_sec",
+        "illegal_sec",
+        "break_sec",
+        "pauses_used",
+        "illegal_switches",
+        "points",
+        "reward",
+    ),
+    "apps": ("date", "session_id", "app", "illegal_sec"),
+}
+FORMATS = ("csv", "jsonl", "columnar")
+
+
+class _StreamReader:
+    def __init__(self, f, chunk: int = CHUNK_CHARS):
+        self._f = f
+        self._chunk = chunk
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self._decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+        data = self._f.read(self._chunk)
+        if not data:
+            self._eof = True
+            return False
+        if self._pos > self._chunk:
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
+        self._buf += data
+        return True
+
+    def peek(self) -> str:
+        while True:
+            buf, pos = self._buf, self._pos
+            while pos < len(buf) and buf[pos] in " \t\r\n":
+                pos += 1
+            self._pos = pos
+            if pos < len(buf):
+                return buf[pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, ch: str) -> None:
+        if self.peek() != ch:
+            raise ValueError(f"expected {ch!r} at offset {self._pos}")
+        self._pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                obj, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number at the very end of the buffer may continue in the next chunk.
+            if end >= len(self._buf) and self._fill():
+                continue
+            self._pos = end
+            return obj
+
+    def members(self):
+        # Yields (key, reader) per member of the object at the cursor; the
+        # consumer must read or skip the value before asking for the next.
+        self.expect("{")
+        if self.peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(":")
+            yield key, self
+            ch = self.peek()
+            self._pos += 1
+            if ch == "}":
+                return
+            if ch != ",":
+                raise ValueError(f"expected ',' or '}}' at offset {self._pos - 1}")
+
+
+def iter_days(path: str = GAME_FILE):
+    with open_state_text(path) as f:
+        top = _StreamReader(f)
+        for key, r in top.members():
+            if key != "days":
+                r.value()
+                continue
+            for date, rd in r.members():
+                day = rd.value()
+                if isinstance(day, dict):
+                    yield str(date), day
+
+
+def iter_history(path: str = GAME_FILE, archive_dir: str | None = ARCHIVE_DIR, since=None, until=None):
+    archive = GameArchive(archive_dir) if archive_dir else None
+    if archive is not None:
+        for month in archive.months():
+            if (since and month < since[:7]) or (until and month > until[:7]):
+                continue
+            yield from archive.iter_month(month)
+    for date, day in iter_days(path):
+        # A day archived by a run that crashed before saving the live file.
+        if archive is not None and archive.has(date):
+            continue
+        yield date, day
+
+
+def filter_dates(days, since: str | None = None, until: str | None = None):
+    for date, day in days:
+        if since and date < since:
+            continue
+        if until and date > until:
+            continue
+        yield date, day
+
+
+def day_rows(days):
+    for date, day in days:
+        totals = day.get("totals") or {}
+        yield {
+            "date": date,
+            "points": int(totals.get("points", 0)),
+            "study_sec": float(totals.get("study_sec", 0.0)),
+            "illegal_sec": float(totals.get("illegal_sec", 0.0)),
+            "break_sec": float(totals.get("break_sec", 0.0)),
+            "sessions": len(day.get("sessions") or []),
+        }
+
+
+def _session_apps(s: dict) -> dict:
+    return {str(k).lower(): float(v) for k, v in (s.get("illegal_by_app") or {}).items()}
+
+
+def session_rows(days, apps: set[str] | None = None):
+    # With an app filter, only sessions with illegal time in one of the apps.
+    for date, day in days:
+        for s in day.get("sessions") or []:
+            if apps and not apps.intersection(_session_apps(s)):
+                continue
+            yield {
+                "date": date,
+                "session_id": int(s.get("id", 0)),
+                "started_at": str(s.get("started_at") or ""),
+                "ended_at": str(s.get("ended_at") or ""),
+                "planned_sec": float(s.get("planned_sec", 0.0)),
+                "study_sec": float(s.get("study_sec", 0.0)),
+                "illegal_sec": float(s.get("illegal_sec", 0.0)),
+                "break_sec": float(s.get("break_sec", 0.0)),
+                "pauses_used": int(s.get("pauses_used", 0)),
+                "illegal_switches": int(s.get("illegal_switches", 0)),
+                "points": int(s.get("points", 0)),
+                "reward": str(s.get("reward") or ""),
+            }
+
+
+def app_rows(days, apps: set[str] | None = None):
+    for date, day in days:
+        for s in day.get("sessions") or []:
+            for app, sec in _session_apps(s).items():
+                if apps and app not in apps:
+                    continue
+                yield {"date": date, "session_id": int(s.get("id", 0)), "app": app, "illegal_sec": sec}
+
+
+def history_rows(
+    path: str = GAME_FILE,
+    kind: str = "sessions",
+    since=None,
+    until=None,
+    apps=None,
+    archive_dir: str | None = ARCHIVE_DIR,
+):
+    days = filter_dates(iter_history(path, archive_dir, since, until), since, until)
+    apps = {a.lower() for a in apps} if apps else None
+    if kind == "days":
+        return day_rows(days)
+    if kind == "sessions":
+        return session_rows(days, apps)
+    if kind == "apps":
+        return app_rows(days, apps)
+    raise ValueError(f"unknown kind: {kind}")
+
+
+# Writers return the number of rows written.
+def write_csv(rows, fields: tuple, f) -> int:
+    w = csv.DictWriter(f, fieldnames=fields, lineterminator="\n")
+    w.writeheader()
+    n = 0
+    for row in rows:
+        w.writerow(row)
+        n += 1
+    return n
+
+
+def write_jsonl(rows, f) -> int:
+    n = 0
+    for row in rows:
+        f.write(json.dumps(row, separators=(",", ":")) + "\n")
+        n += 1
+    return n
+
+
+def _batches(rows, size: int = BATCH_ROWS):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# Column-packed fallback when pyarrow is missing:
+#   magic, u32 schema length, schema JSON {"fields": [[name, type], ...]}
+#   then blocks: u32 row count (0 ends the file), and per column either
+#   packed little-endian int64/float64 values, or u32 lengths followed by the
+#   concatenated UTF-8 bytes.
+COLUMNAR_MAGIC = b"FGCOL1\n"
+_U32 = struct.Struct("<I")
+_TYPE_CODES = {"int": "q", "float": "d"}
+
+
+def _column_types(kind: str) -> list[tuple[str, str]]:
+    types = []
+    for name in FIELDS[kind]:
+        if name in ("points", "sessions", "session_id", "pauses_used", "illegal_switches"):
+            types.append((name, "int"))
+        elif name.endswith("_sec"):
+            types.append((name, "float"))
+        else:
+            types.append((name, "str"))
+    return types
+
+
+def write_packed(rows, kind: str, f) -> int:
+    types = _column_types(kind)
+    schema = json.dumps({"kind": kind, "fields": types}).encode("utf-8")
+    f.write(COLUMNAR_MAGIC + _U32.pack(len(schema)) + schema)
+    n = 0
+    for batch in _batches(rows):
+        f.write(_U32.pack(len(batch)))
+        for name, t in types:
+            col = [row[name] for row in batch]
+            if t in _TYPE_CODES:
+                f.write(struct.pack(f"<{len(col)}{_TYPE_CODES[t]}", *col))
+            else:
+                data = [v.encode("utf-8") for v in col]
+                f.write(struct.pack(f"<{len(data)}I", *(len(b) for b in data)))
+                f.write(b"".join(data))
+        n += len(batch)
+    f.write(_U32.pack(0))
+    return n
+
+
+def iter_packed(f):
+    # Reads write_packed() output back as row dicts, one block at a time.
+    if f.read(len(COLUMNAR_MAGIC)) != COLUMNAR_MAGIC:
+        raise ValueError("not a packed history export")
+    (size,) = _U32.unpack(f.read(4))
+    types = json.loads(f.read(size))["fields"]
+    while True:
+        (count,) = _U32.unpack(f.read(4))
+        if count == 0:
+            return
+        cols = {}
+        for name, t in types:
+            if t in _TYPE_CODES:
+                code = _TYPE_CODES[t]
+                cols[name] = struct.unpack(f"<{count}{code}", f.read(8 * count))
+            else:
+                lengths = struct.unpack(f"<{count}I", f.read(4 * count))
+                raw = f.read(sum(lengths))
+                vals, pos = [], 0
+                for ln in lengths:
+                    vals.append(raw[pos:pos + ln].decode("utf-8"))
+                    pos += ln
+                cols[name] = vals
+        for i in range(count):
+            yield {name: cols[name][i] for name, _ in types}
+
+
+def write_parquet(rows, kind: str, path: str) -> int:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    pa_types = {"int": pa.int64(), "float": pa.float64(), "str": pa.string()}
+    types = _column_types(kind)
+    schema = pa.schema([(name, pa_types[t]) for name, t in types])
+    n = 0
+    with pq.ParquetWriter(path, schema) as w:
+        for batch in _batches(rows):
+            w.write_table(pa.Table.from_pylist(batch, schema=schema))
+            n += len(batch)
+        if n == 0:
+            w.write_table(schema.empty_table())
+    return n
+
+
+def _have_pyarrow() -> bool:
+    try:
+        import pyarrow.parquet  # noqa: F401
+        return True
+    except Exception:
+        return False
+
+
+def export_history(
+    out: str,
+    fmt: str = "csv",
+    kind: str = "sessions",
+    path: str = GAME_FILE,
+    since: str | None = None,
+    until: str | None = None,
+    apps=None,
+    archive_dir: str | None = ARCHIVE_DIR,
+) -> dict:
+    # "columnar" is Parquet when pyarrow is installed, otherwise the packed format.
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown format: {fmt}")
+    rows = history_rows(path, kind, since, until, apps, archive_dir)
+    if fmt == "csv":
+        with open(out, "w", encoding="utf-8", newline="") as f:
+            n = write_csv(rows, FIELDS[kind], f)
+    elif fmt == "jsonl":
+        with open(out, "w", encoding="utf-8") as f:
+            n = write_jsonl(rows, f)
+    elif _have_pyarrow():
+        fmt = "parquet"
+        n = write_parquet(rows, kind, out)
+    else:
+        fmt = "packed"
+        with open(out, "wb") as f:
+            n = write_packed(rows, kind, f)
+    return {"rows": n, "format": fmt, "kind": kind, "out": out}
+
+
+def main(argv: list[str] | None = None) -> None:
+    p = argparse.ArgumentParser(prog="python -m focus_guardian.export", description="Export game history.")
+    p.add_argument("out", help="output file")
+    p.add_argument("--format", choices=FORMATS, default="csv", help="columnar = Parquet if pyarrow is installed")
+    p.add_argument("--kind", choices=tuple(FIELDS), default="sessions", help="day totals, sessions or per-app illegal time")
+    p.add_argument("--game-file", default=GAME_FILE)
+    p.add_argument("--archive-dir", default=ARCHIVE_DIR, help="compressed old months; empty to skip")
+    p.add_argument("--since", help="first date, YYYY-MM-DD")
+    p.add_argument("--until", help="last date, YYYY-MM-DD")
+    p.add_argument("--app", action="append", dest="apps", help="only these apps (sessions and apps kinds); repeatable")
+    args = p.parse_args(argv)
+
+    report = export_history(
+        args.out, args.format, args.kind, args.game_file, args.since, args.until, args.apps, args.archive_dir
+    )
+    print(json.dumps(report))
+
+
+if __name__ == "__main__":
+    main()
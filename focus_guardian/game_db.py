@@ -6,7 +6,8 @@ import threading
 import datetime
 import logging
 
-from .utils import ensure_dir, today_str, yesterday_str
+from .utils import ensure_dir, sec_to_ns, ns_to_sec
+from .storage import read_json, write_state
 from .config import (
     POINTS_PER_STUDY_MIN,
     PENALTY_PER_ILLEGAL_10SEC,
@@ -17,13 +18,16 @@ from .config import (
     LOW_BREAKS_SEC,
     XP_PER_POINT,
     LEVEL_XP_UNIT,
+    ARCHIVE_AFTER_WEEKS,
 )
 
 
 class GameDB:
-    def __init__(self, path: str, logger: logging.Logger):
+    def __init__(self, path: str, logger: logging.Logger, wall_clock=time.time):
         self._path = path
         self._logger = logger
+        # Dates and session timestamps; trace replay passes its own clock.
+        self._wall_clock = wall_clock
         self._lock = threading.RLock()
         self._db = {
             "schema": 1,
@@ -39,35 +43,110 @@ class GameDB:
         }
 
         self._active = None
+        # Active-session durations accumulate here in integer nanoseconds and
+        # are written into the session dict as float seconds on snapshot/end.
+        self._active_ns = {"study_sec": 0, "illegal_sec": 0, "break_sec": 0}
+        self._illegal_by_app_ns: dict[str, int] = {}
         self._last_illegal_flag = False
+        self._today = self._date()
+        self._pending_load = False
+        # Other devices' totals (see sync.SyncJournal); folded into snapshots only.
+        self._remote_xp = 0
+        self._remote_sessions = 0
+        self._remote_days: set[str] = set()
+        self._archive = None
+        self._archive_after_weeks = 0
 
     def load(self) -> None:
+        self._pending_load = False
         ensure_dir(os.path.dirname(self._path))
-        if not os.path.exists(self._path):
-            return
         try:
-            with open(self._path, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            # Falls back to the newest backup that verifies.
+            data = read_json(self._path, self._logger)
             if isinstance(data, dict):
                 with self._lock:
                     self._db = data
         except Exception:
             self._logger.exception("GameDB load failed, starting fresh")
         self._ensure_today_nodes()
+        self.archive_old_days()
+
+    def set_archive(self, archive, after_weeks: int = ARCHIVE_AFTER_WEEKS) -> None:
+        # archive.GameArchive; set before load() so old days move out on load.
+        self._archive = archive
+        self._archive_after_weeks = int(after_weeks)
+
+    def archive_old_days(self) -> int:
+        if self._archive is None or self._archive_after_weeks <= 0:
+            return 0
+        cutoff = str(datetime.date.fromisoformat(self._today) - datetime.timedelta(weeks=self._archive_after_weeks))
+        with self._lock:
+            old = {d: day for d, day in self._db.get("days", {}).items() if d < cutoff}
+        if not old:
+            return 0
+        # Days that old are never written again, so they can be encoded
+        # outside the lock. Segments land before the live file shrinks.
+        try:
+            self._archive.add_days(old)
+        except Exception:
+            self._logger.exception("GameDB archive failed")
+            return 0
+        with self._lock:
+            days = self._db["days"]
+            for d in old:
+                days.pop(d, None)
+        self.save()
+        self._logger.info(f"GameDB archived {len(old)} days older than {cutoff}")
+        return len(old)
+
+    def get_day(self, date_str: str) -> dict | None:
+        # Live days first, then the archive (decompresses only that month).
+        self._ensure_loaded()
+        with self._lock:
+            day = self._db.get("days", {}).get(date_str)
+            if day is not None:
+                return json.loads(json.dumps(day))
+        if self._archive is not None:
+            return self._archive.get_day(date_str)
+        return None
+
+    def _points_by_date(self) -> dict[str, int]:
+        # Caller holds the lock. Archived days come from segment indexes.
+        points = self._archive.points_by_date() if self._archive is not None else {}
+        for d, day in self._db.get("days", {}).items():
+            pts = int((day.get("totals") or {}).get("points", 0))
+            if pts > 0:
+                points[d] = pts
+        return points
+
+    def defer_load(self) -> None:
+        # History is read on first use. Session accounting doesn't need it, so
+        # enforcement can start before the file is parsed.
+        self._pending_load = True
+
+    def _ensure_loaded(self) -> None:
+        if self._pending_load:
+            with self._lock:
+                if self._pending_load:
+                    self.load()
 
     def save(self) -> None:
+        if self._pending_load:
+            return  # nothing changed since it was never read
         ensure_dir(os.path.dirname(self._path))
         try:
+            # Only the snapshot takes the lock; write_state serializes
+            # concurrent writers of the file itself.
             with self._lock:
-                data = self._db
-            with open(self._path, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2)
+                text = json.dumps(self._db, indent=2)
+            write_state(self._path, text.encode("utf-8"))
         except Exception:
             self._logger.exception("GameDB save failed")
 
     def _ensure_today_nodes(self) -> None:
-        t = today_str()
+        self._ensure_loaded()
         with self._lock:
+            t = self._today
             days = self._db.setdefault("days", {})
             if t not in days:
                 days[t] = {
@@ -80,16 +159,32 @@ class GameDB:
                     },
                 }
 
+    def _now(self) -> datetime.datetime:
+        return datetime.datetime.fromtimestamp(self._wall_clock())
+
+    def _date(self, days_ago: int = 0) -> str:
+        return str(self._now().date() - datetime.timedelta(days=days_ago))
+
     def reset_if_new_day(self) -> None:
+        self.on_new_day(self._date())
+
+    def on_new_day(self, date_str: str) -> None:
+        with self._lock:
+            self._today = date_str
+        # DayClock.subscribe calls this straight away; a deferred load stays
+        # deferred and load() creates today's nodes and archives then.
+        if self._pending_load:
+            return
         self._ensure_today_nodes()
+        self.archive_old_days()
 
     def start_session(self, planned_sec: float) -> None:
         self.reset_if_new_day()
         with self._lock:
             self._active = {
-                "id": int(time.time()),
-                "date": today_str(),
-                "started_at": datetime.datetime.now().isoformat(timespec="seconds"),
+                "id": int(self._wall_clock()),
+                "date": self._today,
+                "started_at": self._now().isoformat(timespec="seconds"),
                 "ended_at": None,
                 "planned_sec": float(planned_sec),
                 "study_sec": 0.0,
@@ -102,6 +197,8 @@ class GameDB:
                 "points": 0,
                 "reward": "None",
             }
+            self._active_ns = {"study_sec": 0, "illegal_sec": 0, "break_sec": 0}
+            self._illegal_by_app_ns = {}
             self._last_illegal_flag = False
         self._logger.info(f"GAME session start planned_sec={planned_sec:.1f}")
 
@@ -115,35 +212,51 @@ class GameDB:
                 return
             self._active["pauses_used"] = int(self._active.get("pauses_used", 0)) + 1
 
-    def add_break(self, sec: float, reason: str | None = None) -> None:
-        if sec <= 0:
+    def add_break_ns(self, ns: int, reason: str | None = None) -> None:
+        if ns <= 0:
             return
         with self._lock:
             if self._active is None:
                 return
-            self._active["break_sec"] = float(self._active.get("break_sec", 0.0)) + float(sec)
+            self._active_ns["break_sec"] += ns
             if reason:
                 self._active["notes"].append(f"break:{reason}")
 
-    def add_study(self, sec: float) -> None:
-        if sec <= 0:
+    def add_study_ns(self, ns: int) -> None:
+        if ns <= 0:
             return
         with self._lock:
             if self._active is None:
                 return
-            self._active["study_sec"] = float(self._active.get("study_sec", 0.0)) + float(sec)
+            self._active_ns["study_sec"] += ns
 
-    def add_illegal(self, sec: float, proc: str | None) -> None:
-        if sec <= 0:
+    def add_illegal_ns(self, ns: int, proc: str | None) -> None:
+        if ns <= 0:
             return
         with self._lock:
             if self._active is None:
                 return
-            self._active["illegal_sec"] = float(self._active.get("illegal_sec", 0.0)) + float(sec)
+            self._active_ns["illegal_sec"] += ns
             if proc:
                 key = proc.lower()
-                d = self._active.setdefault("illegal_by_app", {})
-                d[key] = float(d.get(key, 0.0)) + float(sec)
+                self._illegal_by_app_ns[key] = self._illegal_by_app_ns.get(key, 0) + ns
+
+    def add_break(self, sec: float, reason: str | None = None) -> None:
+        self.add_break_ns(sec_to_ns(sec), reason)
+
+    def add_study(self, sec: float) -> None:
+        self.add_study_ns(sec_to_ns(sec))
+
+    def add_illegal(self, sec: float, proc: str | None) -> None:
+        self.add_illegal_ns(sec_to_ns(sec), proc)
+
+    def _materialize_active(self) -> None:
+        # Caller holds the lock.
+        if self._active is None:
+            return
+        for k, v in self._active_ns.items():
+            self._active[k] = ns_to_sec(v)
+        self._active["illegal_by_app"] = {k: ns_to_sec(v) for k, v in self._illegal_by_app_ns.items()}
 
     def update_illegal_switch(self, illegal_flag: bool) -> None:
         with self._lock:
@@ -199,12 +312,12 @@ class GameDB:
 
         lt = self._db.setdefault("lifetime", {})
         last = lt.get("last_streak_date")
-        today = today_str()
+        today = self._date()
 
         if last == today:
             return
 
-        if last == yesterday_str():
+        if last == self._date(1):
             lt["current_streak"] = int(lt.get("current_streak", 0)) + 1
         else:
             lt["current_streak"] = 1
@@ -216,10 +329,13 @@ class GameDB:
             lt["best_streak"] = cur
 
     def end_session(self, reason: str) -> None:
-        # Ensure day exists before we take the lock for the main update
+        # Ensure day exists before we take the lock for the main update; this
+        # also runs a deferred load, which on_new_day leaves pending.
         self.reset_if_new_day()
+        self._ensure_today_nodes()
 
         with self._lock:
+            self._materialize_active()
             s = self._active
             self._active = None
             self._last_illegal_flag = False
@@ -227,7 +343,7 @@ class GameDB:
         if s is None:
             return
 
-        s["ended_at"] = datetime.datetime.now().isoformat(timespec="seconds")
+        s["ended_at"] = self._now().isoformat(timespec="seconds")
         s["notes"].append(f"end:{reason}")
 
         points, reward = self._compute_points(s)
@@ -235,13 +351,12 @@ class GameDB:
         s["reward"] = reward
 
         with self._lock:
-            day = self._db["days"][today_str()]
+            day = self._db["days"][self._today]
             day["sessions"].append(s)
 
             totals = day["totals"]
-            totals["study_sec"] = float(totals.get("study_sec", 0.0)) + float(s.get("study_sec", 0.0))
-            totals["illegal_sec"] = float(totals.get("illegal_sec", 0.0)) + float(s.get("illegal_sec", 0.0))
-            totals["break_sec"] = float(totals.get("break_sec", 0.0)) + float(s.get("break_sec", 0.0))
+            for k in ("study_sec", "illegal_sec", "break_sec"):
+                totals[k] = ns_to_sec(sec_to_ns(totals.get(k, 0.0)) + sec_to_ns(s.get(k, 0.0)))
             totals["points"] = int(totals.get("points", 0)) + int(points)
 
             lt = self._db.setdefault("lifetime", {})
@@ -256,15 +371,51 @@ class GameDB:
             f"study={s.get('study_sec', 0):.1f} illegal={s.get('illegal_sec', 0):.1f} break={s.get('break_sec', 0):.1f}"
         )
 
-    def snapshot_today(self) -> dict:
+    def sync_state(self) -> tuple[int, int, dict[str, int]]:
+        # This device's own lifetime xp, session count and per-day points.
         self._ensure_today_nodes()
         with self._lock:
-            day = self._db["days"].get(today_str(), {})
             lt = self._db.get("lifetime", {})
+            return int(lt.get("xp", 0)), int(lt.get("total_sessions", 0)), self._points_by_date()
+
+    def set_remote(self, xp: int, sessions: int, days_with_points: set[str]) -> None:
+        with self._lock:
+            self._remote_xp = int(xp)
+            self._remote_sessions = int(sessions)
+            self._remote_days = set(days_with_points)
+
+    def _merged_lifetime(self, lt: dict) -> dict:
+        # Caller holds the lock. Adds other devices' xp and sessions and
+        # recomputes the streak over days with points on any device.
+        lt["xp"] = int(lt.get("xp", 0)) + self._remote_xp
+        lt["total_sessions"] = int(lt.get("total_sessions", 0)) + self._remote_sessions
+        lt["level"] = max(1, 1 + int(math.sqrt(lt["xp"] / LEVEL_XP_UNIT))) if LEVEL_XP_UNIT > 0 else 1
+
+        active_days = set(self._remote_days)
+        active_days.update(self._points_by_date())
+        cur = datetime.date.fromisoformat(self._today)
+        if self._today not in active_days:
+            cur -= datetime.timedelta(days=1)
+        streak = 0
+        while str(cur) in active_days:
+            streak += 1
+            cur -= datetime.timedelta(days=1)
+        lt["current_streak"] = streak
+        lt["best_streak"] = max(int(lt.get("best_streak", 0)), streak)
+        return lt
+
+    def snapshot_today(self) -> dict:
+        self._ensure_today_nodes()
+        with self._lock:
+            day = self._db["days"].get(self._today, {})
+            lt = json.loads(json.dumps(self._db.get("lifetime", {})))
+            if self._remote_xp or self._remote_sessions or self._remote_days:
+                lt = self._merged_lifetime(lt)
+            self._materialize_active()
             active = self._active
             return {
                 "day": json.loads(json.dumps(day)),
-                "lifetime": json.loads(json.dumps(lt)),
+                "lifetime": lt,
                 "active": json.loads(json.dumps(active)) if active else None,
             }
 
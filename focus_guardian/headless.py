@@ -0,0 +1,198 @@
+import os
+import json
+import time
+import signal
+import argparse
+
+from .config import (
+    APPDATA_DIR,
+    DATA_FILE,
+    GAME_FILE,
+    TONE_FILE,
+    HEADLESS_CONFIG_FILE,
+    RULES_FILE,
+    IPC_PORT,
+    LOG_FORMAT,
+    TRACE_FILE,
+    ASYNC_RUNTIME,
+    DEFAULT_TARGETS_TEXT,
+    DEFAULT_DAILY_LIMIT_MIN,
+    DEFAULT_BREAK_MIN,
+    SYNC_DIR,
+    SYNC_DEVICE_FILE,
+    ARCHIVE_DIR,
+)
+from .utils import ensure_dir, process_rss_bytes
+from .logging_setup import setup_logger
+from .audio import LoopingTone
+from .usage_store import UsageStore
+from .game_db import GameDB
+from .archive import GameArchive
+from .process_monitor import TargetMatcher
+from .engine import FocusEngine
+from .rules import load_rules
+from .ipc import ControlServer
+from .profiler import SamplingProfiler
+from .trace import TraceRecorder
+from .runtime import AsyncRuntime
+from .sync import SyncJournal, device_id
+
+
+DEFAULT_SETTINGS = {
+    "targets": DEFAULT_TARGETS_TEXT,
+    "daily_limit_min": float(DEFAULT_DAILY_LIMIT_MIN),
+    "strict_minutes": 0.0,
+    "break_minutes": float(DEFAULT_BREAK_MIN),
+    "pomodoro": False,
+    "rules_file": RULES_FILE,
+    "ipc_port": IPC_PORT,
+    "log_format": LOG_FORMAT,
+    "metrics": False,
+    "metrics_file": "",
+    "trace_file": TRACE_FILE,
+    "async_runtime": ASYNC_RUNTIME,
+    "sync_dir": SYNC_DIR,
+}
+
+
+def load_settings(path: str) -> dict:
+    settings = dict(DEFAULT_SETTINGS)
+    if not path or not os.path.exists(path):
+        return settings
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            for k in DEFAULT_SETTINGS:
+                if k in data:
+                    settings[k] = data[k]
+    except Exception:
+        pass
+    return settings
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(prog="focus_guardian --headless", description="Run enforcement without a GUI.")
+    p.add_argument("--headless", action="store_true", help=argparse.SUPPRESS)
+    p.add_argument("--config", default=HEADLESS_CONFIG_FILE, help="JSON settings file")
+    p.add_argument("--targets", help="comma-separated target processes")
+    p.add_argument("--daily-limit", type=float, dest="daily_limit_min", help="daily limit in minutes (<=0 disables)")
+    p.add_argument("--strict-minutes", type=float, help="start a strict session of this length")
+    p.add_argument("--break-minutes", type=float, help="pomodoro break length in minutes")
+    p.add_argument("--pomodoro", action="store_true", default=None, help="auto-loop focus/break")
+    p.add_argument("--rules-file", help="per-app/group limits and allow-list (JSON)")
+    p.add_argument("--log-format", choices=("text", "jsonl"), help="log file format")
+    p.add_argument("--metrics", action="store_true", default=None, help="time monitor loop stages")
+    p.add_argument("--metrics-file", help="periodic metrics dump (.json, otherwise Prometheus text)")
+    p.add_argument("--trace", dest="trace_file", help="record a focus trace for replay (.gz compresses)")
+    p.add_argument("--ipc-port", type=int, help="serve the local control API on 127.0.0.1:PORT")
+    p.add_argument("--sync-dir", help="share usage, limits and streaks with other devices through this folder")
+    p.add_argument("--async", action="store_true", default=None, dest="async_runtime", help="run ticks, saves, sounds and IPC on one asyncio loop")
+    return p
+
+
+def resolve_settings(argv: list[str] | None = None) -> dict:
+    args = build_arg_parser().parse_args(argv)
+    settings = load_settings(args.config)
+    for k in ("targets", "daily_limit_min", "strict_minutes", "break_minutes", "pomodoro", "rules_file", "ipc_port", "metrics", "metrics_file", "log_format", "trace_file", "async_runtime", "sync_dir"):
+        v = getattr(args, k)
+        if v is not None:
+            settings[k] = v
+    return settings
+
+
+class HeadlessApp:
+    def __init__(self, settings: dict, started_at: float | None = None):
+        self._started_at = started_at if started_at is not None else time.perf_counter()
+        ensure_dir(APPDATA_DIR)
+
+        self.logger = setup_logger(str(settings.get("log_format") or LOG_FORMAT))
+        self.logger.info("Headless start")
+
+        self.store = UsageStore(DATA_FILE)
+        self.store.load()
+
+        self.game = GameDB(GAME_FILE, self.logger)
+        self.game.set_archive(GameArchive(ARCHIVE_DIR))
+        self.game.load()
+
+        self.matcher = TargetMatcher()
+        self.tone = LoopingTone(TONE_FILE)
+
+        self.engine = FocusEngine(
+            store=self.store,
+            game=self.game,
+            matcher=self.matcher,
+            tone=self.tone,
+            logger=self.logger,
+        )
+        trace_file = str(settings.get("trace_file") or "")
+        if trace_file:
+            self.engine.set_recorder(TraceRecorder(trace_file))
+            self.logger.info(f"Recording focus trace to {trace_file}")
+        sync_dir = str(settings.get("sync_dir") or "")
+        if sync_dir:
+            self.engine.sync = SyncJournal(sync_dir, device_id(SYNC_DEVICE_FILE), self.store, self.game, self.logger)
+            self.logger.info(f"Syncing through {sync_dir} as {self.engine.sync.device}")
+        self.engine.set_targets_text(str(settings.get("targets") or ""))
+        self.engine.set_daily_limit_text(str(settings.get("daily_limit_min", "")))
+        self.engine.rules_file = str(settings.get("rules_file") or "")
+        self.engine.set_rules(load_rules(self.engine.rules_file, self.logger))
+
+        if settings.get("metrics") or settings.get("metrics_file"):
+            self.engine.enable_metrics(settings.get("metrics_file") or None)
+
+        self.profiler = SamplingProfiler(self.logger)
+
+        self.ipc = None
+        self.runtime = None
+        ipc_port = int(settings.get("ipc_port") or 0)
+        if settings.get("async_runtime"):
+            # Serves IPC itself, so no ControlServer thread.
+            self.runtime = AsyncRuntime(self.engine, self.logger, ipc_port, profiler=self.profiler)
+        elif ipc_port > 0:
+            self.ipc = ControlServer(self.engine, self.logger, ipc_port, profiler=self.profiler)
+
+        strict_minutes = float(settings.get("strict_minutes") or 0.0)
+        if strict_minutes > 0:
+            self.engine.start_strict_timer(
+                strict_minutes,
+                float(settings.get("break_minutes") or 0.0),
+                bool(settings.get("pomodoro")),
+            )
+
+    def _install_signal_handlers(self) -> None:
+        def _handle(signum, frame):
+            self.logger.info(f"Signal {signum} received, stopping")
+            if self.runtime is not None:
+                self.runtime.stop()
+                return
+            self.engine.quit()
+            if self.ipc is not None:
+                self.ipc.stop()
+
+        for name in ("SIGINT", "SIGTERM", "SIGBREAK"):
+            sig = getattr(signal, name, None)
+            if sig is not None:
+                signal.signal(sig, _handle)
+
+        # POSIX only: `kill -USR1 <pid>` captures a profile.
+        usr1 = getattr(signal, "SIGUSR1", None)
+        if usr1 is not None:
+            signal.signal(usr1, lambda signum, frame: self.profiler.start())
+
+    def run(self) -> None:
+        self._install_signal_handlers()
+        if self.ipc is not None:
+            self.ipc.start()
+        self.engine.tick()
+        elapsed_ms = (time.perf_counter() - self._started_at) * 1000.0
+        self.logger.info(f"Headless first tick after {elapsed_ms:.1f} ms rss={process_rss_bytes() / 1e6:.1f} MB")
+        if self.runtime is not None:
+            self.runtime.run()
+        else:
+            self.engine.run()
+
+
+def main(argv: list[str] | None = None, started_at: float | None = None) -> None:
+    HeadlessApp(resolve_settings(argv), started_at=started_at).run()
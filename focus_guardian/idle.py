@@ -0,0 +1,137 @@
+import os
+import sys
+import time
+import ctypes
+import ctypes.util
+import subprocess
+
+
+class IdleSource:
+    # Seconds since the last keyboard/mouse input, or None when unknown.
+    def idle_seconds(self) -> float | None:
+        return None
+
+
+class FakeIdleSource(IdleSource):
+    def __init__(self, idle_sec: float | None = 0.0):
+        self.idle_sec = idle_sec
+
+    def idle_seconds(self) -> float | None:
+        return self.idle_sec
+
+
+class _LASTINPUTINFO(ctypes.Structure):
+    _fields_ = [("cbSize", ctypes.c_uint), ("dwTime", ctypes.c_uint)]
+
+
+class WindowsIdleSource(IdleSource):
+    def __init__(self):
+        self._user32 = ctypes.windll.user32
+        self._kernel32 = ctypes.windll.kernel32
+        self._info = _LASTINPUTINFO()
+        self._info.cbSize = ctypes.sizeof(_LASTINPUTINFO)
+
+    def idle_seconds(self) -> float | None:
+        if not self._user32.GetLastInputInfo(ctypes.byref(self._info)):
+            return None
+        # Both values are 32-bit tick counts; mask handles the 49.7 day wrap.
+        millis = (self._kernel32.GetTickCount() - self._info.dwTime) & 0xFFFFFFFF
+        return millis / 1000.0
+
+
+class _XScreenSaverInfo(ctypes.Structure):
+    _fields_ = [
+        ("window", ctypes.c_ulong),
+        ("state", ctypes.c_int),
+        ("kind", ctypes.c_int),
+        ("til_or_since", ctypes.c_ulong),
+        ("idle", ctypes.c_ulong),
+        ("eventMask", ctypes.c_ulong),
+    ]
+
+
+class XScreenSaverIdleSource(IdleSource):
+    def __init__(self):
+        x11_path = ctypes.util.find_library("X11")
+        xss_path = ctypes.util.find_library("Xss")
+        if not x11_path or not xss_path:
+            raise OSError("libX11/libXss not found")
+        self._x11 = ctypes.CDLL(x11_path)
+        self._xss = ctypes.CDLL(xss_path)
+        self._x11.XOpenDisplay.restype = ctypes.c_void_p
+        self._x11.XDefaultRootWindow.argtypes = [ctypes.c_void_p]
+        self._x11.XDefaultRootWindow.restype = ctypes.c_ulong
+        self._xss.XScreenSaverAllocInfo.restype = ctypes.POINTER(_XScreenSaverInfo)
+        self._xss.XScreenSaverQueryInfo.argtypes = [
+            ctypes.c_void_p,
+            ctypes.c_ulong,
+            ctypes.POINTER(_XScreenSaverInfo),
+        ]
+
+        self._display = self._x11.XOpenDisplay(None)
+        if not self._display:
+            raise OSError("cannot open X display")
+        self._root = self._x11.XDefaultRootWindow(self._display)
+        self._info = self._xss.XScreenSaverAllocInfo()
+
+    def idle_seconds(self) -> float | None:
+        if not self._xss.XScreenSaverQueryInfo(self._display, self._root, self._info):
+            return None
+        return self._info.contents.idle / 1000.0
+
+
+class LogindIdleSource(IdleSource):
+    # logind only exposes a boolean hint plus when it flipped, and asking costs
+    # a subprocess, so the answer is cached for refresh_sec.
+    def __init__(self, session_id: str, refresh_sec: float = 5.0):
+        self._session_id = session_id
+        self._refresh_sec = refresh_sec
+        self._next_query = 0.0
+        self._idle_since_mono: float | None = None
+        self._known = False
+
+    def _query(self) -> None:
+        out = subprocess.run(
+            [
+                "loginctl", "show-session", self._session_id,
+                "-p", "IdleHint", "-p", "IdleSinceHintMonotonic", "--value",
+            ],
+            capture_output=True,
+            text=True,
+            timeout=2.0,
+        ).stdout.split()
+        self._known = len(out) >= 2
+        if self._known and out[0] == "yes":
+            self._idle_since_mono = int(out[1]) / 1e6
+        else:
+            self._idle_since_mono = None
+
+    def idle_seconds(self) -> float | None:
+        now = time.monotonic()
+        if now >= self._next_query:
+            self._next_query = now + self._refresh_sec
+            try:
+                self._query()
+            except Exception:
+                self._known = False
+        if not self._known:
+            return None
+        if self._idle_since_mono is None:
+            return 0.0
+        return max(0.0, time.clock_gettime(time.CLOCK_MONOTONIC) - self._idle_since_mono)
+
+
+def default_idle_source() -> IdleSource:
+    factories = []
+    if sys.platform == "win32":
+        factories.append(WindowsIdleSource)
+    if os.environ.get("DISPLAY"):
+        factories.append(XScreenSaverIdleSource)
+    if os.environ.get("XDG_SESSION_ID"):
+        factories.append(lambda: LogindIdleSource(os.environ["XDG_SESSION_ID"]))
+    for factory in factories:
+        try:
+            return factory()
+        except Exception:
+            continue
+    return IdleSource()
@@ -0,0 +1,224 @@
+import os
+import json
+import math
+import threading
+import socketserver
+import logging
+
+from .config import IPC_HOST, RULES_FILE, EXPORT_DIR
+from .utils import ensure_dir
+from .rules import load_rules
+from .export import export_history
+
+
+_MISSING = object()
+
+
+def _export_path(name: str, base: str = EXPORT_DIR) -> str:
+    # Anything that can reach the socket may ask for an export, so the output
+    # is a plain relative name under EXPORT_DIR, never an arbitrary path.
+    name = str(name or "").strip()
+    parts = name.replace("\\", "/").split("/")
+    if not name or os.path.isabs(name) or os.path.splitdrive(name)[0] or ".." in parts:
+        raise ValueError("out must be a relative file name inside the export directory")
+    base = os.path.realpath(base)
+    path = os.path.realpath(os.path.join(base, name))
+    if os.path.commonpath([base, path]) != base or path == base:
+        raise ValueError("out must be a relative file name inside the export directory")
+    return path
+
+
+def _quantize(status: dict) -> dict:
+    # Whole seconds only, so countdowns don't emit a delta every tick.
+    view = {}
+    for k, v in status.items():
+        if isinstance(v, float):
+            v = int(v) if math.isfinite(v) else None
+        view[k] = v
+    return view
+
+
+class StatusHub:
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._seq = 0
+        self._state: dict = {}
+
+    def publish(self, status: dict) -> None:
+        view = _quantize(status)
+        with self._cond:
+            changed = False
+            for k, v in view.items():
+                if self._state.get(k, _MISSING) != v:
+                    self._state[k] = v
+                    changed = True
+            if changed:
+                self._seq += 1
+                self._cond.notify_all()
+
+    def snapshot(self) -> tuple[int, dict]:
+        with self._cond:
+            return self._seq, dict(self._state)
+
+    def wait_for_change(self, seq: int, timeout: float | None = None) -> tuple[int, dict]:
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq != seq, timeout=timeout)
+            return self._seq, dict(self._state)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def _send(self, obj: dict) -> None:
+        self.wfile.write((json.dumps(obj) + "\n").encode("utf-8"))
+        self.wfile.flush()
+
+    def handle(self) -> None:
+        server: ControlServer = self.server.control
+        for raw in self.rfile:
+            line = raw.decode("utf-8", errors="replace").strip()
+            if not line:
+                continue
+            try:
+                req = json.loads(line)
+                if not isinstance(req, dict):
+                    raise ValueError("request must be an object")
+            except Exception as e:
+                self._send({"ok": False, "error": f"bad request: {e}"})
+                continue
+
+            if req.get("cmd") == "subscribe":
+                self._stream(server)
+                return
+
+            try:
+                self._send(server.handle_command(req))
+            except Exception as e:
+                server.logger.exception("IPC command failed")
+                self._send({"ok": False, "error": str(e)})
+
+    def _stream(self, server: "ControlServer") -> None:
+        hub = server.hub
+        seq, state = hub.snapshot()
+        self._send({"seq": seq, "delta": state})
+        sent = dict(state)
+        while not server.is_closing():
+            new_seq, state = hub.wait_for_change(seq, timeout=1.0)
+            if new_seq == seq:
+                continue
+            seq = new_seq
+            delta = {k: v for k, v in state.items() if sent.get(k, _MISSING) != v}
+            if not delta:
+                continue
+            sent.update(delta)
+            self._send({"seq": seq, "delta": delta})
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class ControlServer:
+    def __init__(self, engine, logger: logging.Logger, port: int, host: str = IPC_HOST, profiler=None):
+        self.engine = engine
+        self.profiler = profiler
+        self.hub = engine.hub
+        self.logger = logger
+        self._addr = (host, int(port))
+        self._server = None
+        self._thread = None
+        self._closing = threading.Event()
+
+    def is_closing(self) -> bool:
+        return self._closing.is_set()
+
+    def start(self) -> None:
+        if self._server is not None:
+            return
+        self._server = _TCPServer(self._addr, _Handler)
+        self._server.control = self
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        self.logger.info(f"IPC listening on {self._addr[0]}:{self._server.server_address[1]}")
+
+    def stop(self) -> None:
+        self._closing.set()
+        if self._server is None:
+            return
+        try:
+            self._server.shutdown()
+            self._server.server_close()
+        except Exception:
+            pass
+        self._server = None
+
+    def handle_command(self, req: dict) -> dict:
+        cmd = req.get("cmd")
+        engine = self.engine
+
+        if cmd == "status":
+            seq, state = self.hub.snapshot()
+            date_str, usage = engine.store.snapshot()
+            return {
+                "ok": True,
+                "seq": seq,
+                "status": state,
+                "timer": _quantize(engine.timer_state()),
+                "usage": {"date": date_str, "seconds": usage, "groups": engine.store.group_snapshot()},
+                "game": engine.game.snapshot_today(),
+            }
+        if cmd == "start":
+            ok = engine.start_strict_timer(
+                float(req.get("minutes", 0)),
+                float(req.get("break_minutes", 0)),
+                bool(req.get("pomodoro", False)),
+            )
+            return {"ok": bool(ok), "queued": bool(ok)}
+        if cmd == "stop":
+            engine.stop_strict_timer()
+            return {"ok": True}
+        if cmd == "pause":
+            engine.toggle_pause_strict_timer()
+            return {"ok": True, "queued": True}
+        if cmd == "set_targets":
+            engine.set_targets_text(str(req.get("text", "")))
+            return {"ok": True}
+        if cmd == "set_daily_limit":
+            engine.set_daily_limit_text(str(req.get("minutes", "")))
+            return {"ok": True}
+        if cmd == "set_enabled":
+            engine.set_enabled(bool(req.get("enabled", True)))
+            return {"ok": True}
+        if cmd == "reload_rules":
+            engine.set_rules(load_rules(getattr(engine, "rules_file", RULES_FILE), self.logger))
+            return {"ok": True}
+        if cmd == "export":
+            try:
+                out = _export_path(req.get("out"))
+            except ValueError as e:
+                return {"ok": False, "error": str(e)}
+            ensure_dir(os.path.dirname(out))
+            # Flushes the live DB first (through the engine's one save path);
+            # the export itself streams the file.
+            engine.save()
+            report = export_history(
+                out,
+                str(req.get("format", "csv")),
+                str(req.get("kind", "sessions")),
+                since=req.get("since"),
+                until=req.get("until"),
+                apps=req.get("apps"),
+            )
+            return {"ok": True, **report}
+        if cmd == "metrics":
+            if engine.metrics is None:
+                return {"ok": False, "error": "metrics disabled"}
+            return {"ok": True, "metrics": engine.metrics.stats()}
+        if cmd == "profile":
+            if self.profiler is None:
+                return {"ok": False, "error": "profiler unavailable"}
+            if "seconds" in req:
+                started = self.profiler.start(float(req["seconds"]))
+            else:
+                started = self.profiler.start()
+            return {"ok": started, "running": self.profiler.is_running()}
+        return {"ok": False, "error": f"unknown cmd: {cmd}"}
@@ -1,24 +1,137 @@
+import json
+import queue
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 
-from .config import LOG_DIR, LOG_FILE
+from .config import (
+    LOG_DIR,
+    LOG_FILE,
+    LOG_FORMAT,
+    LOG_QUEUE_SIZE,
+    LOG_FLAP_WINDOW_SEC,
+    LOG_FLAP_MAX_EVENTS,
+)
 from .utils import ensure_dir
 
 
-def setup_logger() -> logging.Logger:
+_listener: QueueListener | None = None
+
+
+class DroppingQueueHandler(QueueHandler):
+    # Never blocks the caller: records are dropped when the queue is full and
+    # the count is reported once the writer catches up.
+    def __init__(self, q: queue.Queue):
+        super().__init__(q)
+        self.dropped_total = 0
+        self._dropped_pending = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self._dropped_pending:
+            note = logging.LogRecord(
+                record.name, logging.WARNING, __file__, 0,
+                f"Log queue overflow: dropped {self._dropped_pending} records", None, None,
+            )
+            try:
+                self.queue.put_nowait(note)
+                self._dropped_pending = 0
+            except queue.Full:
+                pass
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped_total += 1
+            self._dropped_pending += 1
+
+
+class JsonLinesFormatter(logging.Formatter):
+    # Fixed schema: ts (epoch seconds, ms precision), lvl, thr, msg.
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps(
+            {
+                "ts": round(record.created, 3),
+                "lvl": record.levelname,
+                "thr": record.threadName,
+                "msg": record.getMessage(),
+            },
+            separators=(",", ":"),
+            ensure_ascii=False,
+        )
+
+
+def _make_formatter(fmt: str) -> logging.Formatter:
+    if fmt == "jsonl":
+        return JsonLinesFormatter()
+    return logging.Formatter("%(asctime)s | %(levelname)s | %(message)s")
+
+
+def _stop_listener() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def setup_logger(fmt: str = LOG_FORMAT, path: str = LOG_FILE) -> logging.Logger:
+    global _listener
     ensure_dir(LOG_DIR)
     logger = logging.getLogger("FocusGuardian")
     logger.setLevel(logging.INFO)
 
     if not logger.handlers:
-        handler = RotatingFileHandler(
-            LOG_FILE,
+        file_handler = RotatingFileHandler(
+            path,
             maxBytes=1_000_000,
             backupCount=3,
             encoding="utf-8",
         )
-        fmt = logging.Formatter("%(asctime)s | %(levelname)s | %(message)s")
-        handler.setFormatter(fmt)
-        logger.addHandler(handler)
+        file_handler.setFormatter(_make_formatter(fmt))
+
+        q: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        logger.addHandler(DroppingQueueHandler(q))
+        _listener = QueueListener(q, file_handler)
+        _listener.start()
+        atexit.register(_stop_listener)
 
     return logger
+
+
+class TransitionLogLimiter:
+    # Logs up to max_events transitions per window; the rest are counted and
+    # summarized in one line when the window closes.
+    def __init__(
+        self,
+        logger: logging.Logger,
+        window_sec: float = LOG_FLAP_WINDOW_SEC,
+        max_events: int = LOG_FLAP_MAX_EVENTS,
+    ):
+        self._logger = logger
+        self._window_sec = window_sec
+        self._max_events = max_events
+        self._window_start = None
+        self._count = 0
+        self.suppressed = 0
+        self._last_message = ""
+
+    def log(self, now: float, message: str) -> None:
+        self.poll(now)
+        if self._window_start is None:
+            self._window_start = now
+        if self._count < self._max_events:
+            self._count += 1
+            self._logger.info(message)
+        else:
+            self.suppressed += 1
+            self._last_message = message
+
+    def poll(self, now: float) -> None:
+        if self._window_start is None or (now - self._window_start) < self._window_sec:
+            return
+        if self.suppressed:
+            self._logger.info(
+                f"Focus flapping: {self.suppressed} more transitions in "
+                f"{now - self._window_start:.0f}s, last: {self._last_message}"
+            )
+        self._window_start = None
+        self._count = 0
+        self.suppressed = 0
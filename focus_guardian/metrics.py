@@ -0,0 +1,135 @@
+import os
+import json
+import bisect
+import threading
+
+from .utils import ensure_dir
+
+
+# Upper bucket bounds in nanoseconds (50us .. 1s); anything slower lands in +Inf.
+BUCKET_BOUNDS_NS = (
+    50_000,
+    100_000,
+    250_000,
+    500_000,
+    1_000_000,
+    2_500_000,
+    5_000_000,
+    10_000_000,
+    25_000_000,
+    50_000_000,
+    100_000_000,
+    250_000_000,
+    1_000_000_000,
+)
+
+STAGES = (
+    "tick",
+    "foreground",
+    "proc_name",
+    "match",
+    "game",
+    "ui",
+    "save",
+    "sweep",
+    "jitter",
+)
+
+
+class Histogram:
+    __slots__ = ("counts", "count", "sum_ns", "min_ns", "max_ns")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS_NS) + 1)
+        self.count = 0
+        self.sum_ns = 0
+        self.min_ns = 0
+        self.max_ns = 0
+
+    def observe(self, ns: int) -> None:
+        if ns < 0:
+            ns = 0
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS_NS, ns)] += 1
+        self.count += 1
+        self.sum_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+        if ns < self.min_ns or self.count == 1:
+            self.min_ns = ns
+
+    def quantile_ns(self, q: float) -> int:
+        if self.count == 0:
+            return 0
+        rank = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank:
+                # A bucket's upper bound can lie outside what was observed.
+                bound = BUCKET_BOUNDS_NS[i] if i < len(BUCKET_BOUNDS_NS) else self.max_ns
+                return max(self.min_ns, min(bound, self.max_ns))
+        return self.max_ns
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum_ns": self.sum_ns,
+            "min_ns": self.min_ns,
+            "max_ns": self.max_ns,
+            "mean_ns": (self.sum_ns // self.count) if self.count else 0,
+            "p50_ns": self.quantile_ns(0.50),
+            "p99_ns": self.quantile_ns(0.99),
+            "buckets": self.counts[:],
+        }
+
+
+class LoopMetrics:
+    # Only the monitor thread observes; readers take the lock to get a consistent copy.
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hists = {s: Histogram() for s in STAGES}
+
+    def observe(self, stage: str, ns: int) -> None:
+        with self._lock:
+            self._hists[stage].observe(ns)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._hists = {s: Histogram() for s in STAGES}
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "bucket_bounds_ns": list(BUCKET_BOUNDS_NS),
+                "stages": {name: h.to_dict() for name, h in self._hists.items()},
+            }
+
+    def to_prometheus(self) -> str:
+        lines = [
+            "# HELP focus_guardian_stage_seconds Monitor loop stage duration.",
+            "# TYPE focus_guardian_stage_seconds histogram",
+        ]
+        with self._lock:
+            for name, h in self._hists.items():
+                cumulative = 0
+                for i, c in enumerate(h.counts):
+                    cumulative += c
+                    le = f"{BUCKET_BOUNDS_NS[i] / 1e9:g}" if i < len(BUCKET_BOUNDS_NS) else "+Inf"
+                    lines.append(f'focus_guardian_stage_seconds_bucket{{stage="{name}",le="{le}"}} {cumulative}')
+                lines.append(f'focus_guardian_stage_seconds_sum{{stage="{name}"}} {h.sum_ns / 1e9:.9f}')
+                lines.append(f'focus_guardian_stage_seconds_count{{stage="{name}"}} {h.count}')
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: str) -> None:
+        ensure_dir(os.path.dirname(path))
+        if path.endswith(".json"):
+            content = json.dumps(self.stats(), indent=2)
+        else:
+            content = self.to_prometheus()
+        tmp = path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(content)
+            os.replace(tmp, path)
+        except Exception:
+            pass
@@ -0,0 +1,550 @@
+import os
+import json
+import time
+import struct
+import logging
+import threading
+import multiprocessing
+from multiprocessing import shared_memory
+
+from .config import (
+    DATA_FILE,
+    GAME_FILE,
+    RULES_FILE,
+    TONE_FILE,
+    IPC_PORT,
+    TRACE_FILE,
+    SYNC_DIR,
+    SYNC_DEVICE_FILE,
+    ARCHIVE_DIR,
+    MONITOR_LOG_FILE,
+    STATUS_RING_SLOTS,
+    STATUS_DETAIL_BYTES,
+    UI_UPDATE_MIN_INTERVAL_SEC,
+    STRICT_MAX_PAUSES,
+)
+
+
+# Enforcement runs in a child process that owns the data files and the engine.
+# Every status publish is written into a shared-memory ring of fixed-layout
+# records; the GUI process only ever reads the newest complete one. Usage and
+# game snapshots (variable size) go into a separate JSON block under the same
+# seqlock scheme. Commands travel the other way over a pipe.
+#
+# Ring layout: 64-byte header, then `slots` slots of [seq u64][record].
+# A writer bumps a slot's seq to odd, writes the record, bumps it to even and
+# then publishes the frame number in the header; a reader retries if the seq
+# was odd or changed underneath it.
+
+MAGIC = 0x46475231  # "FGR1"
+RING_VERSION = 2
+_HEADER = struct.Struct("<IHHIIQ")  # magic, version, slot_size, slots, writer pid, frame
+HEADER_SIZE = 64
+_FRAME_OFF = 16
+_U64 = struct.Struct("<Q")
+
+FLAG_FIELDS = (
+    "enabled",
+    "illegal_focused",
+    "limit_reached",
+    "schedule_block",
+    "user_idle",
+    "punishing",
+    "strict_active",
+    "strict_paused",
+    "break_active",
+    "break_paused",
+    "pomodoro",
+)
+# frame, tick mono, flags, strict pauses used, max pauses, strict left, break left,
+# strict planned, break planned, then fixed-width UTF-8 text fields (truncated,
+# NUL padded).
+RECORD = struct.Struct("<QdHBBdddd64s96s96s128s96s128s")
+TEXT_FIELDS = ("active_proc", "match_key", "strict_text", "limit_text", "schedule", "running_targets")
+SLOT_SIZE = (8 + RECORD.size + 7) & ~7
+
+_DETAIL_HEADER = struct.Struct("<QI")  # seq, payload length
+READ_RETRIES = 8
+
+
+def _text(s, width: int) -> bytes:
+    return (s or "").encode("utf-8")[:width]
+
+
+def _untext(b: bytes) -> str:
+    return b.rstrip(b"\0").decode("utf-8", "ignore")
+
+
+def encode_status(frame: int, mono: float, status: dict) -> tuple:
+    flags = 0
+    for i, name in enumerate(FLAG_FIELDS):
+        if status.get(name):
+            flags |= 1 << i
+    return (
+        frame,
+        mono,
+        flags,
+        min(255, int(status.get("strict_pause_count") or 0)),
+        min(255, int(status.get("strict_max_pauses") or 0)),
+        float(status.get("strict_remaining_sec") or 0.0),
+        float(status.get("break_remaining_sec") or 0.0),
+        float(status.get("strict_planned_sec") or 0.0),
+        float(status.get("break_planned_sec") or 0.0),
+        _text(status.get("active_proc"), 64),
+        _text(status.get("match_key"), 96),
+        _text(status.get("strict_text"), 96),
+        _text(status.get("limit_text"), 128),
+        _text(", ".join(status.get("schedule") or ()), 96),
+        _text(", ".join(status.get("running_targets") or ()), 128),
+    )
+
+
+def decode_status(rec: tuple) -> dict:
+    frame, mono, flags, pauses, max_pauses, strict_left, break_left, strict_planned, break_planned = rec[:9]
+    status = {name: bool(flags & (1 << i)) for i, name in enumerate(FLAG_FIELDS)}
+    text = {name: _untext(b) for name, b in zip(TEXT_FIELDS, rec[9:])}
+    status.update(
+        frame=frame,
+        tick_mono=mono,
+        strict_pause_count=pauses,
+        strict_max_pauses=max_pauses,
+        strict_remaining_sec=strict_left,
+        break_remaining_sec=break_left,
+        strict_planned_sec=strict_planned,
+        break_planned_sec=break_planned,
+        active_proc=text["active_proc"] or None,
+        match_key=text["match_key"] or None,
+        strict_text=text["strict_text"],
+        limit_text=text["limit_text"],
+        schedule=[s for s in text["schedule"].split(", ") if s],
+        running_targets=tuple(s for s in text["running_targets"].split(", ") if s),
+    )
+    return status
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    # The creator owns and unlinks the segment. Before 3.13 there is no
+    # track=False, but a spawned child shares the parent's resource tracker,
+    # so attaching doesn't add a second owner.
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+class StatusRing:
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self.shm = shm
+        self.name = shm.name
+        self._owner = owner
+        self._buf = shm.buf
+        magic, version, slot_size, slots, _, _ = _HEADER.unpack_from(self._buf, 0)
+        if magic != MAGIC or version != RING_VERSION or slot_size != SLOT_SIZE:
+            raise ValueError("status ring layout mismatch")
+        self.slots = slots
+        self._frame = _U64.unpack_from(self._buf, _FRAME_OFF)[0]
+
+    @classmethod
+    def create(cls, slots: int = STATUS_RING_SLOTS) -> "StatusRing":
+        slots = max(2, int(slots))
+        # New segments are zero-filled, so every slot starts with an even seq.
+        shm = shared_memory.SharedMemory(create=True, size=HEADER_SIZE + slots * SLOT_SIZE)
+        _HEADER.pack_into(shm.buf, 0, MAGIC, RING_VERSION, SLOT_SIZE, slots, 0, 0)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "StatusRing":
+        return cls(_attach(name), owner=False)
+
+    def set_writer_pid(self, pid: int) -> None:
+        struct.pack_into("<I", self._buf, 12, pid)
+
+    def write(self, status: dict, mono: float) -> int:
+        # Single writer (the engine thread in the child).
+        frame = self._frame + 1
+        off = HEADER_SIZE + ((frame - 1) % self.slots) * SLOT_SIZE
+        buf = self._buf
+        seq = _U64.unpack_from(buf, off)[0]
+        _U64.pack_into(buf, off, seq + 1)
+        RECORD.pack_into(buf, off + 8, *encode_status(frame, mono, status))
+        _U64.pack_into(buf, off, seq + 2)
+        _U64.pack_into(buf, _FRAME_OFF, frame)
+        self._frame = frame
+        return frame
+
+    def latest_frame(self) -> int:
+        buf = self._buf
+        return 0 if buf is None else _U64.unpack_from(buf, _FRAME_OFF)[0]
+
+    def read(self) -> dict | None:
+        buf = self._buf
+        if buf is None:
+            return None
+        for _ in range(READ_RETRIES):
+            frame = _U64.unpack_from(buf, _FRAME_OFF)[0]
+            if frame == 0:
+                return None
+            off = HEADER_SIZE + ((frame - 1) % self.slots) * SLOT_SIZE
+            seq = _U64.unpack_from(buf, off)[0]
+            if seq & 1:
+                continue
+            rec = RECORD.unpack_from(buf, off + 8)
+            if _U64.unpack_from(buf, off)[0] == seq and rec[0] == frame:
+                return decode_status(rec)
+        return None
+
+    def close(self) -> None:
+        self._buf = None
+        try:
+            self.shm.close()
+            if self._owner:
+                self.shm.unlink()
+        except Exception:
+            pass
+
+
+class DetailBlock:
+    # One seqlocked JSON payload: {"usage": [date, {...}], "game": snapshot_today}.
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self.shm = shm
+        self.name = shm.name
+        self._owner = owner
+        self._buf = shm.buf
+        self._capacity = len(shm.buf) - _DETAIL_HEADER.size
+        self._cached: dict = {}
+        self._cached_seq = 0
+
+    @classmethod
+    def create(cls, size: int = STATUS_DETAIL_BYTES) -> "DetailBlock":
+        shm = shared_memory.SharedMemory(create=True, size=max(4096, int(size)))
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "DetailBlock":
+        return cls(_attach(name), owner=False)
+
+    def write(self, detail: dict) -> bool:
+        data = json.dumps(detail, separators=(",", ":")).encode("utf-8")
+        if len(data) > self._capacity:
+            return False
+        buf = self._buf
+        seq = _U64.unpack_from(buf, 0)[0]
+        _U64.pack_into(buf, 0, seq + 1)
+        buf[_DETAIL_HEADER.size:_DETAIL_HEADER.size + len(data)] = data
+        _DETAIL_HEADER.pack_into(buf, 0, seq + 2, len(data))
+        return True
+
+    def read(self) -> dict:
+        # Falls back to the last good payload while the writer is mid-update.
+        buf = self._buf
+        if buf is None:
+            return self._cached
+        for _ in range(READ_RETRIES):
+            seq, length = _DETAIL_HEADER.unpack_from(buf, 0)
+            if seq == self._cached_seq:
+                return self._cached
+            if seq & 1:
+                time.sleep(0.001)
+                continue
+            data = bytes(buf[_DETAIL_HEADER.size:_DETAIL_HEADER.size + length])
+            if _U64.unpack_from(buf, 0)[0] != seq:
+                continue
+            try:
+                self._cached = json.loads(data)
+                self._cached_seq = seq
+            except Exception:
+                pass
+            return self._cached
+        return self._cached
+
+    def close(self) -> None:
+        self._buf = None
+        try:
+            self.shm.close()
+            if self._owner:
+                self.shm.unlink()
+        except Exception:
+            pass
+
+
+class _RingPublisher:
+    # The child engine's UI: status goes to the ring, snapshots to the detail block.
+    def __init__(self, ring: StatusRing, detail: DetailBlock, store, game, logger: logging.Logger):
+        self.engine = None
+        self._ring = ring
+        self._detail = detail
+        self._store = store
+        self._game = game
+        self._logger = logger
+        self._last_status: dict | None = None
+        self._detail_warned = False
+
+    def on_status(self, status: dict) -> None:
+        self._last_status = status
+        self._ring.write(status, time.monotonic())
+        ok = self._detail.write({"usage": list(self._store.snapshot()), "game": self._game.snapshot_today()})
+        if not ok and not self._detail_warned:
+            self._detail_warned = True
+            self._logger.warning("Status detail exceeds STATUS_DETAIL_BYTES; GUI snapshots are stale")
+
+    def on_timer_changed(self) -> None:
+        # Push the new timer state now instead of at the next status interval.
+        if self._last_status is not None and self.engine is not None:
+            status = dict(self._last_status)
+            status.update(self.engine.timer_state())
+            self._last_status = status
+            self._ring.write(status, time.monotonic())
+
+
+def _serve_commands(engine, conn, logger: logging.Logger, profiler=None) -> None:
+    handlers = {
+        "set_targets": engine.set_targets_text,
+        "set_daily_limit": engine.set_daily_limit_text,
+        "set_rules": engine.set_rules,
+        "set_enabled": engine.set_enabled,
+        "start": engine.start_strict_timer,
+        "stop": engine.stop_strict_timer,
+        "pause": engine.toggle_pause_strict_timer,
+    }
+    if profiler is not None:
+        handlers["profile"] = lambda: profiler.start()
+    while True:
+        try:
+            msg = conn.recv()
+        except (EOFError, OSError):
+            # GUI went away without saying goodbye.
+            logger.info("Monitor pipe closed, stopping")
+            break
+        name, args = msg[0], msg[1:]
+        if name == "quit":
+            break
+        fn = handlers.get(name)
+        if fn is None:
+            logger.warning(f"Unknown monitor command {name!r}")
+            continue
+        try:
+            fn(*args)
+        except Exception:
+            logger.exception(f"Monitor command {name} failed")
+    # Only wakes the loop: child_main's thread ends the session and saves
+    # (engine.shutdown) before the process exits.
+    engine.stop()
+
+
+def child_main(ring_name: str, detail_name: str, conn) -> None:
+    # Imported here so the GUI process never loads the engine stack twice.
+    from .logging_setup import setup_logger
+    from .usage_store import UsageStore
+    from .game_db import GameDB
+    from .archive import GameArchive
+    from .audio import LoopingTone
+    from .process_monitor import TargetMatcher
+    from .engine import FocusEngine
+    from .rules import load_rules
+    from .profiler import SamplingProfiler
+
+    logger = setup_logger(path=MONITOR_LOG_FILE)
+    logger.info(f"Monitor process start pid={os.getpid()}")
+
+    ring = StatusRing.attach(ring_name)
+    detail = DetailBlock.attach(detail_name)
+    ring.set_writer_pid(os.getpid())
+
+    store = UsageStore(DATA_FILE)
+    store.load()
+    game = GameDB(GAME_FILE, logger)
+    game.set_archive(GameArchive(ARCHIVE_DIR))
+    game.load()
+
+    publisher = _RingPublisher(ring, detail, store, game, logger)
+    engine = FocusEngine(
+        store=store,
+        game=game,
+        matcher=TargetMatcher(),
+        tone=LoopingTone(TONE_FILE),
+        logger=logger,
+        ui=publisher,
+    )
+    publisher.engine = engine
+    if TRACE_FILE:
+        from .trace import TraceRecorder
+        engine.set_recorder(TraceRecorder(TRACE_FILE))
+    if SYNC_DIR:
+        from .sync import SyncJournal, device_id
+        engine.sync = SyncJournal(SYNC_DIR, device_id(SYNC_DEVICE_FILE), store, game, logger)
+    engine.set_rules(load_rules(RULES_FILE, logger))
+
+    # This process runs the monitor loop, so profiles (IPC or the tray's
+    # "Capture profile") and metrics (engine.metrics) are taken here.
+    profiler = SamplingProfiler(logger)
+    ipc = None
+    if IPC_PORT > 0:
+        from .ipc import ControlServer
+        ipc = ControlServer(engine, logger, IPC_PORT, profiler=profiler)
+        ipc.start()
+
+    threading.Thread(target=_serve_commands, args=(engine, conn, logger, profiler), name="FocusGuardianCommands", daemon=True).start()
+    try:
+        # Returns after engine.shutdown(), so the quit session is saved
+        # before the ring closes and the process exits.
+        engine.run()
+    finally:
+        if ipc is not None:
+            ipc.stop()
+        ring.close()
+        detail.close()
+        logger.info("Monitor process exit")
+
+
+class _UsageView:
+    def __init__(self, detail: DetailBlock):
+        self._detail = detail
+
+    def snapshot(self) -> tuple[str, dict[str, float]]:
+        usage = self._detail.read().get("usage")
+        if not usage:
+            return "", {}
+        return str(usage[0]), dict(usage[1])
+
+
+class _GameView:
+    def __init__(self, detail: DetailBlock, logger: logging.Logger):
+        from .game_db import GameDB
+
+        self._detail = detail
+        # Scoring only reads config constants; this instance never touches disk.
+        self._scoring = GameDB("", logger)
+
+    def snapshot_today(self) -> dict:
+        return self._detail.read().get("game") or {"day": {}, "lifetime": {}, "active": None}
+
+    def _compute_points(self, s: dict) -> tuple[int, str]:
+        return self._scoring._compute_points(s)
+
+
+_DEFAULT_TIMER_STATE = {
+    "strict_active": False,
+    "strict_paused": False,
+    "strict_remaining_sec": 0.0,
+    "strict_planned_sec": 0.0,
+    "strict_pause_count": 0,
+    "strict_max_pauses": STRICT_MAX_PAUSES,
+    "break_active": False,
+    "break_paused": False,
+    "break_remaining_sec": 0.0,
+    "break_planned_sec": 0.0,
+    "pomodoro": False,
+}
+
+
+# Countdowns change every frame; only these mark a timer transition.
+_TIMER_TRANSITION_FIELDS = ("strict_active", "strict_paused", "strict_pause_count", "break_active", "break_paused", "pomodoro")
+
+
+class MonitorProcess:
+    # GUI-side stand-in for FocusEngine. Setters and timer commands go down the
+    # pipe; run() is a reader loop that turns new ring frames into on_status /
+    # on_timer_changed calls, so a stalled Tk loop never delays a tick.
+    def __init__(self, logger: logging.Logger, ui):
+        self.logger = logger
+        self._ui = ui
+        self.ring = StatusRing.create()
+        self.detail = DetailBlock.create()
+        self.usage_view = _UsageView(self.detail)
+        self.game_view = _GameView(self.detail, logger)
+
+        ctx = multiprocessing.get_context("spawn")
+        self._conn, child_conn = ctx.Pipe()
+        self._proc = ctx.Process(
+            target=child_main,
+            args=(self.ring.name, self.detail.name, child_conn),
+            name="FocusGuardianMonitor",
+            daemon=True,
+        )
+        self._proc.start()
+        child_conn.close()
+        self.logger.info(f"Monitor process started pid={self._proc.pid}")
+
+        self._send_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._status: dict | None = None
+        self._timer_key = None
+
+    def _send(self, *msg) -> None:
+        with self._send_lock:
+            try:
+                self._conn.send(msg)
+            except (OSError, ValueError):
+                pass
+
+    def set_targets_text(self, text: str) -> None:
+        self._send("set_targets", text or "")
+
+    def set_daily_limit_text(self, text: str) -> None:
+        self._send("set_daily_limit", text)
+
+    def set_rules(self, rules: dict) -> None:
+        self._send("set_rules", rules or {})
+
+    def set_enabled(self, enabled: bool) -> None:
+        self._send("set_enabled", bool(enabled))
+
+    def start_strict_timer(self, mins: float, break_mins: float, pomodoro: bool) -> bool:
+        if mins <= 0:
+            return False
+        self._send("start", float(mins), float(break_mins), bool(pomodoro))
+        return True
+
+    def stop_strict_timer(self) -> None:
+        self._send("stop")
+
+    def toggle_pause_strict_timer(self) -> None:
+        self._send("pause")
+
+    def start_profile(self) -> bool:
+        # Profiles the child, where the monitor loop runs.
+        self._send("profile")
+        return True
+
+    def is_enabled(self) -> bool:
+        status = self._status
+        return True if status is None else status["enabled"]
+
+    def timer_state(self) -> dict:
+        status = self._status
+        if status is None:
+            return dict(_DEFAULT_TIMER_STATE)
+        return {k: status[k] for k in _DEFAULT_TIMER_STATE}
+
+    def is_stopped(self) -> bool:
+        return self._stop_event.is_set()
+
+    def run(self) -> None:
+        last_frame = 0
+        while not self._stop_event.is_set():
+            frame = self.ring.latest_frame()
+            if frame != last_frame:
+                status = self.ring.read()
+                if status is not None:
+                    last_frame = status["frame"]
+                    self._status = status
+                    timer_key = tuple(status[k] for k in _TIMER_TRANSITION_FIELDS)
+                    if timer_key != self._timer_key:
+                        self._timer_key = timer_key
+                        self._ui.on_timer_changed()
+                    self._ui.on_status(status)
+            elif not self._proc.is_alive():
+                self.logger.error(f"Monitor process exited code={self._proc.exitcode}")
+                break
+            self._stop_event.wait(UI_UPDATE_MIN_INTERVAL_SEC / 2)
+
+    def quit(self) -> None:
+        self._stop_event.set()
+        self._send("quit")
+        self._proc.join(timeout=10.0)
+        if self._proc.is_alive():
+            self.logger.warning("Monitor process did not exit, terminating")
+            self._proc.terminate()
+        self._conn.close()
+        self.ring.close()
+        self.detail.close()
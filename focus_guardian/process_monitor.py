@@ -1,17 +1,132 @@
+import sys
 import ctypes
+import threading
+from ctypes import wintypes
+
 import psutil
 
 
-user32 = ctypes.windll.user32
+# None off Windows, where only the injectable/fake sources are usable.
+user32 = ctypes.windll.user32 if sys.platform == "win32" else None
 
+EVENT_OBJECT_NAMECHANGE = 0x800C
+WINEVENT_OUTOFCONTEXT = 0x0000
+OBJID_WINDOW = 0
 
-def get_foreground_pid() -> int | None:
+_WinEventProc = getattr(ctypes, "WINFUNCTYPE", ctypes.CFUNCTYPE)(
+    None,
+    wintypes.HANDLE,
+    wintypes.DWORD,
+    wintypes.HWND,
+    wintypes.LONG,
+    wintypes.LONG,
+    wintypes.DWORD,
+    wintypes.DWORD,
+)
+
+
+def get_foreground_window() -> tuple[int, int | None]:
+    if user32 is None:
+        return 0, None
     hwnd = user32.GetForegroundWindow()
     if not hwnd:
-        return None
+        return 0, None
     pid = ctypes.c_ulong(0)
     user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
-    return pid.value or None
+    return hwnd, (pid.value or None)
+
+
+def get_foreground_pid() -> int | None:
+    return get_foreground_window()[1]
+
+
+def get_window_title(hwnd: int) -> str:
+    n = user32.GetWindowTextLengthW(hwnd)
+    if n <= 0:
+        return ""
+    buf = ctypes.create_unicode_buffer(n + 1)
+    user32.GetWindowTextW(hwnd, buf, n + 1)
+    return buf.value
+
+
+class WindowTitleCache:
+    # hwnd -> title. An entry is re-read when a name-change event marks the
+    # window dirty. Without the event hook, the focused window is re-read on
+    # every focus switch and every fallback_refresh_sec while it stays focused.
+    MAX_ENTRIES = 256
+
+    def __init__(self, fetch=get_window_title, fallback_refresh_sec: float = 1.0):
+        self._fetch = fetch
+        self._fallback_refresh_sec = fallback_refresh_sec
+        self._titles: dict[int, str] = {}
+        self._dirty: set[int] = set()
+        self._hooked = False
+        self._last_hwnd = 0
+        self._next_refresh = 0.0
+
+    def mark_changed(self, hwnd: int) -> None:
+        if hwnd in self._titles:
+            self._dirty.add(hwnd)
+
+    def title(self, hwnd: int, now: float) -> str:
+        if not hwnd:
+            return ""
+        stale = hwnd in self._dirty or (
+            not self._hooked and (hwnd != self._last_hwnd or now >= self._next_refresh)
+        )
+        title = None if stale else self._titles.get(hwnd)
+        if title is None:
+            self._dirty.discard(hwnd)
+            try:
+                title = self._fetch(hwnd)
+            except Exception:
+                title = ""
+            if len(self._titles) >= self.MAX_ENTRIES:
+                self._titles = {}
+            self._titles[hwnd] = title
+            self._next_refresh = now + self._fallback_refresh_sec
+        self._last_hwnd = hwnd
+        return title
+
+    def start_hook(self) -> bool:
+        # SetWinEventHook (out of context) delivers to the installing thread's
+        # message loop, so the hook lives on its own thread.
+        if self._hooked:
+            return True
+        if user32 is None:
+            return False
+        ready = threading.Event()
+
+        def _callback(hook, event, hwnd, id_object, id_child, thread, ms):
+            if id_object == OBJID_WINDOW and id_child == 0 and hwnd:
+                self.mark_changed(hwnd)
+
+        def _run():
+            proc = _WinEventProc(_callback)
+            hook = user32.SetWinEventHook(
+                EVENT_OBJECT_NAMECHANGE, EVENT_OBJECT_NAMECHANGE, 0, proc, 0, 0, WINEVENT_OUTOFCONTEXT
+            )
+            self._hooked = bool(hook)
+            ready.set()
+            if not hook:
+                return
+            msg = wintypes.MSG()
+            while user32.GetMessageW(ctypes.byref(msg), 0, 0, 0) > 0:
+                user32.TranslateMessage(ctypes.byref(msg))
+                user32.DispatchMessageW(ctypes.byref(msg))
+
+        threading.Thread(target=_run, name="FocusGuardianTitleHook", daemon=True).start()
+        ready.wait(2.0)
+        return self._hooked
+
+
+class FakeTitleSource:
+    # Stand-in for get_window_title off Windows and in replays.
+    def __init__(self):
+        self.titles: dict[int, str] = {}
+
+    def __call__(self, hwnd: int) -> str:
+        return self.titles.get(hwnd, "")
 
 
 def safe_process_name(pid: int | None) -> str | None:
@@ -25,37 +140,140 @@ def safe_process_name(pid: int | None) -> str | None:
         return None
 
 
+def process_create_time(pid: int) -> float | None:
+    try:
+        return psutil.Process(pid).create_time()
+    except Exception:
+        return None
+
+
+def pattern_matches(pat: str, pn: str) -> bool:
+    # pat and pn are lower-case. "*" globs, names with a dot match exactly,
+    # anything else is a substring match.
+    if "*" in pat:
+        parts = [p for p in pat.split("*") if p]
+        if not parts:
+            return False
+        idx = 0
+        for part in parts:
+            found = pn.find(part, idx)
+            if found < 0:
+                return False
+            idx = found + len(part)
+        return True
+    if "." in pat:
+        return pn == pat
+    return pat in pn
+
+
+def parse_patterns(text: str) -> list[str]:
+    tokens = [t.strip() for t in (text or "").split(",")]
+    return [t.lower() for t in tokens if t.strip()]
+
+
 class TargetMatcher:
     def __init__(self):
         self._patterns: list[str] = []
 
     def set_from_text(self, text: str) -> None:
-        tokens = [t.strip() for t in (text or "").split(",")]
-        self._patterns = [t.lower() for t in tokens if t.strip()]
+        self._patterns = parse_patterns(text)
 
     def match_key(self, proc_name: str | None) -> str | None:
         if not proc_name:
             return None
         pn = proc_name.lower()
         for pat in self._patterns:
-            if "*" in pat:
-                parts = [p for p in pat.split("*") if p]
-                if not parts:
-                    continue
-                idx = 0
-                ok = True
-                for part in parts:
-                    found = pn.find(part, idx)
-                    if found < 0:
-                        ok = False
-                        break
-                    idx = found + len(part)
-                if ok:
-                    return pn
-            elif "." in pat:
-                if pn == pat:
-                    return pn
-            else:
-                if pat in pn:
-                    return pn
+            if pattern_matches(pat, pn):
+                return pn
         return None
+
+
+class ProcessTree:
+    # pid -> (ppid, name, create_time), rebuilt from one process_iter pass
+    # every refresh_sec and patched per pid on a miss in between. A pid can
+    # be reused before the next refresh, so name() checks the focused pid's
+    # create_time and attributions are keyed by (pid, create_time).
+    def __init__(self, refresh_sec: float = 30.0, max_depth: int = 8, create_time=process_create_time):
+        self._refresh_sec = refresh_sec
+        self._max_depth = max_depth
+        self._create_time = create_time
+        self._procs: dict[int, tuple[int, str, float]] = {}
+        self._attr_cache: dict[tuple[int, float], tuple[str, object] | None] = {}
+        self._next_refresh = 0.0
+
+    def maybe_refresh(self, now: float) -> bool:
+        if now < self._next_refresh:
+            return False
+        self._next_refresh = now + self._refresh_sec
+        self.refresh()
+        return True
+
+    def refresh(self) -> None:
+        procs: dict[int, tuple[int, str, float]] = {}
+        for p in psutil.process_iter(["pid", "ppid", "name", "create_time"]):
+            info = p.info
+            procs[info["pid"]] = (info.get("ppid") or 0, info.get("name") or "", info.get("create_time") or 0.0)
+        self._procs = procs
+        self._attr_cache = {}
+
+    def load(self, procs: dict[int, tuple[int, str, float]], now: float) -> None:
+        # Fed by the background sweep so both share one process_iter pass.
+        self._procs = procs
+        self._attr_cache = {}
+        self._next_refresh = now + self._refresh_sec
+
+    def _entry(self, pid: int) -> tuple[int, str, float] | None:
+        entry = self._procs.get(pid)
+        if entry is not None:
+            return entry
+        try:
+            p = psutil.Process(pid)
+            with p.oneshot():
+                entry = (p.ppid(), p.name(), p.create_time())
+        except Exception:
+            return None
+        self._procs[pid] = entry
+        return entry
+
+    def name(self, pid: int | None) -> str | None:
+        if not pid:
+            return None
+        entry = self._procs.get(pid)
+        if entry is not None and self._create_time(pid) not in (None, entry[2]):
+            # Reused pid: the cached name belongs to a process that exited.
+            del self._procs[pid]
+        entry = self._entry(pid)
+        return entry[1] if entry is not None and entry[1] else None
+
+    def attribute(self, pid: int, decide) -> tuple[str, object] | None:
+        # Nearest ancestor whose name gets a non-None decision, as (name, decision).
+        # Call name(pid) first in the same tick so a reused pid is noticed.
+        entry = self._entry(pid)
+        if entry is None:
+            return None
+        key = (pid, entry[2])
+        try:
+            return self._attr_cache[key]
+        except KeyError:
+            pass
+        result = None
+        depth = 0
+        while entry is not None and depth < self._max_depth:
+            ppid = entry[0]
+            if not ppid or ppid == pid:
+                break
+            parent = self._entry(ppid)
+            # A parent younger than its child means the ppid was reused.
+            if parent is None or parent[2] > entry[2]:
+                break
+            d = decide(parent[1])
+            if d is not None:
+                result = (parent[1], d)
+                break
+            pid, entry = ppid, parent
+            depth += 1
+        self._attr_cache[key] = result
+        return result
+
+    def invalidate(self) -> None:
+        self._attr_cache = {}
@@ -0,0 +1,91 @@
+import os
+import sys
+import glob
+import time
+import threading
+import datetime
+import logging
+
+from .config import LOG_DIR, PROFILE_DURATION_SEC, PROFILE_INTERVAL_SEC, PROFILE_KEEP
+from .utils import ensure_dir
+
+
+class SamplingProfiler:
+    # Nothing is hooked while idle; a capture is a short-lived thread that
+    # samples every other thread's stack and writes collapsed stacks to LOG_DIR.
+    def __init__(self, logger: logging.Logger, out_dir: str = LOG_DIR, keep: int = PROFILE_KEEP):
+        self._logger = logger
+        self._out_dir = out_dir
+        self._keep = max(1, int(keep))
+        self._lock = threading.Lock()
+        self._thread = None
+        self._written = 0
+
+    def is_running(self) -> bool:
+        with self._lock:
+            return self._thread is not None and self._thread.is_alive()
+
+    def start(self, duration_sec: float = PROFILE_DURATION_SEC) -> bool:
+        duration_sec = max(0.5, min(float(duration_sec), 300.0))
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            self._thread = threading.Thread(
+                target=self._run,
+                args=(duration_sec,),
+                name="FocusGuardianProfiler",
+                daemon=True,
+            )
+            self._thread.start()
+        self._logger.info(f"Profiling started duration={duration_sec:.1f}s")
+        return True
+
+    def _run(self, duration_sec: float) -> None:
+        me = threading.get_ident()
+        counts: dict[str, int] = {}
+        samples = 0
+        deadline = time.monotonic() + duration_sec
+
+        while time.monotonic() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                key = ";".join(reversed(stack))
+                counts[key] = counts.get(key, 0) + 1
+            samples += 1
+            time.sleep(PROFILE_INTERVAL_SEC)
+
+        path = self._write(counts)
+        self._logger.info(f"Profiling finished samples={samples} file={path}")
+
+    def _write(self, counts: dict[str, int]) -> str | None:
+        ensure_dir(self._out_dir)
+        # Milliseconds, pid and a counter: the GUI and the monitor child share
+        # LOG_DIR and may both finish a capture within the same second.
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S-%f")[:-3]
+        self._written += 1
+        path = os.path.join(self._out_dir, f"profile-{stamp}-{os.getpid()}-{self._written}.collapsed")
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                for key, n in sorted(counts.items(), key=lambda kv: kv[1], reverse=True):
+                    f.write(f"{key} {n}\n")
+        except Exception:
+            self._logger.exception("Profile write failed")
+            return None
+        self._rotate()
+        return path
+
+    def _rotate(self) -> None:
+        files = sorted(glob.glob(os.path.join(self._out_dir, "profile-*.collapsed")))
+        for old in files[:-self._keep]:
+            try:
+                os.remove(old)
+            except Exception:
+                pass
@@ -0,0 +1,300 @@
+import os
+import json
+import math
+import logging
+
+from .utils import NS_PER_SEC, sec_to_ns, ns_to_sec, seconds_to_mmss
+from .process_monitor import TargetMatcher, pattern_matches, parse_patterns
+
+
+# rules.json layout (every section optional):
+# {
+#   "apps":   {"chrome.exe": {"limit_min": 30}},
+#   "groups": {"games": {"patterns": ["steam*", "*game*"], "limit_min": 60}},
+#   "allow":  ["code.exe"]
+# }
+# Apps and group members are targets on top of the comma-separated target
+# list; allow patterns win over everything else. Any pattern written as
+# "title:<text>" (target list, apps, group patterns, allow) matches the
+# foreground window title instead of the process name and is charged under
+# the key "title:<text>".
+
+
+def load_rules(path: str, logger: logging.Logger | None = None) -> dict:
+    if not path or not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except Exception:
+        if logger is not None:
+            logger.exception("Rules load failed, ignoring rules file")
+        return {}
+
+
+def _limit_ns(minutes) -> int | None:
+    try:
+        mins = float(minutes)
+    except (TypeError, ValueError):
+        return None
+    if mins <= 0:
+        return None
+    return int(mins * 60 * NS_PER_SEC)
+
+
+def _patterns(value) -> list[str]:
+    if isinstance(value, str):
+        return parse_patterns(value)
+    return [str(p).strip().lower() for p in (value or []) if str(p).strip()]
+
+
+def _is_patterns(value) -> bool:
+    return value is None or isinstance(value, (str, list))
+
+
+def _clean_rules(rules, logger: logging.Logger) -> dict:
+    # Drops malformed entries with a warning; one typo in rules.json must not
+    # take enforcement down with it.
+    if not isinstance(rules, dict):
+        if rules:
+            logger.warning("Rules ignored: expected an object")
+        return {}
+    out = dict(rules)
+    if not _is_patterns(out.get("allow")):
+        logger.warning("Rules: ignoring \"allow\", expected a list or a string")
+        out.pop("allow")
+    for section in ("apps", "groups"):
+        entries = out.get(section)
+        if entries is None:
+            continue
+        if not isinstance(entries, dict):
+            logger.warning(f"Rules: ignoring \"{section}\", expected an object")
+            out.pop(section)
+            continue
+        kept = {}
+        for name, cfg in entries.items():
+            cfg = {} if cfg is None else cfg
+            if not isinstance(cfg, dict):
+                logger.warning(f"Rules: ignoring {section} entry {name!r}, expected an object like {{\"limit_min\": 30}}")
+                continue
+            lim = cfg.get("limit_min")
+            # 0 or a negative number means "no limit" on purpose.
+            if lim is not None and not isinstance(lim, (int, float)) and _limit_ns(lim) is None:
+                logger.warning(f"Rules: {section} entry {name!r} has a bad limit_min {lim!r}; no limit")
+            if section == "groups" and not _is_patterns(cfg.get("patterns")):
+                logger.warning(f"Rules: ignoring group {name!r}, patterns must be a list or a string")
+                continue
+            kept[name] = cfg
+        out[section] = kept
+    return out
+
+
+TITLE_PREFIX = "title:"
+_ALLOWED = object()
+
+
+def _split_titles(patterns: list[str]) -> tuple[list[str], list[str]]:
+    names = [p for p in patterns if not p.startswith(TITLE_PREFIX)]
+    titles = [p[len(TITLE_PREFIX):].strip() for p in patterns if p.startswith(TITLE_PREFIX)]
+    return names, [t for t in titles if t]
+
+
+def title_matches(pat: str, title: str) -> bool:
+    # Titles are free text, so a dot doesn't force an exact match here.
+    if "*" in pat:
+        return pattern_matches(pat, title)
+    return pat in title
+
+
+class Decision:
+    __slots__ = ("key", "limit_ns", "group", "group_limit_ns")
+
+    def __init__(self, key: str, limit_ns: int | None, group: str | None, group_limit_ns: int | None):
+        self.key = key
+        self.limit_ns = limit_ns
+        self.group = group
+        self.group_limit_ns = group_limit_ns
+
+
+class RuleTable:
+    # Rules are evaluated once per distinct process name (and per distinct
+    # window title when title rules exist); after that the per-tick decision
+    # is a dict lookup on the raw string.
+    MAX_CACHE = 4096
+
+    def __init__(self, matcher: TargetMatcher, logger: logging.Logger | None = None):
+        self._matcher = matcher
+        self._logger = logger or logging.getLogger("FocusGuardian")
+        self._allow: list[str] = []
+        self._apps: list[tuple[str, int | None]] = []
+        self._groups: list[tuple[str, list[str], int | None]] = []
+        self._default_limit_ns: int | None = None
+        self._cache: dict[str, Decision | None | object] = {}
+
+        self._base_titles: list[str] = []
+        self._allow_titles: list[str] = []
+        # (pattern, limit_ns, group, group_limit_ns) in match order
+        self._title_rules: list[tuple[str, int | None, str | None, int | None]] = []
+        self._title_groups: dict[str, str] = {}
+        self._title_cache: dict[str, Decision | None] = {}
+        self._rules: dict = {}
+
+    def set_targets_text(self, text: str) -> None:
+        names, titles = _split_titles(parse_patterns(text))
+        self._matcher.set_from_text(", ".join(names))
+        self._base_titles = titles
+        self._title_rules, self._title_groups = self._compile_titles(self._rules, titles, self._default_limit_ns)
+        self._title_cache = {}
+        self._cache = {}
+
+    def compile(self, rules: dict, default_limit_sec: float) -> None:
+        # Everything is built before anything is swapped in, so a failure
+        # leaves the previous table in force.
+        rules = _clean_rules(rules, self._logger)
+        allow, allow_titles = _split_titles(_patterns(rules.get("allow")))
+        apps = [
+            (str(pat).lower(), _limit_ns(cfg.get("limit_min")))
+            for pat, cfg in (rules.get("apps") or {}).items()
+            if not str(pat).lower().startswith(TITLE_PREFIX)
+        ]
+        groups = [
+            (str(name), _split_titles(_patterns(cfg.get("patterns")))[0], _limit_ns(cfg.get("limit_min")))
+            for name, cfg in (rules.get("groups") or {}).items()
+        ]
+        default_limit_ns = sec_to_ns(default_limit_sec) if math.isfinite(default_limit_sec) else None
+        title_rules, title_groups = self._compile_titles(rules, self._base_titles, default_limit_ns)
+
+        self._rules = rules
+        self._allow, self._allow_titles = allow, allow_titles
+        self._apps = apps
+        self._groups = groups
+        self._default_limit_ns = default_limit_ns
+        self._title_rules, self._title_groups = title_rules, title_groups
+        self._title_cache = {}
+        self._cache = {}
+
+    @staticmethod
+    def _compile_titles(rules: dict, base_titles: list[str], default_limit_ns: int | None) -> tuple[list, dict]:
+        title_groups: dict[str, tuple[str, int | None]] = {}
+        for name, cfg in (rules.get("groups") or {}).items():
+            for pat in _split_titles(_patterns(cfg.get("patterns")))[1]:
+                title_groups.setdefault(pat, (str(name), _limit_ns(cfg.get("limit_min"))))
+
+        ordered: list[tuple[str, int | None]] = []
+        for pat, cfg in (rules.get("apps") or {}).items():
+            pat = str(pat).lower()
+            if pat.startswith(TITLE_PREFIX):
+                ordered.append((pat[len(TITLE_PREFIX):], _limit_ns(cfg.get("limit_min"))))
+        ordered += [(pat, None) for pat in title_groups]
+        ordered += [(pat, None) for pat in base_titles]
+
+        compiled = []
+        seen = set()
+        for pat, lim in ordered:
+            if not pat or pat in seen:
+                continue
+            seen.add(pat)
+            group, group_lim = title_groups.get(pat, (None, None))
+            compiled.append((pat, lim if lim is not None else default_limit_ns, group, group_lim))
+        return compiled, {TITLE_PREFIX + pat: g for pat, _, g, _ in compiled if g is not None}
+
+    def has_title_rules(self) -> bool:
+        return bool(self._title_rules)
+
+    def has_limits(self) -> bool:
+        if self._default_limit_ns is not None:
+            return True
+        return (
+            any(l is not None for _, l in self._apps)
+            or any(l is not None for _, _, l in self._groups)
+            or any(l is not None for _, l, _, _ in self._title_rules)
+        )
+
+    def decide(self, proc_name: str | None, title: str | None = None) -> Decision | None:
+        if not proc_name:
+            return None
+        try:
+            d = self._cache[proc_name]
+        except KeyError:
+            if len(self._cache) >= self.MAX_CACHE:
+                self._cache = {}
+            d = self._decide_uncached(proc_name.lower())
+            self._cache[proc_name] = d
+        if d is _ALLOWED:
+            return None
+        if d is None and title and self._title_rules:
+            return self._decide_title(title)
+        return d
+
+    def _decide_title(self, title: str) -> Decision | None:
+        try:
+            return self._title_cache[title]
+        except KeyError:
+            pass
+        if len(self._title_cache) >= self.MAX_CACHE:
+            self._title_cache = {}
+        tl = title.lower()
+        d = None
+        if not any(title_matches(p, tl) for p in self._allow_titles):
+            for pat, lim, group, group_lim in self._title_rules:
+                if title_matches(pat, tl):
+                    d = Decision(TITLE_PREFIX + pat, lim, group, group_lim)
+                    break
+        self._title_cache[title] = d
+        return d
+
+    def group_of(self, key: str) -> str | None:
+        if key.startswith(TITLE_PREFIX):
+            return self._title_groups.get(key)
+        d = self.decide(key)
+        return d.group if d is not None else None
+
+    def _decide_uncached(self, pn: str) -> Decision | None | object:
+        for pat in self._allow:
+            if pattern_matches(pat, pn):
+                return _ALLOWED
+
+        app_hit = False
+        limit_ns = self._default_limit_ns
+        for pat, lim in self._apps:
+            if pattern_matches(pat, pn):
+                app_hit = True
+                if lim is not None:
+                    limit_ns = lim
+                break
+
+        group = None
+        group_limit_ns = None
+        for name, pats, lim in self._groups:
+            if any(pattern_matches(p, pn) for p in pats):
+                group = name
+                group_limit_ns = lim
+                break
+
+        if not app_hit and group is None and self._matcher.match_key(pn) is None:
+            return None
+        return Decision(pn, limit_ns, group, group_limit_ns)
+
+    @staticmethod
+    def allowance(d: Decision, store) -> tuple[int | None, int, int | None, str]:
+        # -> (remaining_ns, used_ns, limit_ns, bucket) for the tighter bucket.
+        best = (None, store.get_ns(d.key), None, d.key)
+        if d.limit_ns is not None:
+            used = best[1]
+            best = (d.limit_ns - used, used, d.limit_ns, d.key)
+        if d.group is not None and d.group_limit_ns is not None:
+            used = store.get_group_ns(d.group)
+            rem = d.group_limit_ns - used
+            if best[0] is None or rem < best[0]:
+                best = (rem, used, d.group_limit_ns, f"group {d.group}")
+        return best
+
+
+def describe_allowance(remaining_ns: int | None, used_ns: int, limit_ns: int | None, bucket: str) -> tuple[bool, str]:
+    if remaining_ns is None:
+        return False, "Daily limit: none for this app"
+    used = seconds_to_mmss(ns_to_sec(used_ns))
+    if remaining_ns <= 0:
+        return True, f"Daily limit: REACHED ({used}, {bucket})"
+    return False, f"Daily limit: {used} / {seconds_to_mmss(ns_to_sec(limit_ns))} ({bucket})"
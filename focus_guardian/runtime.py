@@ -0,0 +1,302 @@
+import json
+import queue
+import asyncio
+import logging
+import threading
+from time import perf_counter_ns
+from concurrent.futures import ThreadPoolExecutor
+
+from .config import (
+    IPC_HOST,
+    SAVE_EVERY_SEC,
+    UI_UPDATE_MIN_INTERVAL_SEC,
+    ASYNC_IO_WORKERS,
+    ASYNC_CHIME_QUEUE,
+)
+from .audio import play_chime_blocking
+from .ipc import ControlServer
+
+
+_MISSING = object()
+
+
+class _LoopWake:
+    # Stands in for the engine's threading.Event so commands posted from any
+    # thread wake the tick task.
+    def __init__(self, loop: asyncio.AbstractEventLoop, event: asyncio.Event):
+        self._loop = loop
+        self._event = event
+
+    def set(self) -> None:
+        try:
+            self._loop.call_soon_threadsafe(self._event.set)
+        except RuntimeError:
+            pass  # loop already closed
+
+    def clear(self) -> None:
+        pass
+
+
+class AsyncRuntime:
+    # One event loop coordinates ticks, saves, chimes, the background sweep and
+    # IPC clients as tasks. Ticks run on a dedicated single worker so engine
+    # handlers keep one "monitor thread"; file I/O, psutil sweeps, status
+    # snapshots and sound playback go through a bounded I/O pool. stop() is
+    # thread-safe and cancels everything, then engine.shutdown() saves on the
+    # monitor worker.
+    def __init__(
+        self,
+        engine,
+        logger: logging.Logger,
+        ipc_port: int = 0,
+        profiler=None,
+        io_workers: int = ASYNC_IO_WORKERS,
+    ):
+        self.engine = engine
+        self.logger = logger
+        self._ipc_port = int(ipc_port or 0)
+        self._control = ControlServer(engine, logger, self._ipc_port, profiler=profiler) if self._ipc_port > 0 else None
+        self._io_workers = max(1, int(io_workers))
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._main_task: asyncio.Task | None = None
+        self._thread: threading.Thread | None = None
+        self._stopping = threading.Event()
+        self._clients: set[asyncio.Task] = set()
+        self.ipc_address = None
+
+    # Entry points
+    def run(self) -> None:
+        asyncio.run(self.main())
+
+    def start_in_thread(self) -> threading.Thread:
+        self._thread = threading.Thread(target=self.run, name="FocusGuardianRuntime", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self) -> None:
+        self._stopping.set()
+        loop, task = self._loop, self._main_task
+        if loop is not None and task is not None:
+            try:
+                loop.call_soon_threadsafe(task.cancel)
+            except RuntimeError:
+                pass
+
+    def join(self, timeout: float | None = None) -> None:
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    async def main(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._loop = loop
+        self._main_task = asyncio.current_task()
+        self._tick_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="FocusGuardianMonitor")
+        self._io_pool = ThreadPoolExecutor(max_workers=self._io_workers, thread_name_prefix="FocusGuardianIO")
+
+        engine = self.engine
+        wake = asyncio.Event()
+        engine._wake = _LoopWake(loop, wake)
+        engine.autosave = False
+        self._chimes: asyncio.Queue = asyncio.Queue(maxsize=ASYNC_CHIME_QUEUE)
+        engine.chime = self._post_chime
+
+        tasks = [
+            asyncio.create_task(self._tick_loop(wake), name="tick"),
+            asyncio.create_task(self._save_loop(), name="save"),
+            asyncio.create_task(self._chime_loop(), name="chime"),
+        ]
+        if engine.sweep is not None:
+            tasks.append(asyncio.create_task(self._sweep_loop(), name="sweep"))
+        server = None
+        if self._control is not None:
+            server = await asyncio.start_server(self._serve_client, IPC_HOST, self._ipc_port)
+            self.ipc_address = server.sockets[0].getsockname()[:2]
+            self.logger.info(f"IPC listening on {self.ipc_address[0]}:{self.ipc_address[1]}")
+        self.logger.info("Async runtime started")
+
+        try:
+            if self._stopping.is_set():
+                return
+            await asyncio.gather(*tasks)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            for t in tasks + list(self._clients):
+                t.cancel()
+            await asyncio.gather(*tasks, *self._clients, return_exceptions=True)
+            if server is not None:
+                server.close()
+                await server.wait_closed()
+            # Cancelling a task doesn't stop its executor job, so let any
+            # in-flight save, sync or IPC command finish first.
+            self._io_pool.shutdown(wait=True)
+            # Saves and ends an active session on the monitor worker.
+            await loop.run_in_executor(self._tick_pool, engine.shutdown)
+            self._tick_pool.shutdown(wait=True)
+            self.logger.info("Async runtime stopped")
+
+    # Tasks
+    async def _tick_loop(self, wake: asyncio.Event) -> None:
+        loop = asyncio.get_running_loop()
+        engine = self.engine
+        while True:
+            try:
+                await loop.run_in_executor(self._tick_pool, engine.tick)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.logger.exception("Tick failed")
+            interval = engine.poll_interval()
+            m = engine.metrics
+            t0 = perf_counter_ns()
+            try:
+                await asyncio.wait_for(wake.wait(), interval)
+                wake.clear()
+            except asyncio.TimeoutError:
+                if m is not None:
+                    m.observe("jitter", abs(perf_counter_ns() - t0 - int(interval * 1e9)))
+
+    async def _save_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(SAVE_EVERY_SEC)
+            try:
+                await loop.run_in_executor(self._io_pool, self.engine.save)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.logger.exception("Save failed")
+
+    def _post_chime(self, name: str) -> None:
+        # Called by the engine on the monitor worker.
+        def _put():
+            try:
+                self._chimes.put_nowait(name)
+            except asyncio.QueueFull:
+                self.logger.info(f"Chime dropped ({name}), queue full")
+
+        try:
+            self._loop.call_soon_threadsafe(_put)
+        except RuntimeError:
+            pass
+
+    async def _chime_loop(self) -> None:
+        # One sound at a time instead of a thread per sound.
+        loop = asyncio.get_running_loop()
+        while True:
+            name = await self._chimes.get()
+            try:
+                await loop.run_in_executor(self._io_pool, play_chime_blocking, name)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.logger.exception(f"Chime {name} failed")
+
+    async def _sweep_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        sweep = self.engine.sweep
+        while True:
+            try:
+                await loop.run_in_executor(self._io_pool, sweep.sweep)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.logger.exception("Background sweep failed")
+            await asyncio.sleep(sweep.interval_sec)
+
+    # IPC: same JSON-lines protocol as ipc.ControlServer, one task per client
+    async def _serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        self._clients.add(task)
+        loop = asyncio.get_running_loop()
+
+        async def send(obj: dict) -> None:
+            writer.write((json.dumps(obj) + "\n").encode("utf-8"))
+            await writer.drain()
+
+        try:
+            while True:
+                raw = await reader.readline()
+                if not raw:
+                    break
+                line = raw.decode("utf-8", errors="replace").strip()
+                if not line:
+                    continue
+                try:
+                    req = json.loads(line)
+                    if not isinstance(req, dict):
+                        raise ValueError("request must be an object")
+                except Exception as e:
+                    await send({"ok": False, "error": f"bad request: {e}"})
+                    continue
+
+                if req.get("cmd") == "subscribe":
+                    await self._stream(send)
+                    break
+                try:
+                    # Snapshots take store/game locks and reload_rules reads a file.
+                    resp = await loop.run_in_executor(self._io_pool, self._control.handle_command, req)
+                except Exception as e:
+                    self.logger.exception("IPC command failed")
+                    resp = {"ok": False, "error": str(e)}
+                await send(resp)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            pass  # shutdown; a re-raise here gets logged by asyncio's stream callback
+        finally:
+            self._clients.discard(task)
+            writer.close()
+
+    async def _stream(self, send) -> None:
+        # The hub only changes at the UI publish rate, so polling it is enough.
+        hub = self.engine.hub
+        seq, state = hub.snapshot()
+        await send({"seq": seq, "delta": state})
+        sent = dict(state)
+        while True:
+            await asyncio.sleep(UI_UPDATE_MIN_INTERVAL_SEC)
+            new_seq, state = hub.snapshot()
+            if new_seq == seq:
+                continue
+            seq = new_seq
+            delta = {k: v for k, v in state.items() if sent.get(k, _MISSING) != v}
+            if not delta:
+                continue
+            sent.update(delta)
+            await send({"seq": seq, "delta": delta})
+
+
+class TkBridge:
+    # Tk must only be touched from its own thread. Other threads post callables
+    # here; the Tk thread drains them from a periodic after() callback. Posts
+    # made before attach() wait for the window to exist.
+    def __init__(self, root=None, interval_ms: int = 50):
+        self._root = None
+        self._interval_ms = interval_ms
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        if root is not None:
+            self.attach(root)
+
+    def attach(self, root) -> None:
+        self._root = root
+        self._root.after(self._interval_ms, self._pump)
+
+    def post(self, fn) -> None:
+        self._queue.put(fn)
+
+    def _pump(self) -> None:
+        q = self._queue
+        while True:
+            try:
+                fn = q.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                fn()
+            except Exception:
+                pass
+        try:
+            self._root.after(self._interval_ms, self._pump)
+        except Exception:
+            pass  # root destroyed
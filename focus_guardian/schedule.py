@@ -0,0 +1,204 @@
+import time
+import bisect
+import logging
+import datetime
+
+from .process_monitor import pattern_matches
+
+
+# "schedule" section of rules.json, a list of windows:
+# {"name": "workday", "days": ["mon", "tue", "wed", "thu", "fri"],
+#  "start": "09:00", "end": "17:00", "block": ["games"]}
+# {"name": "weekend", "days": ["sat", "sun"], "unlimited": ["games"]}
+# {"name": "exams", "from": "2026-06-01", "to": "2026-06-21", "block_all": true}
+# "block"/"unlimited" entries are group names from "groups" or process
+# patterns. A window with end <= start runs past midnight. "days" defaults
+# to every day, start/end to the whole day. A window that doesn't parse is
+# skipped with a warning.
+
+DAY_NAMES = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+MIN_PER_DAY = 24 * 60
+MIN_PER_WEEK = 7 * MIN_PER_DAY
+
+
+def _parse_hhmm(text, default: int) -> int:
+    if text is None:
+        return default
+    h, _, m = str(text).partition(":")
+    try:
+        return max(0, min(MIN_PER_DAY, int(h) * 60 + int(m or 0)))
+    except ValueError:
+        raise ValueError(f"bad time {text!r}, expected HH:MM") from None
+
+
+def _parse_date(text) -> datetime.date | None:
+    if not text:
+        return None
+    try:
+        return datetime.date.fromisoformat(str(text))
+    except ValueError:
+        raise ValueError(f"bad date {text!r}, expected YYYY-MM-DD") from None
+
+
+def _parse_day(day) -> int:
+    try:
+        return DAY_NAMES.index(str(day).lower()[:3])
+    except ValueError:
+        raise ValueError(f"bad day {day!r}, expected one of {', '.join(DAY_NAMES)}") from None
+
+
+def _local_ts(d: datetime.datetime) -> float:
+    return time.mktime(d.timetuple())
+
+
+class Window:
+    __slots__ = ("name", "days", "start_min", "end_min", "date_from", "date_to", "block_all", "block", "unlimited")
+
+    def __init__(self, cfg: dict, index: int):
+        self.name = str(cfg.get("name") or f"window{index}")
+        days = cfg.get("days") or DAY_NAMES
+        if isinstance(days, str):
+            days = [days]
+        self.days = {_parse_day(d) for d in days}
+        self.start_min = _parse_hhmm(cfg.get("start"), 0)
+        self.end_min = _parse_hhmm(cfg.get("end"), MIN_PER_DAY)
+        self.date_from = _parse_date(cfg.get("from"))
+        self.date_to = _parse_date(cfg.get("to"))
+        self.block_all = bool(cfg.get("block_all"))
+        self.block = [str(x).lower() for x in (cfg.get("block") or [])]
+        self.unlimited = [str(x).lower() for x in (cfg.get("unlimited") or [])]
+
+    def weekly_intervals(self) -> list[tuple[int, int]]:
+        out = []
+        for day in self.days:
+            base = day * MIN_PER_DAY
+            if self.end_min > self.start_min:
+                out.append((base + self.start_min, base + self.end_min))
+            else:
+                # Overnight: split at midnight, the tail lands on the next day.
+                out.append((base + self.start_min, base + MIN_PER_DAY))
+                nxt = ((day + 1) % 7) * MIN_PER_DAY
+                out.append((nxt, nxt + self.end_min))
+        return out
+
+    def in_date_range(self, d: datetime.date) -> bool:
+        if self.date_from is not None and d < self.date_from:
+            return False
+        if self.date_to is not None and d > self.date_to:
+            return False
+        return True
+
+
+def _targets_hit(entries: list[str], key: str, group: str | None) -> bool:
+    for e in entries:
+        if group is not None and e == group.lower():
+            return True
+        if pattern_matches(e, key):
+            return True
+    return False
+
+
+class Schedule:
+    # Windows are flattened into minute-of-week intervals with one sorted
+    # boundary list; date ranges add their own sorted boundary timestamps.
+    # evaluate() returns the active set and when it can next change, so
+    # callers only look again at that edge.
+    def __init__(self, logger: logging.Logger | None = None):
+        self._logger = logger or logging.getLogger("FocusGuardian")
+        self._windows: list[Window] = []
+        self._intervals: list[tuple[int, int, int]] = []
+        self._week_bounds: list[int] = []
+        self._date_bounds: list[float] = []
+        self.active: list[Window] = []
+        self._effects: dict[str, str | None] = {}
+
+    def compile(self, entries) -> None:
+        if not isinstance(entries, list):
+            if entries:
+                self._logger.warning("Schedule ignored: expected a list of windows")
+            entries = []
+        windows = []
+        for i, cfg in enumerate(entries):
+            if not isinstance(cfg, dict):
+                self._logger.warning(f"Schedule: ignoring entry {i}, expected an object")
+                continue
+            try:
+                windows.append(Window(cfg, i))
+            except (TypeError, ValueError) as e:
+                self._logger.warning(f"Schedule: ignoring window {cfg.get('name') or i!r}: {e}")
+        intervals = []
+        bounds = set()
+        date_bounds = set()
+        for idx, w in enumerate(windows):
+            for start, end in w.weekly_intervals():
+                intervals.append((start, end, idx))
+                bounds.add(start)
+                bounds.add(end % MIN_PER_WEEK)
+            if w.date_from is not None:
+                date_bounds.add(_local_ts(datetime.datetime.combine(w.date_from, datetime.time())))
+            if w.date_to is not None:
+                nxt = w.date_to + datetime.timedelta(days=1)
+                date_bounds.add(_local_ts(datetime.datetime.combine(nxt, datetime.time())))
+        intervals.sort()
+        self._windows = windows
+        self._intervals = intervals
+        self._week_bounds = sorted(bounds)
+        self._date_bounds = sorted(date_bounds)
+        self.active = []
+        self._effects = {}
+
+    def is_empty(self) -> bool:
+        return not self._windows
+
+    def evaluate(self, wall_ts: float) -> float:
+        # Recomputes the active set; returns the wall timestamp of the next edge.
+        self._effects = {}
+        if not self._windows:
+            self.active = []
+            return float("inf")
+
+        local = datetime.datetime.fromtimestamp(wall_ts)
+        mow = local.weekday() * MIN_PER_DAY + local.hour * 60 + local.minute + local.second / 60.0
+        today = local.date()
+
+        active_idx = set()
+        for start, end, idx in self._intervals:
+            if start > mow:
+                break
+            if mow < end and self._windows[idx].in_date_range(today):
+                active_idx.add(idx)
+        self.active = [self._windows[i] for i in sorted(active_idx)]
+
+        next_ts = float("inf")
+        if self._week_bounds:
+            i = bisect.bisect_right(self._week_bounds, mow)
+            if i < len(self._week_bounds):
+                b = self._week_bounds[i]
+            else:
+                b = self._week_bounds[0] + MIN_PER_WEEK
+            week_start = datetime.datetime.combine(today - datetime.timedelta(days=local.weekday()), datetime.time())
+            next_ts = _local_ts(week_start + datetime.timedelta(minutes=b))
+        j = bisect.bisect_right(self._date_bounds, wall_ts)
+        if j < len(self._date_bounds):
+            next_ts = min(next_ts, self._date_bounds[j])
+        return next_ts
+
+    def effect_for(self, key: str, group: str | None) -> str | None:
+        # "block", "unlimited" or None for a matched target; cached until the
+        # next evaluate().
+        try:
+            return self._effects[key]
+        except KeyError:
+            pass
+        effect = None
+        for w in self.active:
+            if w.block_all or _targets_hit(w.block, key, group):
+                effect = "block"
+                break
+            if _targets_hit(w.unlimited, key, group):
+                effect = "unlimited"
+        self._effects[key] = effect
+        return effect
+
+    def active_names(self) -> list[str]:
+        return [w.name for w in self.active]
@@ -0,0 +1,69 @@
+import os
+import json
+import time
+import importlib
+import threading
+
+from .utils import ensure_dir
+
+
+GUI_MILESTONES = ("first_tick", "first_paint", "game_ui")
+
+
+class StartupReport:
+    # Milestones in ms since process start, plus inclusive import times for
+    # the modules loaded through import_module(). mark() may be called from
+    # any thread and returns True once, when every expected milestone is in.
+    def __init__(self, started_at: float | None = None, expect: tuple[str, ...] = GUI_MILESTONES):
+        self._t0 = started_at if started_at is not None else time.perf_counter()
+        self._expect = expect
+        self._lock = threading.Lock()
+        self._done = False
+        self.imports: dict[str, float] = {}
+        self.marks: dict[str, float] = {}
+
+    def _ms(self) -> float:
+        return round((time.perf_counter() - self._t0) * 1000.0, 1)
+
+    def import_module(self, name: str):
+        t0 = time.perf_counter()
+        mod = importlib.import_module(name)
+        with self._lock:
+            self.imports.setdefault(name, round((time.perf_counter() - t0) * 1000.0, 1))
+        return mod
+
+    def mark(self, name: str) -> bool:
+        with self._lock:
+            if name not in self.marks:
+                self.marks[name] = self._ms()
+            if self._done or not all(k in self.marks for k in self._expect):
+                return False
+            self._done = True
+            return True
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "ts": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "imports_ms": dict(self.imports),
+                "marks_ms": dict(sorted(self.marks.items(), key=lambda kv: kv[1])),
+            }
+
+    def summary(self) -> str:
+        d = self.to_dict()
+        marks = ", ".join(f"{k} {v:.1f} ms" for k, v in d["marks_ms"].items())
+        imports = ", ".join(f"{k} {v:.1f} ms" for k, v in d["imports_ms"].items())
+        return f"Startup: {marks}; imports: {imports or 'none'}"
+
+    def append_to(self, path: str, **extra) -> None:
+        # One JSON line per start, so regressions show up across runs.
+        if not path:
+            return
+        row = self.to_dict()
+        row.update(extra)
+        try:
+            ensure_dir(os.path.dirname(path))
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(row) + "\n")
+        except Exception:
+            pass
@@ -0,0 +1,240 @@
+import os
+import json
+import zlib
+import atexit
+import logging
+import tempfile
+import threading
+
+from .utils import ensure_dir
+from .config import STATE_BACKUPS, STATE_FSYNC_EVERY_SEC
+
+
+# State files are written as
+#   b"FGS1 <crc32 hex> <payload length>\n" + payload
+# to a unique temp file next to path, then swapped in with os.replace after
+# the previous file is rotated to path.1 .. path.K. The rotate and swap hold a
+# per-path lock, since the monitor, IPC and shutdown paths may save the same
+# file at once. Nothing is fsynced on the save
+# path: a background thread syncs the newest file (and its directory) every
+# STATE_FSYNC_EVERY_SEC. Only a file that thread has flushed is rotated into
+# path.1; until then each save replaces the newest file in place. So every
+# backup generation is durable and only the newest file can be torn by a
+# crash; the checksum rejects it and the load falls back to path.1. Files
+# without the header (written before this format) load unverified.
+STATE_MAGIC = b"FGS1 "
+VERIFY_CHUNK = 64 * 1024
+
+_logger = logging.getLogger("FocusGuardian")
+
+
+def encode_state(payload: bytes) -> bytes:
+    return b"FGS1 %08x %d\n" % (zlib.crc32(payload), len(payload)) + payload
+
+
+def _parse_header(line: bytes) -> tuple[int, int] | None:
+    try:
+        _, crc, length = line.split()
+        return int(crc, 16), int(length)
+    except Exception:
+        return None
+
+
+def decode_state(blob: bytes) -> bytes | None:
+    # Payload, or None when the checksum or length doesn't match.
+    if not blob.startswith(STATE_MAGIC):
+        return blob
+    nl = blob.find(b"\n")
+    hdr = _parse_header(blob[:nl]) if nl > 0 else None
+    if hdr is None:
+        return None
+    payload = blob[nl + 1:]
+    if len(payload) != hdr[1] or zlib.crc32(payload) != hdr[0]:
+        return None
+    return payload
+
+
+def generations(path: str, backups: int = STATE_BACKUPS) -> list[str]:
+    return [path] + [f"{path}.{i}" for i in range(1, backups + 1)]
+
+
+class _FsyncBatcher:
+    def __init__(self, interval_sec: float):
+        self._interval = interval_sec
+        self._cond = threading.Condition()
+        # path -> write count; a path stays pending until a flush that saw
+        # its latest write has synced it and its directory.
+        self._pending: dict[str, int] = {}
+        self._seq = 0
+        self._thread = None
+
+    def schedule(self, path: str) -> None:
+        with self._cond:
+            self._seq += 1
+            self._pending[path] = self._seq
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="FocusGuardianFsync", daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait(self._interval)
+            self.flush()
+
+    def is_durable(self, path: str) -> bool:
+        with self._cond:
+            return path not in self._pending
+
+    def flush(self) -> None:
+        with self._cond:
+            batch = dict(self._pending)
+        synced = {}
+        dirs = set()
+        for path, seq in batch.items():
+            if _fsync_file(path):
+                synced[path] = seq
+                dirs.add(os.path.dirname(path) or ".")
+        # Makes the renames durable; not possible on Windows.
+        for d in dirs:
+            try:
+                fd = os.open(d, os.O_RDONLY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+            except Exception:
+                pass
+        with self._cond:
+            for path, seq in synced.items():
+                if self._pending.get(path) == seq:
+                    del self._pending[path]
+
+
+def _fsync_file(path: str) -> bool:
+    try:
+        # Windows needs a handle with write access to flush.
+        with open(path, "ab") as f:
+            os.fsync(f.fileno())
+        return True
+    except Exception:
+        return False
+
+
+_fsync = _FsyncBatcher(STATE_FSYNC_EVERY_SEC)
+
+_path_locks: dict[str, threading.Lock] = {}
+_path_locks_guard = threading.Lock()
+
+
+def _path_lock(path: str) -> threading.Lock:
+    key = os.path.abspath(path)
+    with _path_locks_guard:
+        lock = _path_locks.get(key)
+        if lock is None:
+            lock = _path_locks[key] = threading.Lock()
+        return lock
+
+
+def flush_pending() -> None:
+    # fsync everything written so far; for shutdown.
+    _fsync.flush()
+
+
+def write_state(path: str, payload: bytes, backups: int = STATE_BACKUPS) -> None:
+    d = os.path.dirname(path)
+    if d:
+        ensure_dir(d)
+    fd, tmp = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=d or ".")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(encode_state(payload))
+        with _path_lock(path):
+            if backups > 0 and os.path.exists(path) and _fsync.is_durable(path):
+                gens = generations(path, backups)
+                for i in range(len(gens) - 1, 0, -1):
+                    if os.path.exists(gens[i - 1]):
+                        os.replace(gens[i - 1], gens[i])
+            os.replace(tmp, path)
+            # Inside the lock, so a flush that started before the swap can't
+            # mark the new file durable.
+            _fsync.schedule(path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def read_state(path: str, parse=None, backups: int = STATE_BACKUPS, logger: logging.Logger | None = None):
+    # Newest generation whose checksum (and parse, if given) succeeds.
+    logger = logger or _logger
+    for i, p in enumerate(generations(path, backups)):
+        try:
+            with open(p, "rb") as f:
+                blob = f.read()
+        except FileNotFoundError:
+            continue
+        except Exception:
+            logger.exception(f"State read failed: {p}")
+            continue
+        payload = decode_state(blob)
+        if payload is None:
+            logger.warning(f"State file failed its checksum: {p}")
+            continue
+        if parse is not None:
+            try:
+                payload = parse(payload)
+            except Exception:
+                logger.warning(f"State file unreadable: {p}")
+                continue
+        if i > 0:
+            logger.warning(f"Recovered {path} from backup generation {i}")
+        return payload
+    return None
+
+
+def write_json(path: str, obj, indent: int | None = None, backups: int = STATE_BACKUPS) -> None:
+    write_state(path, json.dumps(obj, indent=indent).encode("utf-8"), backups)
+
+
+def read_json(path: str, logger: logging.Logger | None = None, backups: int = STATE_BACKUPS):
+    return read_state(path, lambda b: json.loads(b.decode("utf-8")), backups, logger)
+
+
+def _verify_file(path: str) -> int | None:
+    # Payload offset if the file verifies, reading it in chunks.
+    try:
+        with open(path, "rb") as f:
+            first = f.read(len(STATE_MAGIC))
+            if first != STATE_MAGIC:
+                return 0 if first else None
+            hdr = _parse_header(STATE_MAGIC + f.readline())
+            if hdr is None:
+                return None
+            offset = f.tell()
+            crc, n = 0, 0
+            while True:
+                chunk = f.read(VERIFY_CHUNK)
+                if not chunk:
+                    break
+                crc = zlib.crc32(chunk, crc)
+                n += len(chunk)
+            return offset if (crc, n) == hdr else None
+    except Exception:
+        return None
+
+
+def open_state_text(path: str, backups: int = STATE_BACKUPS):
+    # For streaming readers: the newest generation that verifies, opened as
+    # text and positioned at the payload. Memory stays at one chunk.
+    for p in generations(path, backups):
+        offset = _verify_file(p)
+        if offset is None:
+            continue
+        f = open(p, "r", encoding="utf-8")
+        f.seek(offset)
+        return f
+    raise FileNotFoundError(path)
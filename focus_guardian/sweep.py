@@ -0,0 +1,113 @@
+import time
+import threading
+import logging
+from time import perf_counter_ns
+
+import psutil
+
+from .config import BACKGROUND_SWEEP_SEC, BACKGROUND_SWEEP_MAX_DUTY, BACKGROUND_COUNTS_AS_USAGE
+from .utils import NS_PER_SEC
+
+
+class BackgroundSweep:
+    # Runs on its own thread: one process_iter pass with prefetched attributes
+    # every interval, diffed against the previous pass. If a pass takes more
+    # than max_duty of the interval, the interval stretches to keep the duty
+    # cycle bounded. The process_iter pass runs unlocked; deciding targets and
+    # feeding the process tree happen under engine.rules_lock, since the
+    # monitor thread recompiles and refreshes the same objects.
+    def __init__(
+        self,
+        engine,
+        logger: logging.Logger,
+        interval_sec: float = BACKGROUND_SWEEP_SEC,
+        max_duty: float = BACKGROUND_SWEEP_MAX_DUTY,
+        counts_as_usage: bool = BACKGROUND_COUNTS_AS_USAGE,
+    ):
+        self._engine = engine
+        self._logger = logger
+        self._base_interval = interval_sec
+        self.interval_sec = interval_sec
+        self._max_duty = max_duty
+        self.counts_as_usage = counts_as_usage
+
+        self._targets: dict[int, str] = {}
+        self.running: tuple[str, ...] = ()
+        self.last_cost_ns = 0
+        self._last_sweep_ns = None
+        self._thread = None
+
+    def start(self, stop_event: threading.Event) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, args=(stop_event,), name="FocusGuardianSweep", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self, stop_event: threading.Event) -> None:
+        while not stop_event.is_set():
+            try:
+                self.sweep()
+            except Exception:
+                self._logger.exception("Background sweep failed")
+            stop_event.wait(self.interval_sec)
+
+    def sweep(self) -> None:
+        engine = self._engine
+        t0 = perf_counter_ns()
+
+        procs: dict[int, tuple[int, str, float]] = {}
+        for p in psutil.process_iter(["pid", "ppid", "name", "create_time"]):
+            info = p.info
+            procs[info["pid"]] = (info.get("ppid") or 0, info.get("name") or "", info.get("create_time") or 0.0)
+
+        targets: dict[int, str] = {}
+        with engine.rules_lock:
+            decide = engine.rules.decide
+            for pid, (_, name, _) in procs.items():
+                d = decide(name)
+                if d is not None:
+                    targets[pid] = d.key
+            if engine.tree is not None:
+                engine.tree.load(procs, time.monotonic())
+
+        old = self._targets
+        started = {targets[pid] for pid in targets.keys() - old.keys()}
+        stopped = {old[pid] for pid in old.keys() - targets.keys()}
+        self._targets = targets
+        running = tuple(sorted(set(targets.values())))
+        if started:
+            self._logger.info(f"Background targets started: {sorted(started)}")
+        if stopped - set(running):
+            self._logger.info(f"Background targets exited: {sorted(stopped - set(running))}")
+        self.running = running
+
+        now_ns = time.monotonic_ns()
+        if self.counts_as_usage and self._last_sweep_ns is not None:
+            self._charge(min(now_ns - self._last_sweep_ns, int(2 * self.interval_sec * NS_PER_SEC)))
+        self._last_sweep_ns = now_ns
+
+        cost = perf_counter_ns() - t0
+        self.last_cost_ns = cost
+        if engine.metrics is not None:
+            engine.metrics.observe("sweep", cost)
+        self.interval_sec = max(self._base_interval, cost / NS_PER_SEC / self._max_duty)
+
+    def _charge(self, elapsed_ns: int) -> None:
+        # The focused target is already charged by the monitor loop.
+        engine = self._engine
+        if elapsed_ns <= 0 or not engine.is_enabled() or engine.is_user_idle():
+            return
+        focused = engine.focused_key
+        charges = []
+        with engine.rules_lock:
+            for key in self.running:
+                if key == focused:
+                    continue
+                d = engine.rules.decide(key)
+                if d is not None:
+                    charges.append((key, d.group))
+        # Outside the rules lock: the store takes its own.
+        for key, group in charges:
+            engine.store.add_ns(key, elapsed_ns, group)
@@ -0,0 +1,210 @@
+import os
+import re
+import json
+import socket
+import logging
+
+from .utils import ensure_dir
+
+
+# Per-device append-only journal in a shared folder, one JSON array per line:
+#   ["h", version, device, generation]   first line; a new generation means the
+#                                        file was rewritten and readers restart
+#   ["u", date, key, ns]                 cumulative usage of key on date
+#   ["g", date, points]                  cumulative game points on date
+#   ["l", xp, sessions]                  cumulative lifetime xp and sessions
+# Every value only grows within a generation, so a device's state is the max
+# seen per counter and the merged view is the sum over devices (a G-counter).
+# Devices are identified by the header, not the file name: a sync client's
+# "conflicted copy" or a journal copied under another name merges into the
+# same device by max instead of being counted twice, and copies of this
+# device's own journal are ignored. Duplicated or re-read lines are harmless
+# and a torn last line is skipped until it is complete.
+JOURNAL_VERSION = 1
+JOURNAL_SUFFIX = ".journal"
+
+
+def device_id(path: str) -> str:
+    # Host name plus a random suffix, created once and kept in APPDATA_DIR.
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            dev = f.read().strip()
+        if dev:
+            return dev
+    except Exception:
+        pass
+    host = re.sub(r"[^A-Za-z0-9_-]+", "-", socket.gethostname() or "host").strip("-") or "host"
+    dev = f"{host}-{os.urandom(3).hex()}"
+    try:
+        ensure_dir(os.path.dirname(path))
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(dev + "\n")
+    except Exception:
+        pass
+    return dev
+
+
+class _Remote:
+    __slots__ = ("header", "device", "offset", "usage", "points", "xp", "sessions")
+
+    def __init__(self):
+        self.header = None
+        self.device = None
+        self.offset = 0
+        self.usage: dict[str, dict[str, int]] = {}
+        self.points: dict[str, int] = {}
+        self.xp = 0
+        self.sessions = 0
+
+    def apply(self, row: list, min_date: str) -> None:
+        kind = row[0]
+        if kind == "u":
+            date, key, ns = str(row[1]), str(row[2]), int(row[3])
+            if date < min_date:
+                return
+            day = self.usage.setdefault(date, {})
+            if ns > day.get(key, 0):
+                day[key] = ns
+        elif kind == "g":
+            date, pts = str(row[1]), int(row[2])
+            if pts > self.points.get(date, 0):
+                self.points[date] = pts
+        elif kind == "l":
+            self.xp = max(self.xp, int(row[1]))
+            self.sessions = max(self.sessions, int(row[2]))
+
+
+class SyncJournal:
+    # Called from the engine's save path (monitor thread, or the runtime's I/O
+    # pool). Writes this device's counters when they change, then reads only
+    # the new tail of every other device's journal and pushes the merged
+    # totals into the store and game DB.
+    def __init__(self, directory: str, device: str, store, game, logger: logging.Logger):
+        self._dir = directory
+        self.device = device
+        self._store = store
+        self._game = game
+        self._logger = logger
+        self._path = os.path.join(directory, device + JOURNAL_SUFFIX)
+        self._written: dict[tuple, object] | None = None
+        self._remotes: dict[str, _Remote] = {}
+
+    def _local_rows(self) -> dict[tuple, list]:
+        date, usage = self._store.local_usage_ns()
+        xp, sessions, points = self._game.sync_state()
+        rows: dict[tuple, list] = {("u", date, k): ["u", date, k, ns] for k, ns in usage.items()}
+        for d, pts in points.items():
+            rows[("g", d)] = ["g", d, pts]
+        rows[("l",)] = ["l", xp, sessions]
+        return rows
+
+    def _write_own(self) -> None:
+        rows = self._local_rows()
+        if self._written is None:
+            # Start a fresh generation holding the current state; this also
+            # compacts whatever the previous run appended.
+            ensure_dir(self._dir)
+            header = ["h", JOURNAL_VERSION, self.device, os.urandom(6).hex()]
+            tmp = self._path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                for row in [header, *rows.values()]:
+                    f.write(json.dumps(row, separators=(",", ":")) + "\n")
+            os.replace(tmp, self._path)
+            self._written = {k: r[-1] if k[0] != "l" else tuple(r[1:]) for k, r in rows.items()}
+            return
+
+        out = []
+        for k, row in rows.items():
+            value = row[-1] if k[0] != "l" else tuple(row[1:])
+            if self._written.get(k) != value:
+                self._written[k] = value
+                out.append(json.dumps(row, separators=(",", ":")) + "\n")
+        if out:
+            with open(self._path, "a", encoding="utf-8") as f:
+                f.write("".join(out))
+
+    def _read_remote(self, name: str, min_date: str) -> None:
+        path = os.path.join(self._dir, name)
+        r = self._remotes.get(name)
+        if r is None:
+            r = self._remotes[name] = _Remote()
+        with open(path, "rb") as f:
+            header = f.readline()
+            if not header.endswith(b"\n"):
+                return  # still being written
+            if header != r.header:
+                # New device, or the file was rewritten: replay from the top.
+                r = self._remotes[name] = _Remote()
+                r.header = header
+                r.offset = len(header)
+                try:
+                    r.device = str(json.loads(header)[2])
+                except Exception:
+                    self._logger.warning(f"Sync journal {name} has no readable header, ignoring it")
+                    return
+            if r.device is None or r.device == self.device:
+                return
+            f.seek(r.offset)
+            data = f.read()
+        end = data.rfind(b"\n")
+        if end < 0:
+            return
+        for line in data[: end + 1].splitlines():
+            try:
+                row = json.loads(line)
+                r.apply(row, min_date)
+            except Exception:
+                continue
+        r.offset += end + 1
+
+    def sync(self) -> None:
+        try:
+            self._write_own()
+        except Exception:
+            self._logger.exception("Sync journal write failed")
+
+        date = self._store.local_usage_ns()[0]
+        own = self.device + JOURNAL_SUFFIX
+        try:
+            names = [e.name for e in os.scandir(self._dir) if e.name.endswith(JOURNAL_SUFFIX) and e.name != own]
+        except Exception:
+            names = []
+        for name in names:
+            try:
+                self._read_remote(name, date)
+            except Exception:
+                self._logger.exception(f"Sync journal read failed: {name}")
+
+        # Max per device across its files, then sum across devices.
+        devices: dict[str, _Remote] = {}
+        for name in names:
+            r = self._remotes.get(name)
+            if r is None or r.device is None or r.device == self.device:
+                continue
+            # Older days can't matter to today's limits again.
+            for d in [d for d in r.usage if d < date]:
+                del r.usage[d]
+            m = devices.get(r.device)
+            if m is None:
+                m = devices[r.device] = _Remote()
+            for k, ns in r.usage.get(date, {}).items():
+                day = m.usage.setdefault(date, {})
+                if ns > day.get(k, 0):
+                    day[k] = ns
+            for d, pts in r.points.items():
+                if pts > m.points.get(d, 0):
+                    m.points[d] = pts
+            m.xp = max(m.xp, r.xp)
+            m.sessions = max(m.sessions, r.sessions)
+
+        usage: dict[str, int] = {}
+        points_days: set[str] = set()
+        xp = sessions = 0
+        for m in devices.values():
+            for k, ns in m.usage.get(date, {}).items():
+                usage[k] = usage.get(k, 0) + ns
+            points_days.update(d for d, pts in m.points.items() if pts > 0)
+            xp += m.xp
+            sessions += m.sessions
+        self._store.set_remote(date, usage)
+        self._game.set_remote(xp, sessions, points_days)
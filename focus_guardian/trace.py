@@ -0,0 +1,231 @@
+import os
+import gzip
+import json
+import time
+import logging
+import argparse
+import tempfile
+import threading
+
+from .utils import NS_PER_SEC
+from .usage_store import UsageStore
+from .game_db import GameDB
+from .process_monitor import TargetMatcher, WindowTitleCache
+from .engine import FocusEngine
+from .clock import GapDetector, DayClock
+from .idle import FakeIdleSource
+
+
+# Focus trace, one JSON array per line (gzip when the path ends in .gz).
+# Times are integer nanoseconds relative to the header's monotonic origin.
+#   ["h", version, wall, enabled]          recorder attached
+#   ["w", wall_offset]                     wall clock moved (wall = offset + rel_sec)
+#   ["c", posted_rel_ns, name, args]       timer/monitor command, in drain order
+#   ["k", kind, value]                     config applied ("targets" or "rules")
+#   ["i", idle_sec]                        idle reading changed
+#   ["s", hwnd, pid, proc, title]          foreground sample changed
+#   ["t", delta_ns] / ["t", delta_ns, dt_ns]
+#                                          tick; dt_ns only when the engine's dt
+#                                          differs from the gap since the last tick
+# Non-tick lines apply to the tick line that follows them.
+TRACE_VERSION = 1
+WALL_DRIFT_SEC = 1.0
+REPLAY_BASE_SEC = 1000.0
+
+
+def _open(path: str, mode: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class TraceRecorder:
+    # Written from the engine thread only; close() may come from another one.
+    def __init__(self, path: str):
+        self._f = _open(path, "w")
+        self._lock = threading.Lock()
+        self._origin_ns = 0
+        self._last_tick_ns = 0
+        self._wall_offset = None
+        self._sample = None
+        self._idle = None
+        self.path = path
+
+    def _write(self, row: list) -> None:
+        with self._lock:
+            if self._f is not None:
+                self._f.write(json.dumps(row, separators=(",", ":")) + "\n")
+
+    def header(self, wall: float, mono_ns: int, enabled: bool) -> None:
+        self._origin_ns = mono_ns
+        self._last_tick_ns = mono_ns
+        self._wall_offset = wall
+        self._write(["h", TRACE_VERSION, wall, bool(enabled)])
+
+    def command(self, posted_at: float, name: str, args: tuple) -> None:
+        self._write(["c", int(posted_at * NS_PER_SEC) - self._origin_ns, name, list(args)])
+
+    def config(self, kind: str, value) -> None:
+        self._write(["k", kind, value])
+
+    def tick(self, now_ns: int, dt_ns: int, wall: float, sample: tuple | None, idle_sec: float | None) -> None:
+        offset = wall - (now_ns - self._origin_ns) / NS_PER_SEC
+        if abs(offset - self._wall_offset) > WALL_DRIFT_SEC:
+            self._wall_offset = offset
+            self._write(["w", offset])
+        if idle_sec != self._idle:
+            self._idle = idle_sec
+            self._write(["i", idle_sec])
+        if sample is not None and sample != self._sample:
+            self._sample = sample
+            self._write(["s", *sample])
+        delta = now_ns - self._last_tick_ns
+        self._last_tick_ns = now_ns
+        self._write(["t", delta] if delta == dt_ns else ["t", delta, dt_ns])
+
+    def close(self) -> None:
+        with self._lock:
+            if self._f is not None:
+                self._f.close()
+                self._f = None
+
+
+class _NullTone:
+    def __init__(self):
+        self.starts = 0
+        self._playing = False
+
+    def start(self) -> None:
+        if not self._playing:
+            self._playing = True
+            self.starts += 1
+
+    def stop(self) -> None:
+        self._playing = False
+
+
+def replay(path: str, logger: logging.Logger | None = None, metrics: bool = True) -> dict:
+    # Runs the trace through a fresh engine with stubbed sample sources, sinks
+    # and scratch data files, as fast as it will go.
+    logger = logger or logging.getLogger("FocusGuardian.replay")
+    base_ns = int(REPLAY_BASE_SEC * NS_PER_SEC)
+    state = {"now_ns": base_ns, "wall_offset": 0.0, "sample": (0, None, None, None)}
+
+    def wall_clock() -> float:
+        return state["wall_offset"] + (state["now_ns"] - base_ns) / NS_PER_SEC
+
+    with _open(path, "r") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    if not rows or rows[0][0] != "h" or rows[0][1] != TRACE_VERSION:
+        raise ValueError(f"not a version {TRACE_VERSION} focus trace: {path}")
+    state["wall_offset"] = float(rows[0][2])
+
+    with tempfile.TemporaryDirectory(prefix="focus-replay-") as tmp:
+        store = UsageStore(os.path.join(tmp, "usage.json"))
+        game = GameDB(os.path.join(tmp, "game_db.json"), logger, wall_clock=wall_clock)
+        idle = FakeIdleSource(None)
+        tone = _NullTone()
+        chimes: dict[str, int] = {}
+
+        engine = FocusEngine(
+            store=store,
+            game=game,
+            matcher=TargetMatcher(),
+            tone=tone,
+            logger=logger,
+            gap_detector=GapDetector(wall_clock=wall_clock),
+            wall_clock=wall_clock,
+            idle_source=idle,
+            day_clock=DayClock(wall_clock=wall_clock, monotonic=lambda: REPLAY_BASE_SEC),
+        )
+        # Recorded names already include process-tree attribution.
+        engine.tree = None
+        engine.sweep = None
+        engine.titles = WindowTitleCache(fetch=lambda hwnd: state["sample"][3] or "", fallback_refresh_sec=0.0)
+        engine._title_hook_tried = True
+        engine.foreground = lambda: state["sample"][:2]
+        engine.process_name = lambda pid: state["sample"][2]
+        engine.chime = lambda name: chimes.__setitem__(name, chimes.get(name, 0) + 1)
+        engine._enabled = bool(rows[0][3])
+        if metrics:
+            engine.enable_metrics()
+
+        ticks = 0
+        punishing_ticks = 0
+        status = {}
+        t0 = time.perf_counter()
+        for row in rows[1:]:
+            kind = row[0]
+            if kind == "t":
+                now_ns = state["now_ns"] + row[1]
+                state["now_ns"] = now_ns
+                if engine._last_tick_ns is None:
+                    engine._last_save_mono = now_ns / NS_PER_SEC
+                engine._last_tick_ns = now_ns - (row[2] if len(row) > 2 else row[1])
+                status = engine.tick(now_ns / NS_PER_SEC)
+                ticks += 1
+                if status["punishing"]:
+                    punishing_ticks += 1
+            elif kind == "s":
+                state["sample"] = tuple(row[1:5])
+            elif kind == "i":
+                idle.idle_sec = row[1]
+            elif kind == "w":
+                state["wall_offset"] = float(row[1])
+            elif kind == "c":
+                posted_at = (base_ns + row[1]) / NS_PER_SEC
+                engine._post_at(getattr(engine, row[2]), posted_at, tuple(row[3]))
+            elif kind == "k":
+                if row[1] == "targets":
+                    engine.set_targets_text(row[2])
+                elif row[1] == "rules":
+                    cfg, limit_sec = row[2]
+                    engine.set_daily_limit_text(str(limit_sec / 60.0) if limit_sec != float("inf") else "")
+                    engine.set_rules(cfg)
+        elapsed = time.perf_counter() - t0
+
+        traced_sec = (state["now_ns"] - base_ns) / NS_PER_SEC
+        return {
+            "trace": path,
+            "ticks": ticks,
+            "traced_sec": round(traced_sec, 3),
+            "replay_sec": round(elapsed, 6),
+            "speedup": round(traced_sec / elapsed, 1) if elapsed > 0 else None,
+            "usage": store.snapshot()[1],
+            "usage_groups": store.group_snapshot(),
+            "game_today": game.snapshot_today(),
+            "timer": engine.timer_state(),
+            "punishing_ticks": punishing_ticks,
+            "tone_starts": tone.starts,
+            "chimes": chimes,
+            "final_status": status,
+            "metrics": engine.metrics.stats() if engine.metrics is not None else None,
+        }
+
+
+def main(argv: list[str] | None = None) -> None:
+    p = argparse.ArgumentParser(prog="python -m focus_guardian.trace", description="Replay a recorded focus trace.")
+    p.add_argument("trace", help="trace file written with --trace")
+    p.add_argument("--out", help="write the JSON report here instead of stdout")
+    p.add_argument("--no-metrics", action="store_true", help="skip per-stage timing")
+    p.add_argument("--verbose", action="store_true", help="print engine log lines")
+    args = p.parse_args(argv)
+
+    logger = logging.getLogger("FocusGuardian.replay")
+    if args.verbose:
+        logging.basicConfig(level=logging.INFO, format="%(levelname)s | %(message)s")
+    else:
+        logger.addHandler(logging.NullHandler())
+        logger.propagate = False
+
+    report = replay(args.trace, logger, metrics=not args.no_metrics)
+    text = json.dumps(report, indent=2, default=str)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
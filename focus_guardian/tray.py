@@ -1,24 +1,103 @@
+import math
 import threading
 import pystray
 from PIL import Image, ImageDraw
 
+from .config import TRAY_RING_STEPS
+from .utils import seconds_to_mmss
+
+
+ICON_SIZE = 64
+ICON_BG = (40, 40, 40)
+RING_TRACK = (70, 70, 70)
+RING_WIDTH = 6
+
+STATE_COLORS = {
+    "focus": (46, 204, 113),
+    "break": (52, 152, 219),
+    "paused": (243, 156, 18),
+    "punishing": (231, 76, 60),
+}
+
+
+def _draw_glyph(draw: ImageDraw.ImageDraw, state: str) -> None:
+    white = (245, 245, 245)
+    if state == "focus":
+        draw.rectangle((29, 22, 35, 42), fill=white)
+    elif state == "break":
+        draw.rectangle((22, 29, 42, 35), fill=white)
+    elif state == "paused":
+        draw.rectangle((24, 22, 29, 42), fill=white)
+        draw.rectangle((35, 22, 40, 42), fill=white)
+    elif state == "punishing":
+        draw.rectangle((29, 19, 35, 36), fill=white)
+        draw.rectangle((29, 40, 35, 45), fill=white)
+
+
+def render_idle_frame() -> Image.Image:
+    img = Image.new("RGB", (ICON_SIZE, ICON_SIZE), color=ICON_BG)
+    draw = ImageDraw.Draw(img)
+    draw.rounded_rectangle((10, 10, 54, 54), radius=10, fill=(200, 60, 60))
+    draw.rectangle((26, 20, 38, 44), fill=(245, 245, 245))
+    return img
+
+
+def render_frame(state: str, step: int, steps: int = TRAY_RING_STEPS) -> Image.Image:
+    color = STATE_COLORS[state]
+    img = Image.new("RGB", (ICON_SIZE, ICON_SIZE), color=ICON_BG)
+    draw = ImageDraw.Draw(img)
+    box = (2, 2, ICON_SIZE - 3, ICON_SIZE - 3)
+    draw.ellipse(box, outline=RING_TRACK, width=RING_WIDTH)
+    if step >= steps:
+        draw.ellipse(box, outline=color, width=RING_WIDTH)
+    elif step > 0:
+        # Clockwise from 12 o'clock, shrinking as time runs out.
+        draw.arc(box, -90, -90 + 360.0 * step / steps, fill=color, width=RING_WIDTH)
+    draw.ellipse((14, 14, ICON_SIZE - 15, ICON_SIZE - 15), fill=color)
+    _draw_glyph(draw, state)
+    return img
+
+
+class TrayFrames:
+    # Every (state, ring step) image, rendered once; lookups are dict hits.
+    def __init__(self, steps: int = TRAY_RING_STEPS):
+        self.steps = steps
+        self.idle = render_idle_frame()
+        self._frames = {
+            (state, step): render_frame(state, step, steps)
+            for state in STATE_COLORS
+            for step in range(steps + 1)
+        }
+
+    def get(self, state: str | None, step: int) -> Image.Image:
+        if state is None:
+            return self.idle
+        return self._frames[(state, step)]
+
 
 class TrayController:
-    def __init__(self, title: str, on_show, on_quit):
+    def __init__(self, title: str, on_show, on_quit, on_profile=None):
         self._title = title
         self._on_show = on_show
         self._on_quit = on_quit
+        self._on_profile = on_profile
 
         self._icon = None
         self._thread = None
         self._running = False
 
+        self._lock = threading.Lock()
+        self._frames: TrayFrames | None = None
+        self._frame_key = (None, 0)
+        self._shown_key = None
+        self._tooltip = title
+        self._shown_tooltip = None
+
     def _make_icon_image(self) -> Image.Image:
-        img = Image.new("RGB", (64, 64), color=(40, 40, 40))
-        draw = ImageDraw.Draw(img)
-        draw.rounded_rectangle((10, 10, 54, 54), radius=10, fill=(200, 60, 60))
-        draw.rectangle((26, 20, 38, 44), fill=(245, 245, 245))
-        return img
+        if self._frames is None:
+            self._frames = TrayFrames()
+        self._shown_key = self._frame_key
+        return self._frames.get(*self._frame_key)
 
     def ensure_running(self) -> None:
         if self._icon is not None and self._running:
@@ -30,12 +109,18 @@ class TrayController:
         def on_quit(icon, item):
             self._on_quit()
 
-        menu = pystray.Menu(
-            pystray.MenuItem("Show", on_show),
-            pystray.MenuItem("Quit", on_quit),
-        )
+        def on_profile(icon, item):
+            self._on_profile()
+
+        items = [pystray.MenuItem("Show", on_show)]
+        if self._on_profile is not None:
+            items.append(pystray.MenuItem("Capture profile", on_profile))
+        items.append(pystray.MenuItem("Quit", on_quit))
+        menu = pystray.Menu(*items)
 
-        self._icon = pystray.Icon("FocusGuardian", self._make_icon_image(), self._title, menu)
+        with self._lock:
+            self._shown_tooltip = self._tooltip
+            self._icon = pystray.Icon("FocusGuardian", self._make_icon_image(), self._tooltip, menu)
 
         def run_icon():
             self._running = True
@@ -47,6 +132,55 @@ class TrayController:
         self._thread = threading.Thread(target=run_icon, daemon=True)
         self._thread.start()
 
+    def update(self, status: dict) -> None:
+        # Called with every engine status; touches the icon only when the
+        # frame or tooltip text actually changes.
+        if status.get("break_active"):
+            phase, remaining = "break", float(status.get("break_remaining_sec") or 0.0)
+            total = float(status.get("break_planned_sec") or 0.0)
+            state = "paused" if status.get("break_paused") else "break"
+        elif status.get("strict_active"):
+            phase, remaining = "strict", float(status.get("strict_remaining_sec") or 0.0)
+            total = float(status.get("strict_planned_sec") or 0.0)
+            state = "paused" if status.get("strict_paused") else "focus"
+        else:
+            phase, remaining, total, state = None, 0.0, 0.0, None
+        if status.get("punishing"):
+            state = "punishing"
+        elif not status.get("enabled", True):
+            state = "paused"
+
+        steps = TRAY_RING_STEPS
+        if phase is None:
+            step = steps
+        elif total > 0:
+            step = min(steps, math.ceil(steps * remaining / total))
+        else:
+            step = 0
+
+        if phase == "strict":
+            label = f"{'Paused' if status.get('strict_paused') else 'Focus'} {seconds_to_mmss(remaining)}"
+        elif phase == "break":
+            label = f"{'Paused break' if status.get('break_paused') else 'Break'} {seconds_to_mmss(remaining)}"
+        elif not status.get("enabled", True):
+            label = "Monitoring paused"
+        else:
+            label = "Monitoring"
+        if status.get("punishing"):
+            label += " - blocked app focused"
+
+        with self._lock:
+            self._frame_key = (state, step)
+            self._tooltip = f"{self._title} - {label}"
+            icon = self._icon
+            if icon is None or not self._running:
+                return
+            if self._frame_key != self._shown_key:
+                icon.icon = self._make_icon_image()
+            if self._tooltip != self._shown_tooltip:
+                self._shown_tooltip = self._tooltip
+                icon.title = self._tooltip
+
     def stop(self) -> None:
         if self._icon is None:
             return
@@ -1,31 +1,40 @@
 import os
-import json
 import threading
 
-from .utils import ensure_dir, today_str
+from .utils import ensure_dir, today_str, sec_to_ns, ns_to_sec
+from .storage import read_json, write_json
 
 
 class UsageStore:
+    # Usage is accumulated in integer nanoseconds; the file format and the
+    # public getters stay in float seconds.
     def __init__(self, path: str):
         self._path = path
         self._lock = threading.Lock()
         self._date = today_str()
-        self._usage: dict[str, float] = {}
+        self._usage: dict[str, int] = {}
+        # Group budgets are derived from per-app usage and kept in step on add.
+        self._group_usage: dict[str, int] = {}
+        self._group_of = None
+        # Other devices' usage for the current day (see sync.SyncJournal).
+        # Counted by the getters and snapshots, never saved to this file.
+        self._remote: dict[str, int] = {}
+        self._remote_groups: dict[str, int] = {}
 
     def load(self) -> None:
         ensure_dir(os.path.dirname(self._path))
-        if not os.path.exists(self._path):
-            return
         try:
-            with open(self._path, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            # Falls back to the newest backup that verifies.
+            data = read_json(self._path)
+            if data is None:
+                return
             with self._lock:
                 self._date = str(data.get("date", today_str()))
                 usage = data.get("usage", {}) or {}
-                cleaned: dict[str, float] = {}
+                cleaned: dict[str, int] = {}
                 for k, v in usage.items():
                     try:
-                        cleaned[str(k).lower()] = float(v)
+                        cleaned[str(k).lower()] = sec_to_ns(v)
                     except Exception:
                         continue
                 self._usage = cleaned
@@ -34,38 +43,101 @@ class UsageStore:
                 self._date = today_str()
                 self._usage = {}
         self.reset_if_new_day()
+        self._rebuild_groups()
 
     def save(self) -> None:
         ensure_dir(os.path.dirname(self._path))
         with self._lock:
-            data = {"date": self._date, "usage": self._usage}
+            data = {"date": self._date, "usage": {k: ns_to_sec(v) for k, v in self._usage.items()}}
         try:
-            with open(self._path, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2)
+            write_json(self._path, data, indent=2)
         except Exception:
             pass
 
     def reset_if_new_day(self) -> None:
-        t = today_str()
+        self.on_new_day(today_str())
+
+    def on_new_day(self, date_str: str) -> None:
         with self._lock:
-            if self._date != t:
-                self._date = t
+            if self._date != date_str:
+                self._date = date_str
                 self._usage = {}
+                self._group_usage = {}
+                self._remote = {}
+                self._remote_groups = {}
 
-    def add_seconds(self, proc_name: str, seconds: float) -> None:
-        if not proc_name or seconds <= 0:
+    def set_group_resolver(self, group_of) -> None:
+        self._group_of = group_of
+        self._rebuild_groups()
+
+    def _group_totals(self, usage: dict[str, int]) -> dict[str, int]:
+        group_of = self._group_of
+        groups: dict[str, int] = {}
+        if group_of is not None:
+            for key, ns in usage.items():
+                g = group_of(key)
+                if g is not None:
+                    groups[g] = groups.get(g, 0) + ns
+        return groups
+
+    def _rebuild_groups(self) -> None:
+        with self._lock:
+            self._group_usage = self._group_totals(self._usage)
+            self._remote_groups = self._group_totals(self._remote)
+
+    def set_remote(self, date_str: str, usage: dict[str, int]) -> None:
+        # Replaces the previous merge; ignored if it is for another day.
+        groups = self._group_totals(usage)
+        with self._lock:
+            if date_str != self._date:
+                return
+            self._remote = dict(usage)
+            self._remote_groups = groups
+
+    def local_usage_ns(self) -> tuple[str, dict[str, int]]:
+        with self._lock:
+            return self._date, dict(self._usage)
+
+    def add_ns(self, proc_name: str, ns: int, group: str | None = None) -> None:
+        if not proc_name or ns <= 0:
             return
         key = proc_name.lower()
         with self._lock:
-            self._usage[key] = float(self._usage.get(key, 0.0)) + float(seconds)
+            self._usage[key] = self._usage.get(key, 0) + ns
+            if group is not None:
+                self._group_usage[group] = self._group_usage.get(group, 0) + ns
+
+    def get_ns(self, proc_name: str) -> int:
+        with self._lock:
+            return self._usage.get(proc_name, 0) + self._remote.get(proc_name, 0)
+
+    def get_group_ns(self, group: str) -> int:
+        with self._lock:
+            return self._group_usage.get(group, 0) + self._remote_groups.get(group, 0)
+
+    def group_snapshot(self) -> dict[str, float]:
+        with self._lock:
+            return {k: ns_to_sec(v) for k, v in _merged(self._group_usage, self._remote_groups).items()}
+
+    def add_seconds(self, proc_name: str, seconds: float) -> None:
+        self.add_ns(proc_name, sec_to_ns(seconds))
 
     def get_seconds(self, proc_name: str) -> float:
         if not proc_name:
             return 0.0
         key = proc_name.lower()
         with self._lock:
-            return float(self._usage.get(key, 0.0))
+            return ns_to_sec(self._usage.get(key, 0) + self._remote.get(key, 0))
 
     def snapshot(self) -> tuple[str, dict[str, float]]:
         with self._lock:
-            return self._date, dict(self._usage)
+            return self._date, {k: ns_to_sec(v) for k, v in _merged(self._usage, self._remote).items()}
+
+
+def _merged(local: dict[str, int], remote: dict[str, int]) -> dict[str, int]:
+    if not remote:
+        return local
+    out = dict(local)
+    for k, v in remote.items():
+        out[k] = out.get(k, 0) + v
+    return out
@@ -16,5 +16,20 @@ def today_str() -> str:
     return str(datetime.date.today())
 
 
-def yesterday_str() -> str:
-    return str(datetime.date.today() - datetime.timedelta(days=1))
+def process_rss_bytes() -> int:
+    try:
+        import psutil
+        return int(psutil.Process().memory_info().rss)
+    except Exception:
+        return 0
+
+
+NS_PER_SEC = 1_000_000_000
+
+
+def sec_to_ns(seconds: float) -> int:
+    return int(round(float(seconds) * NS_PER_SEC))
+
+
+def ns_to_sec(ns: int) -> float:
+    return ns / NS_PER_SEC
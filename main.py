@@ -1,4 +1,21 @@
-from focus_guardian.app import FocusGuardianApp
+import sys
+import time
+import multiprocessing
+
+_STARTED_AT = time.perf_counter()
 
 if __name__ == "__main__":
-    FocusGuardianApp().run()
+    multiprocessing.freeze_support()
+    if "--headless" in sys.argv[1:]:
+        from focus_guardian.headless import main
+
+        main(sys.argv[1:], started_at=_STARTED_AT)
+    else:
+        from focus_guardian.startup import StartupReport
+
+        startup = StartupReport(_STARTED_AT)
+        startup.import_module("psutil")
+        app = startup.import_module("focus_guardian.app")
+
+        kwargs = {"monitor_process": True} if "--monitor-process" in sys.argv[1:] else {}
+        app.FocusGuardianApp(startup=startup, **kwargs).run()
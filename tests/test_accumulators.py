@@ -0,0 +1,36 @@
+from focus_guardian.usage_store import UsageStore
+from focus_guardian.utils import sec_to_ns, ns_to_sec, NS_PER_SEC
+
+
+TICKS = 10_000_000
+TICK_SEC = 0.1
+
+
+def test_ten_million_ticks_stay_exact(tmp_path):
+    store = UsageStore(str(tmp_path / "usage.json"))
+    tick_ns = sec_to_ns(TICK_SEC)
+    drifting = 0.0
+    for _ in range(TICKS):
+        store.add_ns("discord.exe", tick_ns, "chat")
+        drifting += TICK_SEC
+
+    exact_ns = TICKS * TICK_SEC * NS_PER_SEC
+    assert tick_ns == 100_000_000
+    assert store.get_ns("discord.exe") == exact_ns
+    assert store.get_group_ns("chat") == exact_ns
+    assert ns_to_sec(store.get_ns("discord.exe")) == 1_000_000.0
+    # The float accumulator the integer one replaced is visibly off.
+    assert drifting != 1_000_000.0
+    assert abs(drifting - 1_000_000.0) > 1e-6
+
+
+def test_exact_total_survives_save_and_load(tmp_path):
+    path = str(tmp_path / "usage.json")
+    store = UsageStore(path)
+    for _ in range(1000):
+        store.add_ns("discord.exe", sec_to_ns(TICK_SEC))
+    store.save()
+
+    loaded = UsageStore(path)
+    loaded.load()
+    assert loaded.get_ns("discord.exe") == 100 * NS_PER_SEC
@@ -0,0 +1,80 @@
+import time
+import datetime
+
+from focus_guardian.clock import GapDetector, DayClock
+
+
+class FakeClock:
+    def __init__(self, t: float):
+        self.t = t
+
+    def __call__(self) -> float:
+        return self.t
+
+
+def test_suspend_gap_is_capped():
+    # Windows: the monotonic clock runs through sleep, so resume is one big dt.
+    wall = FakeClock(1_000_000.0)
+    gap = GapDetector(threshold_sec=30.0, cap_sec=5.0, wall_clock=wall)
+    assert gap.check(1.0) == (1.0, 0.0, 0.0)
+
+    wall.t += 3600.0
+    credited, uncredited, hidden = gap.check(3600.0)
+    assert credited == 5.0
+    assert uncredited == 3595.0
+    assert hidden == 0.0
+
+
+def test_wall_clock_step_is_reported_not_credited():
+    # Linux suspend (or a clock change): monotonic barely moves, wall jumps.
+    wall = FakeClock(1_000_000.0)
+    gap = GapDetector(threshold_sec=30.0, cap_sec=5.0, wall_clock=wall)
+    gap.check(1.0)
+
+    wall.t += 7200.0
+    credited, uncredited, hidden = gap.check(1.0)
+    assert (credited, uncredited) == (1.0, 0.0)
+    assert hidden == 7199.0
+
+    # A small step stays under the threshold and is ignored.
+    wall.t += 10.0
+    assert gap.check(1.0) == (1.0, 0.0, 0.0)
+
+
+def _local_ts(y: int, mo: int, d: int, h: int, mi: int, s: int) -> float:
+    return time.mktime((y, mo, d, h, mi, s, 0, 0, -1))
+
+
+def test_midnight_rollover():
+    wall = FakeClock(_local_ts(2026, 3, 14, 23, 59, 50))
+    mono = FakeClock(500.0)
+    clock = DayClock(wall_clock=wall, monotonic=mono)
+    seen = []
+    clock.subscribe(seen.append)
+    assert clock.today == "2026-03-14"
+    assert seen == ["2026-03-14"]
+
+    # Before the deadline the check doesn't look at the wall clock at all.
+    wall.t += 5.0
+    assert clock.check(mono.t + 5.0) is False
+
+    wall.t += 15.0
+    assert clock.check(mono.t + 20.0) is True
+    assert clock.today == "2026-03-15"
+    assert seen == ["2026-03-14", "2026-03-15"]
+
+    # Same day again: no callback.
+    wall.t += 3600.0
+    assert clock.check(mono.t + 3620.0) is False
+    assert seen[-1] == str(datetime.date(2026, 3, 15))
+
+
+def test_wall_clock_jump_is_picked_up_at_the_recheck():
+    wall = FakeClock(_local_ts(2026, 3, 14, 12, 0, 0))
+    mono = FakeClock(0.0)
+    clock = DayClock(wall_clock=wall, monotonic=mono)
+
+    wall.t += 2 * 86400.0
+    assert clock.check(10.0) is False
+    assert clock.check(DayClock.RECHECK_SEC) is True
+    assert clock.today == "2026-03-16"
@@ -0,0 +1,28 @@
+import logging
+
+from focus_guardian.game_db import GameDB
+from focus_guardian.storage import read_json, write_json
+
+
+def test_session_ended_before_deferred_load_is_kept(tmp_path):
+    # Strict session started over IPC/tray and ended before the window's
+    # first paint triggered the load.
+    path = str(tmp_path / "game_db.json")
+    write_json(path, {"schema": 1, "days": {}, "lifetime": {"xp": 100, "total_sessions": 3}})
+
+    game = GameDB(path, logging.getLogger("test"), wall_clock=lambda: 1_790_000_000.0)
+    game.defer_load()
+    game.on_new_day(game._date())
+    game.start_session(60)
+    game.add_study(61)
+    game.end_session("quit")
+    game.save()
+
+    data = read_json(path)
+    sessions = data["days"][game._date()]["sessions"]
+    assert len(sessions) == 1
+    assert sessions[0]["study_sec"] == 61.0
+    assert "end:quit" in sessions[0]["notes"]
+    # The history on disk was loaded, not overwritten.
+    assert data["lifetime"]["total_sessions"] == 4
+    assert data["lifetime"]["xp"] > 100
@@ -0,0 +1,68 @@
+import logging
+
+import pytest
+
+pytest.importorskip("psutil")
+
+from focus_guardian.audio import LoopingTone
+from focus_guardian.config import IDLE_THRESHOLD_SEC
+from focus_guardian.engine import FocusEngine
+from focus_guardian.game_db import GameDB
+from focus_guardian.idle import FakeIdleSource
+from focus_guardian.process_monitor import TargetMatcher
+from focus_guardian.usage_store import UsageStore
+from focus_guardian.utils import NS_PER_SEC
+
+
+def _engine(tmp_path, idle: FakeIdleSource) -> FocusEngine:
+    logger = logging.getLogger("FocusGuardian.test")
+    engine = FocusEngine(
+        store=UsageStore(str(tmp_path / "usage.json")),
+        game=GameDB(str(tmp_path / "game_db.json"), logger),
+        matcher=TargetMatcher(),
+        tone=LoopingTone(str(tmp_path / "tone.wav")),
+        logger=logger,
+        idle_source=idle,
+    )
+    engine.tree = None
+    engine.sweep = None
+    engine.autosave = False
+    engine.chime = lambda name: None
+    engine.foreground = lambda: (1, 4242)
+    engine.process_name = lambda pid: "discord.exe"
+    engine.set_targets_text("discord.exe")
+    return engine
+
+
+def test_idle_gets_no_credit_and_resume_does(tmp_path):
+    idle = FakeIdleSource(0.0)
+    engine = _engine(tmp_path, idle)
+    now = 1000.0
+    engine.tick(now)
+    for _ in range(5):
+        now += 1.0
+        engine.tick(now)
+    assert engine.store.get_ns("discord.exe") == 5 * NS_PER_SEC
+    assert not engine.is_user_idle()
+
+    idle.idle_sec = IDLE_THRESHOLD_SEC + 1.0
+    for _ in range(10):
+        now += 1.0
+        engine.tick(now)
+    assert engine.is_user_idle()
+    assert engine.store.get_ns("discord.exe") == 5 * NS_PER_SEC
+
+    idle.idle_sec = 0.0
+    for _ in range(3):
+        now += 1.0
+        engine.tick(now)
+    assert not engine.is_user_idle()
+    assert engine.store.get_ns("discord.exe") == 8 * NS_PER_SEC
+
+
+def test_unknown_idle_time_counts_as_active(tmp_path):
+    engine = _engine(tmp_path, FakeIdleSource(None))
+    engine.tick(1000.0)
+    engine.tick(1001.0)
+    assert not engine.is_user_idle()
+    assert engine.store.get_ns("discord.exe") == NS_PER_SEC
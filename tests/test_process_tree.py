@@ -0,0 +1,60 @@
+import contextlib
+
+import pytest
+
+pytest.importorskip("psutil")
+
+from focus_guardian import process_monitor
+from focus_guardian.process_monitor import ProcessTree
+
+
+class _FakeProcess:
+    table: dict = {}
+
+    def __init__(self, pid):
+        self._ppid, self._name, self._ct = self.table[pid]
+
+    def oneshot(self):
+        return contextlib.nullcontext()
+
+    def ppid(self):
+        return self._ppid
+
+    def name(self):
+        return self._name
+
+    def create_time(self):
+        return self._ct
+
+
+def test_reused_pid_is_not_charged_to_the_dead_process(monkeypatch):
+    # chrome.exe (pid 50) exits and its pid goes to notepad.exe before the
+    # next refresh.
+    procs = {1: (0, "init", 1.0), 10: (1, "explorer.exe", 100.0), 50: (10, "chrome.exe", 200.0)}
+    monkeypatch.setattr(_FakeProcess, "table", procs)
+    monkeypatch.setattr(process_monitor.psutil, "Process", _FakeProcess)
+    tree = ProcessTree(refresh_sec=30.0)
+    tree.load(dict(procs), now=0.0)
+    decide = lambda name: "browsers" if name == "explorer.exe" else None
+
+    assert tree.name(50) == "chrome.exe"
+    assert tree.attribute(50, decide) == ("explorer.exe", "browsers")
+
+    procs[50] = (1, "notepad.exe", 260.0)
+    assert tree.name(50) == "notepad.exe"
+    # Its parent isn't explorer.exe, so the cached attribution doesn't apply.
+    assert tree.attribute(50, decide) is None
+
+
+def test_cache_hit_keeps_the_name_while_the_process_lives():
+    calls = []
+
+    def create_time(pid):
+        calls.append(pid)
+        return 200.0
+
+    tree = ProcessTree(create_time=create_time)
+    tree.load({50: (1, "chrome.exe", 200.0)}, now=0.0)
+    assert tree.name(50) == "chrome.exe"
+    assert tree.name(50) == "chrome.exe"
+    assert calls == [50, 50]
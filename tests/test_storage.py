@@ -0,0 +1,101 @@
+import json
+
+from focus_guardian import storage
+from focus_guardian.storage import write_json, read_json, generations, flush_pending, STATE_MAGIC
+
+
+def test_round_trip_and_rotation(tmp_path):
+    path = str(tmp_path / "usage.json")
+    for i in range(8):
+        write_json(path, {"n": i}, backups=3)
+        flush_pending()
+    gens = generations(path, 3)
+    assert [json.loads(open(p, "rb").read().split(b"\n", 1)[1]) for p in gens] == [{"n": 7}, {"n": 6}, {"n": 5}, {"n": 4}]
+    assert read_json(path, backups=3) == {"n": 7}
+
+
+def test_crash_mid_write_falls_back_to_previous_generation(tmp_path):
+    # A crash before the batched fsync can leave the newest file empty or
+    # cut short; both fail the checksum and the load uses path.1.
+    path = str(tmp_path / "game_db.json")
+    write_json(path, {"n": 1})
+    flush_pending()
+    write_json(path, {"n": 2})
+    with open(path, "r+b") as f:
+        f.truncate(len(STATE_MAGIC) + 12)
+    assert read_json(path) == {"n": 1}
+
+    open(path, "wb").close()
+    assert read_json(path) == {"n": 1}
+
+    # Damaged newer generations are skipped until one verifies.
+    flush_pending()
+    write_json(path, {"n": 3})
+    flush_pending()
+    write_json(path, {"n": 4})
+    blob = bytearray(open(path + ".1", "rb").read())
+    blob[-2] ^= 0xFF
+    open(path + ".1", "wb").write(bytes(blob))
+    open(path, "wb").close()
+    assert read_json(path) == {"n": 1}
+
+
+def test_only_flushed_files_become_backups(tmp_path, monkeypatch):
+    path = str(tmp_path / "usage.json")
+    synced = []
+    real = storage._fsync_file
+
+    def record(p):
+        if p == path:  # other tests may leave their files pending
+            synced.append((p, open(p, "rb").read()))
+        return real(p)
+
+    monkeypatch.setattr(storage, "_fsync_file", record)
+    write_json(path, {"n": 1})
+    flush_pending()
+    first = open(path, "rb").read()
+    assert synced == [(path, first)]
+
+    # Saves don't fsync; until the next flush they replace the newest file.
+    synced.clear()
+    write_json(path, {"n": 2})
+    write_json(path, {"n": 3})
+    assert synced == []
+    assert open(path + ".1", "rb").read() == first
+    assert not (tmp_path / "usage.json.2").exists()
+
+    flush_pending()
+    write_json(path, {"n": 4})
+    assert read_json(path + ".1", backups=0) == {"n": 3}
+    assert open(path + ".2", "rb").read() == first
+
+
+def test_legacy_files_without_a_header_still_load(tmp_path):
+    path = tmp_path / "usage.json"
+    path.write_text(json.dumps({"date": "2026-01-01", "usage": {}}), encoding="utf-8")
+    assert read_json(str(path)) == {"date": "2026-01-01", "usage": {}}
+
+
+def test_concurrent_writers_of_one_path(tmp_path):
+    # Monitor autosave, IPC and shutdown can save the same file at once.
+    import threading
+
+    path = str(tmp_path / "usage.json")
+    errors = []
+
+    def writer(tag):
+        try:
+            for i in range(300):
+                write_json(path, {"w": tag, "n": i}, backups=3)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(t,)) for t in ("a", "b")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert read_json(path, backups=3)["n"] == 299
+    assert [p.name for p in tmp_path.iterdir() if p.name.endswith(".tmp")] == []
+    flush_pending()
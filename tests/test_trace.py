@@ -0,0 +1,91 @@
+import logging
+
+import pytest
+
+pytest.importorskip("psutil")
+
+from focus_guardian.clock import GapDetector, DayClock
+from focus_guardian.engine import FocusEngine
+from focus_guardian.game_db import GameDB
+from focus_guardian.idle import FakeIdleSource
+from focus_guardian.process_monitor import TargetMatcher
+from focus_guardian.trace import TraceRecorder, replay, _NullTone
+from focus_guardian.usage_store import UsageStore
+from focus_guardian.utils import NS_PER_SEC
+
+
+class FakeClock:
+    # Integer-ns monotonic clock; wall time follows it plus any jumps.
+    def __init__(self):
+        self.ns = 5_000 * NS_PER_SEC
+        self.wall_offset = 1_790_000_000.0 - 5_000.0
+
+    def monotonic_ns(self) -> int:
+        return self.ns
+
+    def wall(self) -> float:
+        return self.wall_offset + self.ns / NS_PER_SEC
+
+
+def test_replay_matches_the_recorded_run(tmp_path):
+    logger = logging.getLogger("FocusGuardian.test")
+    clock = FakeClock()
+    idle = FakeIdleSource(0.0)
+    store = UsageStore(str(tmp_path / "usage.json"))
+    game = GameDB(str(tmp_path / "game_db.json"), logger, wall_clock=clock.wall)
+    engine = FocusEngine(
+        store=store,
+        game=game,
+        matcher=TargetMatcher(),
+        tone=_NullTone(),
+        logger=logger,
+        gap_detector=GapDetector(wall_clock=clock.wall),
+        wall_clock=clock.wall,
+        idle_source=idle,
+        day_clock=DayClock(wall_clock=clock.wall, monotonic=lambda: clock.ns / NS_PER_SEC),
+        monotonic_ns=clock.monotonic_ns,
+    )
+    engine.tree = None
+    engine.sweep = None
+    engine.autosave = False
+    engine.chime = lambda name: None
+    sample = {"fg": (1, 100), "name": "discord.exe"}
+    engine.foreground = lambda: sample["fg"]
+    engine.process_name = lambda pid: sample["name"]
+    engine.set_targets_text("discord.exe, steam.exe")
+    engine.set_daily_limit_text("1")
+
+    trace = str(tmp_path / "trace.jsonl.gz")
+    engine.set_recorder(TraceRecorder(trace))
+    engine.tick()
+    engine.start_strict_timer(1, 0.5, True)
+
+    apps = [((1, 100), "discord.exe"), ((2, 200), "code.exe"), ((3, 300), "steam.exe")]
+    for i in range(1, 900):
+        # Uneven 150-250 ms steps, app switches, an idle stretch and a suspend.
+        clock.ns += (150 + (i * 37) % 101) * 1_000_000
+        if i % 40 == 0:
+            sample["fg"], sample["name"] = apps[(i // 40) % len(apps)]
+        idle.idle_sec = 400.0 if 300 <= i < 360 else 1.0
+        if i == 500:
+            clock.ns += 120 * NS_PER_SEC
+            clock.wall_offset += 3.0
+        if i == 700:
+            engine.toggle_pause_strict_timer()
+        engine.tick()
+    engine.recorder.close()
+
+    report = replay(trace, metrics=False)
+    assert report["ticks"] == 900
+    assert report["usage"] == store.snapshot()[1]
+    assert report["usage_groups"] == store.group_snapshot()
+    live = game.snapshot_today()
+    assert report["game_today"]["day"]["totals"] == live["day"]["totals"]
+    assert report["game_today"]["lifetime"]["xp"] == live["lifetime"]["xp"]
+    assert report["game_today"]["active"] == live["active"]
+    # Timer deadlines are float seconds on a different origin; only totals are exact.
+    assert report["timer"] == pytest.approx(engine.timer_state())
+    assert report["game_today"]["day"]["sessions"] == live["day"]["sessions"]
+    assert len(live["day"]["sessions"]) >= 2
+    assert live["day"]["totals"]["study_sec"] > 0
+    assert store.get_seconds("discord.exe") > 0